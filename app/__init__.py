@@ -1,18 +1,74 @@
+import logging    #Structured, queue-backed logs (see app/services/structured_log.py)
 import os     #Gives access to OS-level features for reading environment variables and building file paths safely
+import time    #perf_counter for request latency
 from datetime import timedelta   #Used to define time durations, here JWT token expiry (30 days)
+import click    #Output of the init-db CLI command
 from dotenv import load_dotenv   #Loads environment variables from a .env file into memory
 
-from flask import Flask, jsonify, request     #Flask → creates the app, jsonify → returns JSON responses, request → access incoming HTTP request data
+from flask import Flask, jsonify, request, g     #g → per-request scratch space (request start time), Flask → creates the app, jsonify → returns JSON responses, request → access incoming HTTP request data
 from flask_cors import CORS     #Required when frontend & backend are on different origins
-import google.generativeai as genai    #Google Gemini AI SDK, Used later to configure and create the AI model
 
-from app.extensions import db, jwt     #import shared extensions: db → SQLAlchemy database instance, jwt → Flask-JWT-Extended instance
+from app.extensions import db, jwt, migrate, response_cache, llm_pool, hospital_directory, password_hasher, user_cache, structured_log, metrics, llm_metrics, llm_breaker, gemini, llm_single_flight, analysis_jobs, chat_sessions, compressor, hospital_feed, rate_limiter     #import shared extensions: db → SQLAlchemy database instance, jwt → Flask-JWT-Extended instance, migrate → Alembic migrations (flask db upgrade), response_cache → LLM reply cache, llm_pool → Gemini concurrency limiter, hospital_directory → nearest-hospital index, password_hasher → process pool for password KDF, user_cache → JWT user lookups, structured_log → non-blocking JSON logs, metrics → /metrics registry, llm_metrics → per-template Gemini call stats, llm_breaker → Gemini circuit breaker, gemini → lazily built shared Gemini model, llm_single_flight → coalesces identical in-flight prompts, analysis_jobs → background symptom-analysis jobs, chat_sessions → emergency chat history with a bounded prompt, compressor → gzip/brotli content-coding, hospital_feed → live capacity deltas for SSE subscribers, rate_limiter → per-user/per-IP token buckets shared by all workers
+from app import json_provider     #orjson-backed jsonify/get_json, stdlib when orjson is missing
+from app.database import database_url, engine_options, sqlite_pragmas, register_sqlite_pragmas, init_db     #DB URL, pool options, SQLite connection pragmas and the init-db step
+from app.services.llm_pool import LLMPoolFull
+from app.services.password_hasher import PasswordHasherBusy
+from app.services.hospital_feed import FeedFull
+from app.services.rate_limiter import RateLimited, retry_after_header
 from app.routes.main_routes import main_bp      #Imports Blueprints where each blueprint contains related routes and they will be registered later
 from  app.routes.auth_routes import auth_bp
 from app.routes.symptom_routes import symptom_bp
 from app.routes.emergency_chat_routes import emergency_chat_bp
+from app.routes.hospital_routes import hospital_bp
 
-def create_app():
+logger = logging.getLogger(__name__)
+request_logger = logging.getLogger("app.requests")
+
+request_latency = metrics.histogram(
+    "http_request_duration_seconds", "Request latency by route", ("endpoint", "method"))
+requests_total = metrics.counter(
+    "http_requests_total", "Requests by route and status", ("endpoint", "method", "status"))
+
+
+_CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+# (method, path) -> rate limit refused with 429 when its bucket is empty; emergency chat checks
+# its own limit and degrades to canned first aid instead (see emergency_chat_routes)
+RATE_LIMITED_ROUTES = {
+    ("POST", "/api/symptoms/analyze"): "symptoms",
+    ("POST", "/api/symptoms/jobs"): "symptoms",
+    ("POST", "/api/login"): "login",
+    ("POST", "/api/register"): "login",
+}
+
+
+def _collect_stats():
+    cache = response_cache.stats()
+    pool = llm_pool.stats()
+    users = user_cache.stats()
+    breaker = llm_breaker.stats()
+    flights = llm_single_flight.stats()
+    jobs = analysis_jobs.stats()
+    feed = hospital_feed.stats()
+    return {
+        ("response_cache_hit_rate", "Share of LLM reply lookups served from cache"): cache["hit_rate"],
+        ("response_cache_memory_entries", "Replies held in the in-process cache"): cache["memory_entries"],
+        ("llm_pool_active", "Gemini calls in flight"): pool["active"],
+        ("llm_pool_waiting", "Gemini calls queued for a slot"): pool["waiting"],
+        ("llm_pool_rejected_total", "Gemini calls refused with 503", "counter"): pool["rejected"] + pool["timed_out"],
+        ("user_cache_entries", "Users held in the JWT lookup cache"): users["entries"],
+        ("llm_circuit_state", "Gemini circuit: 0 closed, 1 half-open, 2 open"): _CIRCUIT_STATES[breaker["state"]],
+        ("llm_circuit_short_circuited_total", "Gemini calls skipped because the circuit was open", "counter"): breaker["short_circuited"],
+        ("llm_circuit_opened_total", "Times the Gemini circuit opened", "counter"): breaker["opened"],
+        ("llm_single_flight_saved_calls_total", "Gemini calls saved by joining an identical in-flight prompt", "counter"): flights["followers"],
+        ("llm_single_flight_in_flight", "Distinct prompts currently in flight"): flights["in_flight"],
+        ("analysis_jobs_in_process", "Symptom-analysis jobs queued or running in this worker"): jobs["in_process"],
+        ("hospital_feed_subscribers", "Open hospital capacity feeds in this worker"): feed["subscribers"],
+        ("log_records_dropped_total", "Log records dropped because the log queue was full", "counter"): structured_log.dropped(),
+    }
+
+
+def create_app(config=None):    #config → optional dict of overrides applied last (benchmarks, alternate databases)
     # -----------------------
     # Load environment
     # -----------------------
@@ -27,35 +83,122 @@ def create_app():
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))    #Gets the absolute path of the app/ directory
 
     app.config.update(     #Sets multiple Flask configuration values at once
-        SQLALCHEMY_DATABASE_URI="sqlite:///" + os.path.join(BASE_DIR, "app.db"),    #SQLite database stored as app.db inside app/
+        SQLALCHEMY_DATABASE_URI=database_url(os.path.join(BASE_DIR, "app.db")),    #DATABASE_URL if set, else SQLite database stored as app.db inside app/
+        DB_POOL_SIZE=int(os.getenv("DB_POOL_SIZE", "10")),    #Connections kept open per process
+        DB_MAX_OVERFLOW=int(os.getenv("DB_MAX_OVERFLOW", "10")),    #Extra connections allowed under bursts
+        DB_POOL_TIMEOUT=float(os.getenv("DB_POOL_TIMEOUT", "10")),    #Seconds to wait for a pooled connection
+        DB_POOL_RECYCLE=int(os.getenv("DB_POOL_RECYCLE", "1800")),    #Reopen connections older than this (server DBs drop idle ones)
+        SQLITE_JOURNAL_MODE=os.getenv("SQLITE_JOURNAL_MODE", "WAL"),    #WAL lets readers run while one writer commits
+        SQLITE_SYNCHRONOUS=os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),    #Durable across app crashes; fsync only at checkpoints
+        SQLITE_BUSY_TIMEOUT_MS=int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),    #Wait for a lock instead of failing with "database is locked"
+        SQLITE_MMAP_SIZE=int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),    #Bytes of the file read through mmap
+        SQLITE_CACHE_SIZE_KB=int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536")),    #Page cache per connection
         SQLALCHEMY_TRACK_MODIFICATIONS=False,   #Disables unnecessary SQLAlchemy tracking
+        GEMINI_API_KEY=os.getenv("GEMINI_API_KEY"),    #No key → services answer from the local fallback
+        GEMINI_MODEL=os.getenv("GEMINI_MODEL", "models/gemini-1.5-flash"),
+        GEMINI_FORCE_MOCK=os.getenv("GEMINI_FORCE_MOCK", "0") == "1",    #Always use the offline triage / canned replies, even with a key
         SECRET_KEY=os.getenv("SECRET_KEY", "dev-secret"),     #Flask’s internal security key, Uses env value if present, Falls back to "dev-secret" for development
         JWT_SECRET_KEY=os.getenv("JWT_SECRET_KEY", "dev-jwt-secret"),    #Secret key used to sign JWT tokens
         JWT_ACCESS_TOKEN_EXPIRES=timedelta(days=30),    #JWT tokens expire after 30 days
+        RESPONSE_CACHE_ENABLED=os.getenv("RESPONSE_CACHE_ENABLED", "1") != "0",    #Set to 0 to always call Gemini
+        RESPONSE_CACHE_SIZE=int(os.getenv("RESPONSE_CACHE_SIZE", "512")),    #Max replies kept in process memory
+        RESPONSE_CACHE_TTL=int(os.getenv("RESPONSE_CACHE_TTL", "300")),    #Seconds a reply stays in memory
+        RESPONSE_CACHE_PATH=os.getenv("RESPONSE_CACHE_PATH", os.path.join(BASE_DIR, "response_cache.db")),    #SQLite file for the persistent tier, empty disables it
+        RESPONSE_CACHE_PERSISTENT_SIZE=int(os.getenv("RESPONSE_CACHE_PERSISTENT_SIZE", "10000")),    #Max replies kept on disk
+        RESPONSE_CACHE_PERSISTENT_TTL=int(os.getenv("RESPONSE_CACHE_PERSISTENT_TTL", "86400")),    #Seconds a reply stays on disk
+        LLM_MAX_CONCURRENCY=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),    #Max Gemini calls in flight per process
+        LLM_EMERGENCY_RESERVED=int(os.getenv("LLM_EMERGENCY_RESERVED", "2")),    #Slots only emergency chat may use
+        LLM_QUEUE_SIZE=int(os.getenv("LLM_QUEUE_SIZE", "16")),    #Symptom checks allowed to wait for a slot before 503
+        LLM_EMERGENCY_QUEUE_SIZE=int(os.getenv("LLM_EMERGENCY_QUEUE_SIZE", "32")),    #Emergency calls allowed to wait for a slot
+        LLM_QUEUE_TIMEOUT=float(os.getenv("LLM_QUEUE_TIMEOUT", "10")),    #Seconds a queued call waits before giving up
+        EMERGENCY_CHAT_DEADLINE=float(os.getenv("EMERGENCY_CHAT_DEADLINE", "8")),    #Seconds emergency chat waits for the AI before answering with hospitals + canned first aid
+        SYMPTOMS_LLM_BUDGET=float(os.getenv("SYMPTOMS_LLM_BUDGET", "12")),    #Seconds symptom analysis may spend on Gemini before answering with the offline triage
+        LLM_HEDGE_ENABLED=os.getenv("LLM_HEDGE_ENABLED", "0") == "1",    #Fire a second identical Gemini call when the first is slower than usual
+        LLM_HEDGE_QUANTILE=float(os.getenv("LLM_HEDGE_QUANTILE", "0.95")),    #Hedge after this percentile of recent call times
+        LLM_HEDGE_MIN_SAMPLES=int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20")),    #Calls observed before the percentile is trusted
+        ANALYSIS_JOB_WORKERS=int(os.getenv("ANALYSIS_JOB_WORKERS", "4")),    #Threads per process running symptom-analysis jobs
+        ANALYSIS_JOB_BUDGET=float(os.getenv("ANALYSIS_JOB_BUDGET", "60")),    #Seconds a job may spend on Gemini (incl. waiting for a slot) before the offline triage answers
+        ANALYSIS_JOB_MAX_WAIT=float(os.getenv("ANALYSIS_JOB_MAX_WAIT", "25")),    #Longest long-poll on GET /api/symptoms/jobs/<id>?wait=
+        ANALYSIS_JOB_POLL_INTERVAL=float(os.getenv("ANALYSIS_JOB_POLL_INTERVAL", "0.5")),    #DB re-check period of a long-poll for a job running in another worker
+        ANALYSIS_JOB_TTL=int(os.getenv("ANALYSIS_JOB_TTL", "86400")),    #Seconds finished jobs (and their idempotency keys) are kept
+        CHAT_CONTEXT_TOKENS=int(os.getenv("CHAT_CONTEXT_TOKENS", "1200")),    #Estimated tokens of history sent with an emergency chat message: rolling summary + recent turns verbatim
+        CHAT_SUMMARY_TOKENS=int(os.getenv("CHAT_SUMMARY_TOKENS", "300")),    #Part of that budget for the summary of older turns (at most half)
+        CHAT_SESSION_TTL=int(os.getenv("CHAT_SESSION_TTL", "21600")),    #Seconds an idle chat session is kept
+        HOSPITAL_INDEX_CELL_DEG=float(os.getenv("HOSPITAL_INDEX_CELL_DEG", "0.05")),    #Grid cell size (degrees, ~5.5 km) of the nearest-hospital index
+        HOSPITAL_SNAPSHOT_CHECK_INTERVAL=float(os.getenv("HOSPITAL_SNAPSHOT_CHECK_INTERVAL", "2.0")),    #Seconds between checks for hospital changes committed by other workers
+        HOSPITAL_PAGE_SIZE=int(os.getenv("HOSPITAL_PAGE_SIZE", "10")),    #Default hospitals per page for location queries
+        HOSPITAL_MAX_PAGE_SIZE=int(os.getenv("HOSPITAL_MAX_PAGE_SIZE", "50")),
+        HOSPITAL_UPDATE_TOKEN=os.getenv("HOSPITAL_UPDATE_TOKEN"),    #Shared secret for PATCH /api/hospitals/<id> (X-Hospital-Token), unset disables capacity updates
+        HOSPITAL_FEED_HISTORY=int(os.getenv("HOSPITAL_FEED_HISTORY", "1024")),    #Capacity deltas kept for reconnecting feed clients, older ones get a fresh snapshot
+        HOSPITAL_FEED_HEARTBEAT=float(os.getenv("HOSPITAL_FEED_HEARTBEAT", "15")),    #Seconds between keepalive comments on an idle feed
+        HOSPITAL_FEED_MAX_SUBSCRIBERS=int(os.getenv("HOSPITAL_FEED_MAX_SUBSCRIBERS", "4")),    #Feed streams per WSGI worker, each holds a request thread; beyond it 503 + Retry-After (0 = no limit, ASGI never limited)
+        PASSWORD_HASH_METHOD=os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1"),    #werkzeug KDF + cost, older hashes are upgraded on next login
+        PASSWORD_HASH_WORKERS=int(os.getenv("PASSWORD_HASH_WORKERS", "2")),    #Processes used for hashing, 0 hashes inline on the request thread
+        PASSWORD_HASH_MAX_PENDING=int(os.getenv("PASSWORD_HASH_MAX_PENDING", "8")),    #Hash jobs queued or running before callers wait
+        PASSWORD_HASH_TIMEOUT=float(os.getenv("PASSWORD_HASH_TIMEOUT", "5")),    #Seconds to wait for a hashing slot before 503
+        USER_CACHE_SIZE=int(os.getenv("USER_CACHE_SIZE", "1024")),    #Users kept in the per-process lookup cache
+        USER_CACHE_TTL=float(os.getenv("USER_CACHE_TTL", "30")),    #Seconds another worker may serve a profile changed elsewhere
+        LLM_BREAKER_WINDOW=int(os.getenv("LLM_BREAKER_WINDOW", "20")),    #Recent Gemini calls the breaker judges
+        LLM_BREAKER_MIN_CALLS=int(os.getenv("LLM_BREAKER_MIN_CALLS", "5")),    #Calls needed in the window before it may open
+        LLM_BREAKER_FAILURE_RATE=float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5")),    #Failure share that opens the circuit
+        LLM_BREAKER_SLOW_CALL_S=float(os.getenv("LLM_BREAKER_SLOW_CALL_S", "10")),    #Calls slower than this count as slow
+        LLM_BREAKER_SLOW_RATE=float(os.getenv("LLM_BREAKER_SLOW_RATE", "0.8")),    #Slow-call share that opens the circuit
+        LLM_BREAKER_OPEN_SECONDS=float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "30")),    #Time answers come from the local fallback before probing Gemini again
+        LLM_BREAKER_PROBES=int(os.getenv("LLM_BREAKER_PROBES", "1")),    #Probe calls (and successes needed) in half-open state
+        JSON_PROVIDER=os.getenv("JSON_PROVIDER", "fast"),    #"fast" → orjson encodes/decodes JSON when installed, "default" → Flask's stdlib provider
+        COMPRESS_ENABLED=os.getenv("COMPRESS_ENABLED", "1") != "0",    #gzip/brotli responses for clients that send Accept-Encoding
+        COMPRESS_MIN_SIZE=int(os.getenv("COMPRESS_MIN_SIZE", "1024")),    #Dynamic bodies smaller than this (bytes) go out as is, compression would not pay for its CPU
+        COMPRESS_GZIP_LEVEL=int(os.getenv("COMPRESS_GZIP_LEVEL", "6")),    #Per-response gzip level; constant replies are precompressed at 9
+        COMPRESS_BROTLI_QUALITY=int(os.getenv("COMPRESS_BROTLI_QUALITY", "4")),    #Per-response brotli quality (needs the brotli package); constant replies use 11
+        RATE_LIMIT_ENABLED=os.getenv("RATE_LIMIT_ENABLED", "1") != "0",
+        RATE_LIMIT_PATH=os.getenv("RATE_LIMIT_PATH", os.path.join(BASE_DIR, "rate_limits.bin")),    #Memory-mapped bucket table shared by the workers on this host, empty → per-process buckets
+        RATE_LIMIT_SLOTS=int(os.getenv("RATE_LIMIT_SLOTS", "65536")),    #Buckets the shared table holds (16 bytes each); refilled buckets are reused
+        RATE_LIMIT_TRUSTED_PROXIES=int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "0")),    #Proxies in front of the app; the client IP is read from X-Forwarded-For that many hops from the right
+        RATE_LIMIT_SYMPTOMS_USER=os.getenv("RATE_LIMIT_SYMPTOMS_USER", "20/minute"),    #"N/second|minute|hour|day" = bucket of N refilled over the period, "" = no limit; analyze + jobs share it
+        RATE_LIMIT_SYMPTOMS_IP=os.getenv("RATE_LIMIT_SYMPTOMS_IP", "60/minute"),    #Higher than per user: clinics and mobile carriers put many users behind one address
+        RATE_LIMIT_EMERGENCY_USER=os.getenv("RATE_LIMIT_EMERGENCY_USER", "30/minute"),    #Over it emergency chat still answers (hospitals + canned first aid), only Gemini is skipped
+        RATE_LIMIT_EMERGENCY_IP=os.getenv("RATE_LIMIT_EMERGENCY_IP", "120/minute"),
+        RATE_LIMIT_LOGIN_IP=os.getenv("RATE_LIMIT_LOGIN_IP", "20/minute"),    #Login + register (password hashing) per client IP
+        LOG_LEVEL=os.getenv("LOG_LEVEL", "INFO"),    #Level of the `app` logger tree
+        LOG_SAMPLE_RATE=float(os.getenv("LOG_SAMPLE_RATE", "1.0")),    #Fraction of INFO request logs kept, warnings/errors/slow requests are always kept
+        LOG_SLOW_REQUEST_MS=float(os.getenv("LOG_SLOW_REQUEST_MS", "1000")),    #Requests slower than this are logged as warnings
+        LOG_QUEUE_SIZE=int(os.getenv("LOG_QUEUE_SIZE", "10000")),    #Records buffered for the log thread, extra records are dropped (counted in /metrics)
     )
+    if config:
+        app.config.update(config)
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(app.config))   #Pool sizing for whichever URL ended up configured
 
     # -----------------------
     # Init extensions
     # -----------------------
+    json_provider.install(app)   #Before the blueprints: symptom routes pre-encode their constant replies with app.json
     db.init_app(app)    #Binds SQLAlchemy to this Flask app
+    with app.app_context():
+        register_sqlite_pragmas(db.engine, sqlite_pragmas(app.config))    #WAL, busy timeout etc. on every new SQLite connection (no-op for server DBs)
     jwt.init_app(app)   #Attaches JWT authentication to the app
+    migrate.init_app(app, db, directory=os.path.join(os.path.dirname(BASE_DIR), "migrations"))   #Enables `flask db upgrade` for schema changes on existing databases
+    response_cache.init_app(app)   #Opens the two-tier LLM reply cache (memory LRU + SQLite)
+    llm_pool.init_app(app)   #Applies concurrency limit and queue bounds for Gemini calls
+    llm_breaker.init_app(app)   #Opens on failures/slow calls so outages go straight to the local fallback
+    hospital_directory.init_app(app, db.session)   #In-memory hospital index, kept in sync with committed Hospital rows
+    hospital_feed.init_app(app)   #Listens to the directory and fans capacity deltas out to SSE subscribers
+    password_hasher.init_app(app)   #Hash cost and pool size for login/register
+    user_cache.init_app(app)   #Bounded cache behind flask_jwt_extended.current_user
+    analysis_jobs.init_app(app)   #Worker threads and long-poll limits for symptom-analysis jobs
+    chat_sessions.init_app(app)   #Token budget and expiry of emergency chat sessions
+    compressor.init_app(app)   #Accept-Encoding negotiation and size threshold for compressed responses
+    rate_limiter.init_app(app)   #Per-user / per-IP token buckets, in a file mapped by every worker
+    structured_log.init_app(app)   #JSON logs written by a background thread, PHI fields redacted
+    metrics.add_collector(_collect_stats)   #Cache/pool/log stats exported on /metrics, running totals as counters
+    gemini.init_app(app)   #Key/model/mock settings only, the SDK is imported on the first Gemini call
 
     # -----------------------
-    # Gemini (ONE place)
-    # -----------------------
-    gemini_key = os.getenv("GEMINI_API_KEY")    #Reads Gemini API key from environment
-    if gemini_key:     #If key exists → configure Gemini
-        genai.configure(api_key=gemini_key)    #Authenticates Gemini SDK
-        app.gemini_model = genai.GenerativeModel("models/gemini-1.5-flash")   #Creates AI model instance and stores it on app
-    else:
-        app.gemini_model = None
-        print("⚠️ GEMINI_API_KEY not set")     #Safe fallback if key is missing
-
-    # -----------------------
-    # Create tables (dev only)
+    # Schema (explicit step)
     # -----------------------
-    with app.app_context():    #Required for DB operations outside requests
-        db.create_all()    #Creates all tables defined in models, runs once at startup
+    @app.cli.command("init-db")    #`flask --app run init-db`: run all migrations, then seed reference data
+    def init_db_command():
+        init_db()
+        click.echo("Database is up to date.")
 
     # -----------------------
     # JWT error handlers
@@ -72,17 +215,83 @@ def create_app():
     def missing_token_callback(error):
         return jsonify({"msg": "Authorization token is missing"}), 401
 
+    @jwt.user_lookup_loader   #Runs on every protected request, result is available as current_user
+    def user_lookup_callback(jwt_header, jwt_payload):
+        return user_cache.get(int(jwt_payload["sub"]))    #Served from memory, DB only on a miss
+
+    @jwt.user_lookup_error_loader   #Triggered when the token's user no longer exists
+    def user_lookup_error_callback(jwt_header, jwt_payload):
+        return jsonify({"msg": "User not found"}), 404
+
+    # -----------------------
+    # Overload handler
+    # -----------------------
+    @app.errorhandler(LLMPoolFull)   #Triggered when the Gemini queue is full, fails fast instead of hanging
+    def llm_pool_full(error):
+        response = jsonify({"msg": "Server busy, please retry", "retry_after": error.retry_after})
+        response.headers["Retry-After"] = str(error.retry_after)
+        return response, 503
+
+    @app.errorhandler(PasswordHasherBusy)   #Triggered when a login/register burst fills the hashing pool
+    def password_hasher_busy(error):
+        response = jsonify({"msg": "Server busy, please retry", "retry_after": error.retry_after})
+        response.headers["Retry-After"] = str(error.retry_after)
+        return response, 503
+
+    @app.errorhandler(FeedFull)   #Triggered when a WSGI worker already holds its share of feed streams
+    def hospital_feed_full(error):
+        response = jsonify({"msg": "Too many feed subscribers, please retry", "retry_after": error.retry_after})
+        response.headers["Retry-After"] = str(error.retry_after)
+        return response, 503
+
+    @app.errorhandler(RateLimited)   #Triggered when a client's token bucket is empty
+    def rate_limited(error):
+        retry_after = retry_after_header(error.retry_after)
+        response = jsonify({"msg": "Too many requests, please retry later", "retry_after": int(retry_after)})
+        response.headers["Retry-After"] = retry_after
+        return response, 429
+
     # -----------------------
-    # Request logger (optional)
+    # Request logging + latency
     # -----------------------
     @app.before_request    #Runs before every request
-    def log_request_info():
-        if request.path.startswith("/api/"):    #Only logs API requests
-            print(f"\n{'='*50}")
-            print(f"📥 {request.method} {request.path}")   #Logs HTTP method and path
-            if "Authorization" in request.headers:   #Confirms JWT header exists
-                print("🔑 Auth header present")
-            print(f"{'='*50}\n")
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.before_request    #Runs after the timer so refused requests are timed and logged too
+    def enforce_rate_limit():
+        name = RATE_LIMITED_ROUTES.get((request.method, request.path))
+        if name is not None:
+            rate_limiter.check(name, *rate_limiter.identify(
+                request.headers.get("Authorization"), request.remote_addr, request.headers.get("X-Forwarded-For")))
+
+    @app.after_request    #Runs after every request (streamed responses: time to first byte)
+    def record_request(response):
+        started = g.pop("request_started", None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"   #Route pattern, not the raw path, keeps label count bounded
+        request_latency.observe(elapsed, endpoint=endpoint, method=request.method)
+        requests_total.inc(endpoint=endpoint, method=request.method, status=str(response.status_code))
+
+        duration_ms = round(elapsed * 1000, 2)
+        slow = duration_ms >= structured_log.slow_ms
+        request_logger.log(
+            logging.WARNING if response.status_code >= 500 or slow else logging.INFO,   #INFO lines are sampled, warnings are always kept
+            "request",
+            extra={"method": request.method, "endpoint": endpoint, "status": response.status_code,
+                   "duration_ms": duration_ms, "slow": slow},
+        )
+        return response
+
+    @app.after_request    #Registered last so it runs first: the latency above includes compressing
+    def compress_response(response):
+        return compressor.compress(response, request.headers.get("Accept-Encoding"))
+
+    @app.route("/metrics")   #Prometheus text exposition, per worker process
+    def metrics_endpoint():
+        return app.response_class(metrics.render(), mimetype="text/plain; version=0.0.4")
 
     # -----------------------
     # Register blueprints
@@ -91,6 +300,7 @@ def create_app():
     app.register_blueprint(auth_bp)
     app.register_blueprint(symptom_bp)
     app.register_blueprint(emergency_chat_bp)
+    app.register_blueprint(hospital_bp)
 
     # -----------------------
     # Health check
@@ -101,7 +311,19 @@ def create_app():
     def health():
         return {
             "db": "ok",
-            "gemini": bool(app.gemini_model)
+            "gemini": {
+                **gemini.stats(),   #configured / loaded (built in this worker) / model / force_mock
+                "templates": llm_metrics.stats(),   #calls, errors, latency, tokens and fallback rate per prompt template
+                "circuit": llm_breaker.stats(),   #closed / open / half_open and recent failures
+                "single_flight": llm_single_flight.stats(),   #followers = calls saved by coalescing
+            },
+            "analysis_jobs": analysis_jobs.stats(),
+            "chat_sessions": chat_sessions.stats(),   #avg estimated prompt tokens per turn, compacted vs. full history
+            "compression": compressor.stats(),   #responses compressed per request / served precompressed, bytes in → out
+            "hospital_feed": hospital_feed.stats(),   #subscribers, deltas published, snapshots sent, resumed reconnects
+            "rate_limits": rate_limiter.stats(),   #checks, refusals and the bucket backend (shared / memory)
+            "cache": response_cache.stats(),
+            "llm_pool": llm_pool.stats(),
         }, 200    #this block confirms that database is reachable and Gemini is loaded
 
     return app
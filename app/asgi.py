@@ -0,0 +1,407 @@
+"""
+ASGI serving with native async views for the LLM-bound endpoints.
+
+    uvicorn asgi:application --workers 2
+
+POST /api/symptoms/analyze and POST /api/emergency/chat are coroutines
+here: a request waiting on Gemini is a suspended task awaiting
+generate_content_async, not a blocked thread, so one worker can hold
+many calls in flight (raise LLM_MAX_CONCURRENCY / LLM_QUEUE_SIZE to let
+it). GET /api/hospitals/feed subscribers are tasks too. Everything else - auth, profile, metrics, CORS preflights and the
+same two paths with other methods - is passed to the Flask app through
+asgiref's WsgiToAsgi and runs on a thread exactly as under WSGI.
+
+Blocking work of the async views (hospital lookups, the SQLite tier of
+the reply cache) runs in threads via asyncio.to_thread; the event loop
+only ever waits.
+"""
+import asyncio
+import logging
+import time
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import RATE_LIMITED_ROUTES, request_latency, requests_total, request_logger
+from app.extensions import (
+    db, chat_sessions, compressor, gemini, hospital_directory, hospital_feed, rate_limiter, structured_log
+)
+from app.json_provider import dumps_bytes, loads
+from app.routes.emergency_chat_routes import (
+    _BadQuery, _capacity_query, _fallback_reply, _hospital_data, _listing_tail, _location_query, _stream_error
+)
+from app.routes.symptom_routes import _static_reply, _stream_failed
+from app.services.compression import Precompressed, Prefixed
+from app.services.emergency_gemini_service import (
+    emergency_ai_response_async, stream_emergency_ai_response_async, EMERGENCY_FALLBACK_TEXT, SYSTEM_PROMPT,
+)
+from app.services.llm_calls import Deadline, DeadlineExceeded, ModelUnavailable
+from app.services.llm_pool import LLMPoolFull
+from app.services.rate_limiter import RateLimited, retry_after_header
+from app.services.symptom_checker_service import analyze_symptoms_async, stream_symptoms_async, generate_smart_response
+from app.sse import sse_event, sse_raw_event
+
+logger = logging.getLogger(__name__)
+
+
+class _HTTPError(Exception):
+    def __init__(self, status, msg):
+        super().__init__(msg)
+        self.status = status
+        self.msg = msg
+
+
+# -----------------------
+# Request / responses
+# -----------------------
+class Request:
+    __slots__ = ("method", "path", "query", "headers", "body", "disconnected", "client")
+
+    def __init__(self, scope, body, disconnected):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.client = (scope.get("client") or (None,))[0]
+        self.query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        self.headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+        self.body = body
+        self.disconnected = disconnected   # asyncio.Event set when the client goes away
+
+    def json(self):
+        """Same contract as Flask's request.get_json(): 415 without a JSON content type, 400 if invalid."""
+        if "json" not in self.headers.get("content-type", ""):
+            raise _HTTPError(415, "Content-Type must be application/json")
+        try:
+            data = loads(self.body)
+        except ValueError:
+            raise _HTTPError(400, "Invalid JSON body")
+        return data if isinstance(data, dict) else {}
+
+    def identity(self):
+        """rate_limiter.identify for this request: (user id or None, client IP)."""
+        return rate_limiter.identify(self.headers.get("authorization"), self.client, self.headers.get("x-forwarded-for"))
+
+    def wants_stream(self, data):
+        """app.sse.wants_stream for this request."""
+        if self.query.get("stream", [""])[0] in ("1", "true"):
+            return True
+        if data.get("stream") is True:
+            return True
+        return "text/event-stream" in self.headers.get("accept", "")
+
+
+class JSONResponse:
+    def __init__(self, body, status=200, headers=None):
+        self.body = body if isinstance(body, (bytes, Precompressed, Prefixed)) else dumps_bytes(body)
+        self.status = status
+        self.headers = headers or {}
+
+    async def send(self, send, request, extra_headers):
+        # Same content-coding as the Flask after_request hook; precompressed bodies cost nothing here
+        body, coding = compressor.encode(self.body, request.headers.get("accept-encoding"))
+        headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        if compressor.enabled:
+            headers.append((b"vary", b"Accept-Encoding"))
+        if coding:
+            headers.append((b"content-encoding", coding.encode()))
+        headers += [(k.encode("latin-1"), str(v).encode("latin-1")) for k, v in self.headers.items()]
+        await send({"type": "http.response.start", "status": self.status, "headers": headers + extra_headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+class EventStream:
+    """Server-Sent Events from an async generator of formatted events (app.sse)."""
+
+    status = 200
+
+    def __init__(self, events):
+        self.events = events
+
+    async def send(self, send, request, extra_headers):
+        headers = [(b"content-type", b"text/event-stream; charset=utf-8"), (b"cache-control", b"no-cache"),
+                   (b"x-accel-buffering", b"no")]
+        await send({"type": "http.response.start", "status": 200, "headers": headers + extra_headers})
+        try:
+            async for event in self.events:
+                if request.disconnected.is_set():
+                    break   # closing the generator ends the Gemini stream and frees its slot
+                await send({"type": "http.response.body", "body": event.encode("utf-8"), "more_body": True})
+        finally:
+            await self.events.aclose()
+        await send({"type": "http.response.body", "body": b""})
+
+
+def _error(status, msg, **extra):
+    return JSONResponse({"msg": msg, **extra}, status)
+
+
+def _busy(error):
+    return JSONResponse({"msg": "Server busy, please retry", "retry_after": error.retry_after}, 503,
+                        {"Retry-After": error.retry_after})
+
+
+def _rate_limited(error):
+    retry_after = retry_after_header(error.retry_after)
+    return JSONResponse({"msg": "Too many requests, please retry later", "retry_after": int(retry_after)}, 429,
+                        {"Retry-After": retry_after})
+
+
+def _reply(text, degraded):
+    """Symptom reply; constant triage texts use the bodies the Flask blueprint precompressed."""
+    return JSONResponse(_static_reply(text, degraded) or {"reply": text, "degraded": degraded})
+
+
+def _detach(task):
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+# -----------------------
+# Async views
+# -----------------------
+async def analyze_symptoms(app, request):
+    data = request.json()
+    symptom_text = data.get("symptoms")
+    if not symptom_text:
+        return _error(400, "Symptom text is required")
+
+    deadline = Deadline(app.config["SYMPTOMS_LLM_BUDGET"])
+    if request.wants_stream(data):
+        return EventStream(_symptom_events(symptom_text, deadline))
+
+    try:
+        return _reply(await analyze_symptoms_async(symptom_text, deadline), False)
+    except (DeadlineExceeded, ModelUnavailable):
+        return _reply(generate_smart_response(symptom_text), True)
+
+
+async def _symptom_events(symptom_text, deadline):
+    try:
+        async for chunk in stream_symptoms_async(symptom_text, deadline):
+            yield sse_event("chunk", {"text": chunk})
+    except Exception as e:
+        for event in _stream_failed(symptom_text, e):
+            yield event
+        return
+    yield sse_event("done", {"degraded": False})
+
+
+def _hospitals(query, data):
+    """Runs in a worker thread: (snapshot JSON text, None, False) or (hospital dicts, pagination, True)."""
+    capacity = _capacity_query(data)
+    if query is None and capacity is None:
+        return hospital_directory.all_json(), None, False
+    hospitals, pagination = _hospital_data(query, capacity)
+    return hospitals, pagination, True
+
+
+async def emergency_chat(app, request):
+    data = request.json()
+    message = data.get("message")
+    if not message:
+        return _error(400, "Message required")
+    try:
+        query = _location_query(data)
+    except _BadQuery as e:
+        return _error(400, str(e))
+
+    session_id = str(data["session_id"]) if data.get("session_id") is not None else None
+    history = ""
+    if session_id is not None:
+        history = await asyncio.to_thread(chat_sessions.context, session_id, SYSTEM_PROMPT, message)
+        if history is None:
+            return _error(404, "Chat session not found")
+
+    # Over the limit: hospitals and canned first aid without a Gemini call, as in the WSGI view
+    try:
+        rate_limiter.check("emergency", *request.identity())
+        limited = None
+    except RateLimited as e:
+        limited = e
+
+    deadline = Deadline(app.config["EMERGENCY_CHAT_DEADLINE"])
+    if request.wants_stream(data):
+        try:
+            hospitals, pagination, decoded = await asyncio.to_thread(_hospitals, query, data)
+        except _BadQuery as e:
+            return _error(400, str(e))
+        return EventStream(_emergency_events(message, deadline, hospitals, pagination, decoded, session_id, history,
+                                             limited))
+
+    # The AI reply and the hospital lookup proceed together, as in the WSGI view
+    llm_task = None
+    if limited is None:
+        llm_task = asyncio.ensure_future(emergency_ai_response_async(message, deadline, history))
+    try:
+        hospitals, pagination, decoded = await asyncio.to_thread(_hospitals, query, data)
+    except BaseException as e:
+        if llm_task is not None:
+            llm_task.cancel()
+        if isinstance(e, _BadQuery):
+            return _error(400, str(e))
+        raise
+
+    degraded = False
+    try:
+        if limited is not None:
+            raise limited
+        ai_reply = await asyncio.wait_for(asyncio.shield(llm_task), deadline.remaining())
+    except asyncio.TimeoutError as e:
+        _detach(llm_task)   # the call keeps running and still fills the cache
+        ai_reply, degraded = _fallback_reply(e), True
+    except Exception as e:
+        ai_reply, degraded = _fallback_reply(e), True
+
+    if session_id is not None:
+        await asyncio.to_thread(chat_sessions.record, session_id, message, None if degraded else ai_reply)
+
+    if not decoded:
+        return JSONResponse(Prefixed(b'{"hospitals": ', hospitals, _listing_tail(ai_reply, degraded, session_id)))
+    body = {"text": ai_reply, "hospitals": hospitals, "degraded": degraded}
+    if pagination:
+        body["pagination"] = pagination
+    if session_id is not None:
+        body["session_id"] = session_id
+    return JSONResponse(body)
+
+
+async def _limited_chunks(limited):
+    yield _fallback_reply(limited)
+
+
+async def _emergency_events(message, deadline, hospitals, pagination, decoded, session_id=None, history="",
+                            limited=None):
+    yield sse_event("hospitals", hospitals) if decoded else sse_raw_event("hospitals", hospitals)
+    if pagination:
+        yield sse_event("pagination", pagination)
+    parts = []
+    if limited is not None:
+        chunks = _limited_chunks(limited)
+    else:
+        chunks = stream_emergency_ai_response_async(message, deadline, history)
+    try:
+        async for chunk in chunks:
+            parts.append(chunk)
+            yield sse_event("chunk", {"text": chunk})
+    except Exception as e:
+        yield _stream_error(e)
+        parts = None
+    reply = "".join(parts) if parts else None
+    if session_id is not None:
+        await asyncio.to_thread(chat_sessions.record, session_id, message,
+                                None if reply == EMERGENCY_FALLBACK_TEXT else reply)
+    if parts is not None:
+        yield sse_event("done", {"degraded": reply == EMERGENCY_FALLBACK_TEXT})
+
+
+async def hospital_feed_stream(app, request):
+    # A subscriber is a task waiting on the feed, not a thread held for the life of the stream
+    last_event_id = request.headers.get("last-event-id") or request.query.get("last_event_id", [None])[0]
+    return EventStream(hospital_feed.stream_async(last_event_id))
+
+
+ASYNC_ROUTES = {
+    ("POST", "/api/symptoms/analyze"): analyze_symptoms,
+    ("POST", "/api/emergency/chat"): emergency_chat,
+    ("GET", "/api/hospitals/feed"): hospital_feed_stream,
+}
+
+
+# -----------------------
+# ASGI application
+# -----------------------
+class AsyncApp:
+    """ASGI callable: async views above, everything else through the Flask app."""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        view = ASYNC_ROUTES.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+        if view is None:
+            return await self.wsgi(scope, receive, send)
+        await self._serve(view, scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # Build the model (importing the SDK) before traffic; on first use it would block the loop
+                await asyncio.to_thread(gemini.get)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _serve(self, view, scope, receive, send):
+        started = time.perf_counter()
+        body = b""
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        disconnected = asyncio.Event()
+        watcher = asyncio.ensure_future(self._watch_disconnect(receive, disconnected))
+        request = Request(scope, body, disconnected)
+        extra_headers = []
+        origin = request.headers.get("origin")
+        if origin:
+            # What flask_cors.CORS(app) sends with its defaults
+            extra_headers = [(b"access-control-allow-origin", origin.encode("latin-1")), (b"vary", b"Origin")]
+
+        with self.flask_app.app_context():   # current_app for config lookups in the services
+            try:
+                limit = RATE_LIMITED_ROUTES.get((request.method, request.path))
+                if limit is not None:
+                    rate_limiter.check(limit, *request.identity())
+                response = await view(self.flask_app, request)
+            except _HTTPError as e:
+                response = _error(e.status, e.msg)
+            except LLMPoolFull as e:
+                response = _busy(e)
+            except RateLimited as e:
+                response = _rate_limited(e)
+            except Exception:
+                logger.exception("async_view_failed", extra={"endpoint": request.path})
+                response = _error(500, "Internal server error")
+            self._record(request, response.status, started)
+            try:
+                await response.send(send, request, extra_headers)
+            finally:
+                watcher.cancel()
+                if db.session.registry.has():
+                    await asyncio.to_thread(db.session.remove)   # the session was used from a worker thread
+
+    @staticmethod
+    async def _watch_disconnect(receive, disconnected):
+        while (await receive())["type"] != "http.disconnect":
+            pass
+        disconnected.set()
+
+    @staticmethod
+    def _record(request, status, started):
+        """Same metrics and log line as the Flask after_request hook (streams: time to first byte)."""
+        elapsed = time.perf_counter() - started
+        request_latency.observe(elapsed, endpoint=request.path, method=request.method)
+        requests_total.inc(endpoint=request.path, method=request.method, status=str(status))
+        duration_ms = round(elapsed * 1000, 2)
+        slow = duration_ms >= structured_log.slow_ms
+        request_logger.log(
+            logging.WARNING if status >= 500 or slow else logging.INFO,
+            "request",
+            extra={"method": request.method, "endpoint": request.path, "status": status,
+                   "duration_ms": duration_ms, "slow": slow, "asgi": True},
+        )
+
+
+def create_asgi_app(flask_app=None):
+    """flask_app: an app from create_app(); built with the environment's settings when omitted."""
+    if flask_app is None:
+        from app import create_app
+        flask_app = create_app()
+    return AsyncApp(flask_app)
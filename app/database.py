@@ -0,0 +1,84 @@
+import os
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def database_url(default_path: str) -> str:
+    """DATABASE_URL from the environment, else the bundled SQLite file."""
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        return "sqlite:///" + default_path
+    # Heroku-style URLs still use the scheme SQLAlchemy dropped in 1.4
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def engine_options(config) -> dict:
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for the configured URL: explicit pool sizing
+    and recycling for every backend, plus a lock wait for SQLite files.
+    """
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    options = {
+        "pool_pre_ping": True,
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+    }
+    if url.get_backend_name() == "sqlite":
+        if url.database in (None, "", ":memory:"):
+            return {}   # in-memory databases use SQLAlchemy's single-connection pool
+        options["connect_args"] = {
+            "timeout": config["SQLITE_BUSY_TIMEOUT_MS"] / 1000,
+            "check_same_thread": False,
+        }
+    options.update(
+        pool_size=config["DB_POOL_SIZE"],
+        max_overflow=config["DB_MAX_OVERFLOW"],
+        pool_timeout=config["DB_POOL_TIMEOUT"],
+    )
+    return options
+
+
+def sqlite_pragmas(config) -> list:
+    return [
+        f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}",
+        f"PRAGMA cache_size=-{int(config['SQLITE_CACHE_SIZE_KB'])}",   # negative = KiB
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def register_sqlite_pragmas(engine, pragmas):
+    """Apply `pragmas` to every new DBAPI connection of a SQLite engine."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _apply(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def init_db():
+    """
+    Bring the schema to the latest migration and seed reference data.
+
+    Run once per deploy (`flask --app run init-db`) instead of on every
+    boot; safe to repeat. Needs an app context.
+    """
+    from flask_migrate import upgrade
+
+    from app.models import seed_hospitals
+
+    upgrade()
+    seed_hospitals()
@@ -1,5 +1,40 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
+from flask_migrate import Migrate
+
+from app.services.analysis_jobs import AnalysisJobs
+from app.services.chat_sessions import ChatSessions
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.compression import ResponseCompressor
+from app.services.gemini_registry import GeminiRegistry
+from app.services.hospital_feed import HospitalFeed
+from app.services.hospital_index import HospitalDirectory
+from app.services.llm_metrics import LLMMetrics
+from app.services.llm_pool import LLMPool, LLMPoolFull
+from app.services.metrics import Metrics
+from app.services.password_hasher import PasswordHasher
+from app.services.rate_limiter import RateLimiter
+from app.services.response_cache import ResponseCache
+from app.services.single_flight import SingleFlight
+from app.services.structured_log import StructuredLog
+from app.services.user_cache import UserCache
 
 db = SQLAlchemy()
-jwt = JWTManager()
\ No newline at end of file
+jwt = JWTManager()
+migrate = Migrate()
+response_cache = ResponseCache()
+llm_pool = LLMPool()
+hospital_directory = HospitalDirectory()
+hospital_feed = HospitalFeed(hospital_directory)
+password_hasher = PasswordHasher()
+user_cache = UserCache()
+structured_log = StructuredLog()
+metrics = Metrics()
+llm_metrics = LLMMetrics(metrics)
+llm_breaker = CircuitBreaker("gemini", ignore=(LLMPoolFull,))
+gemini = GeminiRegistry()
+llm_single_flight = SingleFlight()
+analysis_jobs = AnalysisJobs()
+chat_sessions = ChatSessions(metrics)
+compressor = ResponseCompressor()
+rate_limiter = RateLimiter(metrics)
@@ -0,0 +1,80 @@
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:   # optional; everything below falls back to the stdlib encoder
+    orjson = None
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson else 0   # int dict keys, as the stdlib allows
+
+
+def dumps(obj) -> str:
+    """Compact UTF-8 JSON text for hand-built bodies (SSE events, ASGI responses)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=_OPTIONS).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def loads(data):
+    """Parse JSON text or bytes; invalid input raises a ValueError subclass either way."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def dumps_bytes(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=_OPTIONS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask's JSON provider with orjson doing the work.
+
+    jsonify / request.get_json keep their contract: keys are sorted when
+    `sort_keys` is set, debug mode pretty-prints, and objects orjson does
+    not know (dates, Decimal, __html__) go through the default provider's
+    `default`. Output is UTF-8 rather than ASCII escapes. Calls with stdlib
+    keyword arguments (indent=, cls=...) and integers beyond 64 bits fall
+    back to the stdlib.
+    """
+
+    def _options(self, pretty=False):
+        # Datetimes go to `default`, so they keep Flask's HTTP-date format instead of orjson's ISO strings
+        option = _OPTIONS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._options()).decode("utf-8")
+        except orjson.JSONEncodeError:
+            return super().dumps(obj)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)   # JSONDecodeError is a ValueError, so get_json answers 400 as before
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        try:
+            body = orjson.dumps(obj, default=self.default, option=self._options(pretty) | orjson.OPT_APPEND_NEWLINE)
+        except orjson.JSONEncodeError:
+            return super().response(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def install(app):
+    """Use FastJSONProvider when JSON_PROVIDER is "fast" and orjson is installed; returns the provider name."""
+    if app.config.get("JSON_PROVIDER", "fast") == "fast" and orjson is not None:
+        app.json = FastJSONProvider(app)
+        return "orjson"
+    return "stdlib"
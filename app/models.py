@@ -1,5 +1,9 @@
-from app.extensions import db
-from werkzeug.security import generate_password_hash, check_password_hash
+import re
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import validates
+
+from app.extensions import db, password_hasher
 
 
 # =========================
@@ -27,11 +31,19 @@ class User(db.Model):
     # ---------------------
     # Auth helpers
     # ---------------------
+    # Hashing runs in password_hasher's process pool, off the request thread
     def set_password(self, password: str):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+    def rehash_password_if_needed(self, password: str) -> bool:
+        """Call after a successful check; upgrades hashes made with old cost settings."""
+        if not password_hasher.needs_rehash(self.password_hash):
+            return False
+        self.set_password(password)
+        return True
 
     def to_dict(self):
         return {
@@ -48,6 +60,36 @@ class User(db.Model):
         }
 
 
+# =========================
+# Hospital capacity parsing
+# =========================
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+BLOOD_STOCK_LEVELS = {"none": 0, "low": 1, "limited": 2, "full": 3}
+
+_LEADING_INT = re.compile(r"^\s*(\d+)")
+_ICU_BEDS = re.compile(r"ICU\s*:\s*(\d+)", re.IGNORECASE)
+_EMERGENCY_BEDS = re.compile(r"Emergency\s*:\s*(\d+)", re.IGNORECASE)
+
+
+def _first_int(pattern, text):
+    match = pattern.search(text or "")
+    return int(match.group(1)) if match else None
+
+
+def parse_blood_stock(text):
+    """"Full Stock" -> 3, "Limited Stock" -> 2, ...; None when unrecognised"""
+    lowered = (text or "").lower()
+    for word, level in BLOOD_STOCK_LEVELS.items():
+        if word in lowered:
+            return level
+    if "out of" in lowered or "empty" in lowered:
+        return BLOOD_STOCK_LEVELS["none"]
+    return None
+
+
 # =========================
 # Hospital Model (NEW)
 # =========================
@@ -60,6 +102,37 @@ class Hospital(db.Model):
     ventilators = db.Column(db.String(100), nullable=True)
     blood = db.Column(db.String(100), nullable=True)
 
+    # Location, used by the nearest-hospital index
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+
+    # Typed capacity, parsed from the display strings above so it can be filtered in SQL
+    beds_total = db.Column(db.Integer, nullable=True)
+    beds_icu = db.Column(db.Integer, nullable=True, index=True)
+    beds_emergency = db.Column(db.Integer, nullable=True, index=True)
+    ventilators_available = db.Column(db.Integer, nullable=True, index=True)
+    blood_stock_level = db.Column(db.SmallInteger, nullable=True, index=True)
+
+    # Bumped on every ORM write; other workers compare it to spot stale hospital snapshots
+    updated_at = db.Column(db.DateTime, default=_utcnow, onupdate=_utcnow, index=True)
+
+    @validates("beds")
+    def _parse_beds(self, key, value):
+        self.beds_total = _first_int(_LEADING_INT, value)
+        self.beds_icu = _first_int(_ICU_BEDS, value)
+        self.beds_emergency = _first_int(_EMERGENCY_BEDS, value)
+        return value
+
+    @validates("ventilators")
+    def _parse_ventilators(self, key, value):
+        self.ventilators_available = _first_int(_LEADING_INT, value)
+        return value
+
+    @validates("blood")
+    def _parse_blood(self, key, value):
+        self.blood_stock_level = parse_blood_stock(value)
+        return value
+
     def to_dict(self):
         return {
             "name": self.name,
@@ -68,9 +141,91 @@ class Hospital(db.Model):
             "beds": self.beds,
             "ventilators": self.ventilators,
             "blood": self.blood,
+            "capacity": {
+                "beds_total": self.beds_total,
+                "beds_icu": self.beds_icu,
+                "beds_emergency": self.beds_emergency,
+                "ventilators_available": self.ventilators_available,
+                "blood_stock_level": self.blood_stock_level,
+            },
         }
 
 
+# =========================
+# Symptom analysis jobs
+# =========================
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class AnalysisJob(db.Model):
+    """A symptom analysis run in the background; the reply is kept so polls and retries never re-run it."""
+
+    __tablename__ = "analysis_job"
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "idempotency_key", name="uq_analysis_job_user_key"),
+    )
+
+    id = db.Column(db.String(32), primary_key=True)   # uuid4 hex, handed to the client
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True)
+    idempotency_key = db.Column(db.String(128), nullable=True)
+    symptoms = db.Column(db.Text, nullable=False)
+
+    status = db.Column(db.String(16), nullable=False, default=JOB_QUEUED, index=True)
+    result = db.Column(db.Text, nullable=True)
+    degraded = db.Column(db.Boolean, nullable=False, default=False)
+    error = db.Column(db.String(200), nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=_utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=_utcnow, onupdate=_utcnow)   # claim / heartbeat time
+    finished_at = db.Column(db.DateTime, nullable=True, index=True)
+
+    @property
+    def finished(self):
+        return self.status in (JOB_DONE, JOB_FAILED)
+
+    def to_dict(self):
+        body = {"job_id": self.id, "status": self.status}
+        if self.status == JOB_DONE:
+            body["reply"] = self.result
+            body["degraded"] = self.degraded
+        elif self.status == JOB_FAILED:
+            body["msg"] = self.error
+        return body
+
+
+# =========================
+# Emergency chat sessions
+# =========================
+class ChatSession(db.Model):
+    """
+    One emergency conversation. Only the recent turns are kept as rows;
+    older ones live on as lines of `summary`.
+    """
+
+    __tablename__ = "chat_session"
+
+    id = db.Column(db.String(32), primary_key=True)   # uuid4 hex, handed to the client
+    summary = db.Column(db.Text, nullable=False, default="")
+    turn_count = db.Column(db.Integer, nullable=False, default=0)
+    total_tokens = db.Column(db.Integer, nullable=False, default=0)   # every turn ever, i.e. the uncompacted history
+    created_at = db.Column(db.DateTime, nullable=False, default=_utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=_utcnow, onupdate=_utcnow, index=True)
+
+
+class ChatTurn(db.Model):
+    __tablename__ = "chat_turn"
+
+    id = db.Column(db.Integer, primary_key=True)   # insertion order = conversation order
+    session_id = db.Column(db.String(32), db.ForeignKey("chat_session.id", ondelete="CASCADE"),
+                           nullable=False, index=True)
+    role = db.Column(db.String(1), nullable=False)   # "u" user, "a" assistant
+    text = db.Column(db.Text, nullable=False)
+    tokens = db.Column(db.Integer, nullable=False)   # estimated once on insert, never re-counted
+
+
 # =========================
 # Seed Data (OPTIONAL, SAFE)
 # =========================
@@ -90,6 +245,8 @@ def seed_hospitals():
             beds="120 (ICU: 25, Emergency: 30)",
             ventilators="15 (Available)",
             blood="Full Stock",
+            latitude=28.6315,
+            longitude=77.2167,
         ),
         Hospital(
             name="Metro Medical Center",
@@ -98,6 +255,8 @@ def seed_hospitals():
             beds="180 (ICU: 35, Emergency: 45)",
             ventilators="22 (Available)",
             blood="Limited Stock",
+            latitude=28.6219,
+            longitude=77.2295,
         ),
         Hospital(
             name="Regional Health Institute",
@@ -106,6 +265,8 @@ def seed_hospitals():
             beds="95 (ICU: 18, Emergency: 20)",
             ventilators="12 (Available)",
             blood="Full Stock",
+            latitude=28.6448,
+            longitude=77.1936,
         ),
     ]
 
@@ -1,10 +1,10 @@
-from flask import request, jsonify
+from flask import request, jsonify, current_app
 from flask_jwt_extended import (
-    create_access_token, jwt_required, get_jwt_identity
+    create_access_token, jwt_required, current_user
 )
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import timedelta
-from app.extensions import db
+from app.extensions import db, user_cache
 from app.models import User
 from flask import Blueprint
 
@@ -52,6 +52,9 @@ def login():
     if not user or not user.check_password(password):
         return jsonify({"msg": "Invalid credentials"}), 401
 
+    if user.rehash_password_if_needed(password):
+        db.session.commit()
+
     access_token = create_access_token(identity=str(user.id))
     return jsonify({"access_token": access_token}), 200
 
@@ -62,19 +65,16 @@ def login():
 @auth_bp.route('/api/profile', methods=['GET'])
 @jwt_required()
 def get_profile():
-    user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({"msg": "User not found"}), 404
-
-    return jsonify(user.to_dict()), 200
+    # current_user comes from the per-process user cache (see user_lookup_loader)
+    response = current_app.response_class(current_user.json, mimetype="application/json")
+    response.set_etag(current_user.etag)
+    return response.make_conditional(request)   # 304 with no body when If-None-Match matches
 
 
 @auth_bp.route('/api/profile', methods=['PUT'])
 @jwt_required()
 def update_profile():
-    user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
+    user = db.session.get(User, current_user.id)
     if not user:
         return jsonify({"msg": "User not found"}), 404
 
@@ -93,14 +93,14 @@ def update_profile():
             return jsonify({"msg": "Invalid age"}), 400
 
     db.session.commit()
+    user_cache.invalidate(user.id)
     return jsonify(user.to_dict()), 200
 
 
 @auth_bp.route('/api/profile/health', methods=['PUT'])
 @jwt_required()
 def update_health():
-    user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
+    user = db.session.get(User, current_user.id)
     if not user:
         return jsonify({"msg": "User not found"}), 404
 
@@ -109,14 +109,14 @@ def update_health():
     user.blood_pressure = data.get('blood_pressure', user.blood_pressure)
 
     db.session.commit()
+    user_cache.invalidate(user.id)
     return jsonify(user.to_dict()), 200
 
 
 @auth_bp.route('/api/change-password', methods=['PUT'])
 @jwt_required()
 def change_password():
-    user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
+    user = db.session.get(User, current_user.id)
     if not user:
         return jsonify({"msg": "User not found"}), 404
 
@@ -132,4 +132,5 @@ def change_password():
 
     user.set_password(new)
     db.session.commit()
+    user_cache.invalidate(user.id)
     return jsonify({"msg": "Password changed"}), 200
\ No newline at end of file
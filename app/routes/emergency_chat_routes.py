@@ -1,8 +1,153 @@
-from flask import Blueprint, request, jsonify
-from app.models import Hospital
-from app.services.emergency_gemini_service import emergency_ai_response
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from flask import Blueprint, request, jsonify, current_app
+from app.extensions import hospital_directory, llm_metrics, chat_sessions, compressor, rate_limiter
+from app.json_provider import dumps
+from app.models import Hospital, BLOOD_STOCK_LEVELS
+from app.services.emergency_gemini_service import (
+    emergency_ai_response, stream_emergency_ai_response, fallback_reason, EMERGENCY_FALLBACK_TEXT, SYSTEM_PROMPT
+)
+from app.services.compression import Prefixed
+from app.services.llm_calls import Deadline, ModelUnavailable
+from app.services.rate_limiter import RateLimited
+from app.sse import wants_stream, sse_event, sse_raw_event, sse_response
 
 emergency_chat_bp = Blueprint("emergency_chat", __name__)
+logger = logging.getLogger(__name__)
+
+# LLM calls run here so the hospital lookup can proceed on the request thread
+_llm_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="emergency-llm")
+
+
+class _BadQuery(ValueError):
+    pass
+
+
+def _location_query(data):
+    """
+    Optional nearest-hospital parameters from the request body:
+    {"location": {"lat": .., "lng": ..}} (or top-level lat/lng),
+    plus radius_km, page and per_page.
+    """
+    location = data.get("location") or data
+    if not isinstance(location, dict):
+        raise _BadQuery("Invalid location query")
+    if location.get("lat") is None or location.get("lng") is None:
+        return None
+    try:
+        lat, lng = float(location["lat"]), float(location["lng"])
+        radius_km = float(data["radius_km"]) if data.get("radius_km") is not None else None
+        page = int(data.get("page", 1))
+        per_page = int(data.get("per_page", current_app.config["HOSPITAL_PAGE_SIZE"]))
+    except (TypeError, ValueError):
+        raise _BadQuery("Invalid location query")
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180) or page < 1 or per_page < 1:
+        raise _BadQuery("Invalid location query")
+    per_page = min(per_page, current_app.config["HOSPITAL_MAX_PAGE_SIZE"])
+    return {"lat": lat, "lng": lng, "radius_km": radius_km, "page": page, "per_page": per_page}
+
+
+# request field -> indexed Hospital column
+_CAPACITY_FILTERS = {
+    "min_icu_beds": Hospital.beds_icu,
+    "min_emergency_beds": Hospital.beds_emergency,
+    "min_ventilators": Hospital.ventilators_available,
+    "min_blood_stock": Hospital.blood_stock_level,
+}
+
+
+def _capacity_query(data):
+    """
+    SQL query of hospital ids meeting the requested minimum capacity, e.g.
+    {"min_icu_beds": 1, "min_ventilators": 1, "min_blood_stock": "limited"}.
+    None when no capacity filter was sent.
+    """
+    conditions = []
+    for field, column in _CAPACITY_FILTERS.items():
+        value = data.get(field)
+        if value is None:
+            continue
+        if field == "min_blood_stock" and isinstance(value, str):
+            if value.lower() not in BLOOD_STOCK_LEVELS:
+                raise _BadQuery(f"{field} must be one of {', '.join(BLOOD_STOCK_LEVELS)}")
+            value = BLOOD_STOCK_LEVELS[value.lower()]
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise _BadQuery(f"{field} must be an integer")
+        conditions.append(column >= value)
+    if not conditions:
+        return None
+    return Hospital.query.with_entities(Hospital.id).filter(*conditions)
+
+
+def _hospital_data(query, capacity=None):
+    """Returns (hospitals, pagination); without a location every matching hospital is returned."""
+    ids = {row.id for row in capacity} if capacity is not None else None
+
+    if query is None:
+        return hospital_directory.all(ids), None
+
+    hospitals, has_more = hospital_directory.nearest(
+        query["lat"], query["lng"],
+        limit=query["per_page"],
+        offset=(query["page"] - 1) * query["per_page"],
+        radius_km=query["radius_km"],
+        predicate=ids.__contains__ if ids is not None else None,
+    )
+    return hospitals, {"page": query["page"], "per_page": query["per_page"], "has_more": has_more}
+
+
+def _over_limit():
+    """RateLimited when this client used up its emergency Gemini budget, else None. Never refuses the request."""
+    try:
+        rate_limiter.check("emergency", *rate_limiter.identify(
+            request.headers.get("Authorization"), request.remote_addr, request.headers.get("X-Forwarded-For")))
+    except RateLimited as e:
+        return e
+    return None
+
+
+def _fallback_reply(error):
+    """
+    Canned first aid in place of an AI reply that failed with `error`,
+    counted under its reason (ModelUnavailable was counted by the service).
+    Shared with the ASGI view, as are the helpers around it.
+    """
+    if isinstance(error, (FutureTimeout, asyncio.TimeoutError)):
+        reason = "deadline"   # the call keeps running in the background and still fills the cache
+    elif isinstance(error, ModelUnavailable):
+        return EMERGENCY_FALLBACK_TEXT
+    else:
+        reason = fallback_reason(error)
+        if reason == "error":
+            logger.warning("emergency_ai_failed", extra={"error": type(error).__name__})
+    llm_metrics.record_response("emergency", SYSTEM_PROMPT, "fallback", reason)
+    return EMERGENCY_FALLBACK_TEXT
+
+
+def _stream_error(error):
+    """Event ending a stream whose reply failed after its first chunk (failures before it become canned first aid in the service)."""
+    logger.warning("emergency_ai_failed", extra={"error": type(error).__name__, "stream": True})
+    llm_metrics.record_response("emergency", SYSTEM_PROMPT, "fallback", "error")
+    return sse_event("error", {"msg": "AI error. Please call emergency services."})
+
+
+def _listing_tail(ai_reply, degraded, session_id):
+    """Rest of a plain-listing body after '{"hospitals": <snapshot JSON>'."""
+    return (', "text": %s, "degraded": %s%s}' % (
+        dumps(ai_reply), "true" if degraded else "false",
+        ', "session_id": %s' % dumps(session_id) if session_id is not None else "",
+    )).encode("utf-8")
+
+
+@emergency_chat_bp.route("/api/emergency/sessions", methods=["POST"])
+def create_chat_session():
+    """Start a conversation; pass the returned session_id with each message to /api/emergency/chat."""
+    return jsonify({"session_id": chat_sessions.create()}), 201
+
 
 @emergency_chat_bp.route("/api/emergency/chat", methods=["POST"])
 def emergency_chat():
@@ -12,19 +157,105 @@ def emergency_chat():
     if not message:
         return jsonify({"msg": "Message required"}), 400
 
-    ai_reply = emergency_ai_response(message)
+    try:
+        query = _location_query(data)
+        capacity = _capacity_query(data)
+    except _BadQuery as e:
+        return jsonify({"msg": str(e)}), 400
+
+    # Earlier turns of the session, compacted to the token budget; "" without a session
+    session_id = str(data["session_id"]) if data.get("session_id") is not None else None
+    history = ""
+    if session_id is not None:
+        history = chat_sessions.context(session_id, SYSTEM_PROMPT, message)
+        if history is None:
+            return jsonify({"msg": "Chat session not found"}), 404
+
+    # Over the limit the client still gets hospitals and canned first aid, just no Gemini call
+    limited = _over_limit()
+
+    if wants_stream(data):
+        return _stream_emergency_chat(message, query, capacity, session_id, history, limited)
+
+    # The same budget bounds the pool wait, the Gemini request and our wait below
+    deadline = Deadline(current_app.config["EMERGENCY_CHAT_DEADLINE"])
+    app = current_app._get_current_object()
+
+    def run_llm():
+        # Worker threads have no context of their own; push one for current_app lookups
+        with app.app_context():
+            return emergency_ai_response(message, deadline, history)
 
-    hospitals = Hospital.query.all()
-    hospital_data = [{
-        "name": h.name,
-        "distance": h.distance,
-        "doctors": h.doctors,
-        "beds": h.beds,
-        "ventilators": h.ventilators,
-        "blood": h.blood
-    } for h in hospitals]
+    llm_future = _llm_executor.submit(run_llm) if limited is None else None
 
-    return jsonify({
+    # DB work stays on the request thread and its scoped session.
+    # Plain listings use the snapshot's pre-encoded JSON as is.
+    plain_listing = query is None and capacity is None
+    if plain_listing:
+        hospitals_json = hospital_directory.all_json()
+    else:
+        hospital_data, pagination = _hospital_data(query, capacity)
+
+    degraded = False
+    try:
+        if limited is not None:
+            raise limited
+        ai_reply = llm_future.result(timeout=deadline.remaining())
+    except Exception as e:
+        ai_reply, degraded = _fallback_reply(e), True
+
+    if session_id is not None:
+        # Canned text is not the model's answer; keep only the message in the history
+        chat_sessions.record(session_id, message, None if degraded else ai_reply)
+
+    if plain_listing:
+        # Hospitals first: the snapshot is the shared prefix of every such body, so gzip only
+        # has to compress the short tail after it
+        body = Prefixed(b'{"hospitals": ', hospitals_json, _listing_tail(ai_reply, degraded, session_id))
+        return compressor.response(current_app, body, request.headers.get("Accept-Encoding")), 200
+
+    body = {
         "text": ai_reply,
-        "hospitals": hospital_data
-    }), 200
+        "hospitals": hospital_data,
+        "degraded": degraded,
+    }
+    if pagination:
+        body["pagination"] = pagination
+    if session_id is not None:
+        body["session_id"] = session_id
+    return jsonify(body), 200
+
+
+def _stream_emergency_chat(message, query, capacity, session_id=None, history="", limited=None):
+    # Hospitals go out before the first token so the client can render them immediately
+    if query is None and capacity is None:
+        hospitals_event, pagination = sse_raw_event("hospitals", hospital_directory.all_json()), None
+    else:
+        hospital_data, pagination = _hospital_data(query, capacity)
+        hospitals_event = sse_event("hospitals", hospital_data)
+
+    deadline = Deadline(current_app.config["EMERGENCY_CHAT_DEADLINE"])
+
+    def events():
+        yield hospitals_event
+        if pagination:
+            yield sse_event("pagination", pagination)
+        parts = []
+        try:
+            if limited is not None:
+                chunks = [_fallback_reply(limited)]
+            else:
+                chunks = stream_emergency_ai_response(message, deadline, history)
+            for chunk in chunks:
+                parts.append(chunk)
+                yield sse_event("chunk", {"text": chunk})
+        except Exception as e:
+            yield _stream_error(e)
+            parts = None
+        reply = "".join(parts) if parts else None
+        if session_id is not None:
+            chat_sessions.record(session_id, message, None if reply == EMERGENCY_FALLBACK_TEXT else reply)
+        if parts is not None:
+            yield sse_event("done", {"degraded": reply == EMERGENCY_FALLBACK_TEXT})
+
+    return sse_response(events())
@@ -0,0 +1,74 @@
+import hmac
+
+from flask import Blueprint, request, jsonify, current_app
+
+from app.extensions import db, hospital_feed
+from app.models import Hospital
+from app.sse import sse_response
+
+hospital_bp = Blueprint("hospital", __name__)
+
+# field -> (type, max length); the typed capacity columns are parsed from these by the model's validators
+_CAPACITY_FIELDS = {
+    "doctors": (int, None),
+    "beds": (str, 100),
+    "ventilators": (str, 100),
+    "blood": (str, 100),
+}
+
+
+def _update_authorized():
+    """(ok, error response); updates need the shared HOSPITAL_UPDATE_TOKEN, and are off without one."""
+    token = current_app.config.get("HOSPITAL_UPDATE_TOKEN")
+    if not token:
+        return False, (jsonify({"msg": "Hospital updates are disabled"}), 403)
+    sent = request.headers.get("X-Hospital-Token", "")
+    if not hmac.compare_digest(sent.encode(), token.encode()):
+        return False, (jsonify({"msg": "Invalid hospital token"}), 401)
+    return True, None
+
+
+@hospital_bp.route("/api/hospitals/<int:hospital_id>", methods=["PATCH"])
+def update_hospital_capacity(hospital_id):
+    """Change capacity fields, e.g. {"beds": "120 (ICU: 4, Emergency: 9)", "ventilators": "3 (Available)"}."""
+    ok, error = _update_authorized()
+    if not ok:
+        return error
+
+    data = request.get_json() or {}
+    if not isinstance(data, dict):
+        return jsonify({"msg": "Body must be a JSON object"}), 400
+    unknown = sorted(set(data) - set(_CAPACITY_FIELDS))
+    if unknown or not data:
+        return jsonify({"msg": f"Updatable fields: {', '.join(_CAPACITY_FIELDS)}"}), 400
+    for field, value in data.items():
+        kind, max_length = _CAPACITY_FIELDS[field]
+        if value is None:
+            continue
+        if kind is int and (not isinstance(value, int) or isinstance(value, bool) or value < 0):
+            return jsonify({"msg": f"{field} must be a non-negative integer"}), 400
+        if kind is str and (not isinstance(value, str) or len(value) > max_length):
+            return jsonify({"msg": f"{field} must be a string of at most {max_length} characters"}), 400
+
+    hospital = db.session.get(Hospital, hospital_id)
+    if hospital is None:
+        return jsonify({"msg": "Hospital not found"}), 404
+    for field, value in data.items():
+        setattr(hospital, field, value)
+    db.session.commit()   # the directory publishes the changed fields to feed subscribers
+    return jsonify({"id": hospital.id, **hospital.to_dict()}), 200
+
+
+@hospital_bp.route("/api/hospitals/feed", methods=["GET"])
+def hospital_feed_stream():
+    """
+    SSE: a `snapshot` of every hospital, then a `delta` with the changed fields
+    of each update. Reconnects resume from Last-Event-ID (or ?last_event_id=).
+    Each stream holds this worker thread, so past HOSPITAL_FEED_MAX_SUBSCRIBERS
+    the answer is 503 with Retry-After; the ASGI view has no such limit.
+    """
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    hospital_feed.acquire_thread()   # FeedFull → 503 (app error handler)
+    response = sse_response(hospital_feed.stream(last_event_id))
+    response.call_on_close(hospital_feed.release_thread)   # runs when the server closes the stream, whatever ended it
+    return response
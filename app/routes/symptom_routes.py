@@ -1,13 +1,27 @@
-from flask import Blueprint, request, jsonify
+import logging
+
+from flask import Blueprint, request, jsonify, current_app, url_for
+from flask_jwt_extended import jwt_required, current_user
+
+from app.extensions import analysis_jobs, compressor
+from app.services.analysis_jobs import JobConflict
+from app.services.triage_engine import triage_engine
+from app.sse import wants_stream, sse_event, sse_response
+from app.services.llm_calls import Deadline, DeadlineExceeded, ModelUnavailable
+from app.services.llm_pool import LLMPoolFull
+
+logger = logging.getLogger(__name__)
 
 # -----------------------
 # Try loading Gemini service
 # -----------------------
 try:
-    from app.services.symptom_checker_service import analyze_symptoms_with_gemini
+    from app.services.symptom_checker_service import (
+        analyze_symptoms_with_gemini, stream_symptoms_with_gemini, generate_smart_response, stream_smart_response
+    )
     GEMINI_LOADED = True
 except Exception as e:
-    print(f"⚠️ Could not load Gemini service: {e}")
+    logger.error("gemini_service_unavailable", extra={"error": type(e).__name__})
     GEMINI_LOADED = False
 
 
@@ -16,6 +30,30 @@ except Exception as e:
 # -----------------------
 symptom_bp = Blueprint("symptom", __name__)
 
+# (reply text, degraded) -> Precompressed body, for the triage replies that never change
+_STATIC_REPLIES = {}
+
+
+@symptom_bp.record_once
+def _precompress_replies(state):
+    # Encoded exactly as jsonify would, then compressed once per process instead of per request
+    for text in triage_engine.constant_responses():
+        for degraded in (False, True):
+            body = state.app.json.response({"reply": text, "degraded": degraded}).get_data()
+            _STATIC_REPLIES[(text, degraded)] = compressor.precompress(body)
+
+
+def _static_reply(text, degraded):
+    """Precompressed body of a constant triage reply, None for anything else (model replies etc.)."""
+    return _STATIC_REPLIES.get((text, degraded))
+
+
+def _reply(text, degraded):
+    static = _static_reply(text, degraded)
+    if static is None:
+        return jsonify({"reply": text, "degraded": degraded}), 200
+    return compressor.response(current_app, static, request.headers.get("Accept-Encoding")), 200
+
 
 # -----------------------
 # Routes
@@ -23,8 +61,6 @@ symptom_bp = Blueprint("symptom", __name__)
 
 @symptom_bp.route("/api/symptoms/analyze", methods=["POST"])
 def analyze_symptoms_route():
-    print("✅ --- Request received at /api/symptoms/analyze ---")
-
     if not GEMINI_LOADED:
         return jsonify({"msg": "Gemini service not available"}), 503
 
@@ -32,19 +68,97 @@ def analyze_symptoms_route():
     symptom_text = data.get("symptoms")
 
     if not symptom_text:
-        print("❌ ERROR: No symptom text provided.")
         return jsonify({"msg": "Symptom text is required"}), 400
 
-    print(f"📄 Symptom received: {symptom_text}")
+    deadline = Deadline(current_app.config["SYMPTOMS_LLM_BUDGET"])
+
+    if wants_stream(data):
+        return sse_response(_stream_analysis(symptom_text, deadline))
 
     try:
-        print("🤖 --- Calling Gemini API... ---")
-        ai_response = analyze_symptoms_with_gemini(symptom_text)
-        print("✅ --- Gemini API call successful! ---")
-        return jsonify({"reply": ai_response}), 200
+        ai_response = analyze_symptoms_with_gemini(symptom_text, deadline)
+        return _reply(ai_response, False)
 
-    except Exception as e:
-        print(f"❌❌❌ Gemini exception: {e}")
+    except (DeadlineExceeded, ModelUnavailable):
+        # Budget spent or no model answer: the offline triage instead, flagged so clients can tell
+        return _reply(generate_smart_response(symptom_text), True)
+
+    except LLMPoolFull:
+        raise   # handled app-wide → 503 with Retry-After
+
+    except Exception:
+        logger.exception("symptom_analysis_failed")
         return jsonify(
             {"msg": "An internal error occurred while analyzing symptoms"}
         ), 500
+
+
+def _stream_failed(symptom_text, error):
+    """Events ending an analysis stream that failed with `error`; shared with the ASGI view."""
+    if isinstance(error, (DeadlineExceeded, ModelUnavailable)):
+        # Raised before the first chunk only: the offline triage is the whole reply
+        events = [sse_event("chunk", {"text": paragraph}) for paragraph in stream_smart_response(symptom_text)]
+        return events + [sse_event("done", {"degraded": True})]
+    if isinstance(error, LLMPoolFull):
+        return [sse_event("error", {"msg": "Server busy, please retry", "retry_after": error.retry_after})]
+    logger.error("symptom_analysis_failed", exc_info=error, extra={"stream": True})
+    return [sse_event("error", {"msg": "An internal error occurred while analyzing symptoms"})]
+
+
+def _stream_analysis(symptom_text, deadline):
+    try:
+        for chunk in stream_symptoms_with_gemini(symptom_text, deadline):
+            yield sse_event("chunk", {"text": chunk})
+    except Exception as e:
+        yield from _stream_failed(symptom_text, e)
+        return
+    yield sse_event("done", {"degraded": False})
+
+
+# -----------------------
+# Job mode
+# -----------------------
+# For clients on flaky networks: the analysis runs in the background and is
+# stored per user, so a dropped connection loses nothing and a retry with
+# the same Idempotency-Key gets the same job instead of a second Gemini call.
+
+@symptom_bp.route("/api/symptoms/jobs", methods=["POST"])
+@jwt_required()
+def create_symptom_job():
+    data = request.get_json() or {}
+    symptom_text = data.get("symptoms")
+
+    if not symptom_text:
+        return jsonify({"msg": "Symptom text is required"}), 400
+
+    key = request.headers.get("Idempotency-Key") or data.get("idempotency_key")
+    if key is not None and (not isinstance(key, str) or len(key) > 128):
+        return jsonify({"msg": "Idempotency key must be a string of at most 128 characters"}), 400
+
+    try:
+        job, created = analysis_jobs.submit(current_app._get_current_object(), current_user.id, symptom_text, key)
+    except JobConflict:
+        return jsonify({"msg": "Idempotency key was already used for different symptoms"}), 422
+
+    response = jsonify(job.to_dict())
+    response.headers["Location"] = url_for("symptom.get_symptom_job", job_id=job.id)
+    return response, 200 if job.finished else 202
+
+
+@symptom_bp.route("/api/symptoms/jobs/<job_id>", methods=["GET"])
+@jwt_required()
+def get_symptom_job(job_id):
+    try:
+        wait = float(request.args.get("wait", 0))   # long-poll: seconds to wait for the result
+    except ValueError:
+        return jsonify({"msg": "wait must be a number of seconds"}), 400
+
+    job = analysis_jobs.wait(current_app._get_current_object(), job_id, current_user.id, wait)
+    if job is None:
+        return jsonify({"msg": "Job not found"}), 404
+
+    response = jsonify(job.to_dict())
+    if not job.finished:
+        response.headers["Retry-After"] = "1"
+        return response, 202
+    return response, 200
@@ -0,0 +1,229 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, delete, or_, update
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+
+class JobConflict(Exception):
+    """The idempotency key was already used by this user for a different request."""
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class AnalysisJobs:
+    """
+    Symptom analyses submitted in job mode, run on a small thread pool and
+    stored in the analysis_job table.
+
+    A job is claimed with a conditional UPDATE (queued -> running) before it
+    runs, so it is analysed once even when several workers look at it. A
+    job whose worker died (still queued/running, untouched for
+    `stale_after` seconds) is claimed again by the next poll for it.
+    Long-polls in the process running a job are woken the moment it
+    finishes; polls in other processes re-read the row every
+    `poll_interval` seconds.
+    """
+
+    def __init__(self):
+        self.workers = 4
+        self.budget = 60.0
+        self.max_wait = 25.0
+        self.poll_interval = 0.5
+        self.ttl = 86400
+        self._pool = None
+        self._pool_pid = None
+        self._pool_lock = threading.Lock()
+        self._running = {}   # job id -> Event set when it finishes, jobs submitted in this process
+        self._running_lock = threading.Lock()
+        self._purged_at = 0.0
+
+    def init_app(self, app):
+        self.workers = max(1, app.config.get("ANALYSIS_JOB_WORKERS", self.workers))
+        self.budget = app.config.get("ANALYSIS_JOB_BUDGET", self.budget)
+        self.max_wait = app.config.get("ANALYSIS_JOB_MAX_WAIT", self.max_wait)
+        self.poll_interval = app.config.get("ANALYSIS_JOB_POLL_INTERVAL", self.poll_interval)
+        self.ttl = app.config.get("ANALYSIS_JOB_TTL", self.ttl)
+        self.shutdown()
+
+    @property
+    def stale_after(self):
+        return self.budget + 30
+
+    def _executor(self):
+        # Threads do not survive fork; a worker process builds its own pool on first use
+        if self._pool is None or self._pool_pid != os.getpid():
+            with self._pool_lock:
+                if self._pool is None or self._pool_pid != os.getpid():
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="analysis-job")
+                    self._pool_pid = os.getpid()
+                    self._running = {}
+        return self._pool
+
+    def shutdown(self, wait=False):
+        """wait=True lets queued and running jobs finish (graceful worker exit)."""
+        with self._pool_lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown(wait=wait)
+            self._pool = None
+            self._pool_pid = None
+
+    # -----------------------
+    # Submit / poll
+    # -----------------------
+    def submit(self, app, user_id, symptoms, idempotency_key=None):
+        """
+        (job, created). A key this user already sent returns that job and
+        runs nothing; the same key with other symptoms is a JobConflict.
+        """
+        from app.extensions import db
+        from app.models import AnalysisJob
+
+        if idempotency_key:
+            job = AnalysisJob.query.filter_by(user_id=user_id, idempotency_key=idempotency_key).first()
+            if job is not None:
+                return self._same_request(job, symptoms), False
+
+        job = AnalysisJob(id=uuid.uuid4().hex, user_id=user_id, idempotency_key=idempotency_key, symptoms=symptoms)
+        db.session.add(job)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()   # a concurrent retry with the same key inserted first
+            job = AnalysisJob.query.filter_by(user_id=user_id, idempotency_key=idempotency_key).one()
+            return self._same_request(job, symptoms), False
+        self._start(app, job.id)
+        return job, True
+
+    @staticmethod
+    def _same_request(job, symptoms):
+        if job.symptoms != symptoms:
+            raise JobConflict()
+        return job
+
+    def wait(self, app, job_id, user_id, timeout):
+        """The user's job once finished or after `timeout` seconds (capped at max_wait); None if not theirs."""
+        from app.extensions import db
+        from app.models import AnalysisJob
+
+        deadline = time.monotonic() + max(0.0, min(timeout, self.max_wait))
+        while True:
+            job = db.session.get(AnalysisJob, job_id)
+            if job is None or job.user_id != user_id:
+                return None
+            if job.finished:
+                return job
+            if job_id not in self._running and job.updated_at < _utcnow() - timedelta(seconds=self.stale_after):
+                self._start(app, job_id)   # whoever had it is gone
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return job
+            db.session.rollback()   # end the read transaction, so the next get sees other workers' commits
+            event = self._running.get(job_id)
+            if event is not None:
+                event.wait(remaining)
+            else:
+                time.sleep(min(remaining, self.poll_interval))
+
+    # -----------------------
+    # Worker side
+    # -----------------------
+    def _start(self, app, job_id):
+        executor = self._executor()
+        with self._running_lock:
+            if job_id in self._running:
+                return
+            self._running[job_id] = threading.Event()
+        executor.submit(self._run, app, job_id)
+
+    def _claim(self, job_id):
+        """queued -> running (or a stale running job back to us); False when another worker has it."""
+        from app.extensions import db
+        from app.models import AnalysisJob, JOB_QUEUED, JOB_RUNNING
+
+        now = _utcnow()
+        stale = now - timedelta(seconds=self.stale_after)
+        claimed = db.session.execute(
+            update(AnalysisJob)
+            .where(AnalysisJob.id == job_id,
+                   or_(AnalysisJob.status == JOB_QUEUED,
+                       and_(AnalysisJob.status == JOB_RUNNING, AnalysisJob.updated_at < stale)))
+            .values(status=JOB_RUNNING, updated_at=now)
+        ).rowcount == 1
+        db.session.commit()
+        return claimed
+
+    def _analyze(self, symptoms):
+        """(reply, degraded). No client waits on this thread, so a full LLM pool is waited out, not reported."""
+        from app.services.llm_calls import Deadline, DeadlineExceeded, ModelUnavailable
+        from app.services.llm_pool import LLMPoolFull
+        from app.services.symptom_checker_service import analyze_symptoms_with_gemini, generate_smart_response
+
+        deadline = Deadline(self.budget)
+        while True:
+            try:
+                return analyze_symptoms_with_gemini(symptoms, deadline), False
+            except LLMPoolFull as e:
+                if deadline.remaining() <= e.retry_after:
+                    break
+                time.sleep(e.retry_after)
+            except (DeadlineExceeded, ModelUnavailable):
+                break
+        return generate_smart_response(symptoms), True
+
+    def _run(self, app, job_id):
+        from app.extensions import db
+        from app.models import AnalysisJob, JOB_DONE, JOB_FAILED
+
+        with app.app_context():
+            try:
+                if not self._claim(job_id):
+                    return
+                symptoms = db.session.get(AnalysisJob, job_id).symptoms
+                db.session.rollback()   # read only; hold no transaction or pooled connection over the Gemini call
+                try:
+                    outcome = self._analyze(symptoms)
+                except Exception:
+                    logger.exception("analysis_job_failed", extra={"job_id": job_id})
+                    outcome = None
+                job = db.session.get(AnalysisJob, job_id)   # loaded again for the write, in a short transaction
+                if outcome is not None:
+                    job.result, job.degraded = outcome
+                    job.status = JOB_DONE
+                else:
+                    job.status, job.error = JOB_FAILED, "An internal error occurred while analyzing symptoms"
+                job.finished_at = _utcnow()
+                db.session.commit()
+                self._purge_expired()
+            except Exception:
+                logger.exception("analysis_job_error", extra={"job_id": job_id})
+            finally:
+                with self._running_lock:
+                    event = self._running.pop(job_id, None)
+                if event is not None:
+                    event.set()
+
+    def _purge_expired(self):
+        """Drop finished jobs older than ttl, at most once an hour per process."""
+        from app.extensions import db
+        from app.models import AnalysisJob
+
+        now = time.monotonic()
+        if now - self._purged_at < 3600:
+            return
+        self._purged_at = now
+        db.session.execute(delete(AnalysisJob).where(AnalysisJob.finished_at < _utcnow() - timedelta(seconds=self.ttl)))
+        db.session.commit()
+
+    def stats(self):
+        with self._running_lock:
+            return {"workers": self.workers, "in_process": len(self._running)}
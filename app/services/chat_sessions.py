@@ -0,0 +1,183 @@
+import math
+import re
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select
+
+# Prompt sizes in tokens; a whole pasted conversation easily reaches the top buckets
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+_ROLES = {"u": "User", "a": "Assistant"}
+_WHITESPACE = re.compile(r"\s+")
+_SENTENCE_END = re.compile(r"[.!?](\s|$)")
+
+
+def estimate_tokens(text: str) -> int:
+    """~4 characters per token; close enough for budgeting without a tokenizer round trip."""
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _summary_line(role, text, limit):
+    """
+    One summary line for a turn, cut to `limit` characters. The user's turns
+    carry the facts and are kept as far as the limit allows; for replies the
+    first sentence (the acknowledgement of the situation) is enough.
+    """
+    text = _WHITESPACE.sub(" ", text).strip()
+    match = _SENTENCE_END.search(text, 0, limit) if role == "a" else None
+    if match:
+        text = text[:match.end()].strip()
+    elif len(text) > limit:
+        text = text[:limit - 1].rstrip() + "…"
+    return f"{_ROLES[role]}: {text}"
+
+
+class ChatSessions:
+    """
+    Server-side emergency chat history with a bounded prompt.
+
+    The history sent with a message is the session's rolling summary plus
+    the recent turns verbatim. After each exchange, the oldest turns are
+    folded into the summary until the verbatim part fits `recent_tokens`,
+    and the summary drops its oldest lines (never the first, which holds
+    the original emergency) once it exceeds `summary_tokens`. Folding is
+    extractive, with no extra Gemini call on the emergency path. Prompt
+    size is therefore bounded however long the conversation runs.
+    """
+
+    def __init__(self, registry):
+        self.context_tokens = 1200
+        self.summary_tokens = 300
+        self.summary_line_chars = 160
+        self.ttl = 21600
+        self.prompt_tokens = registry.histogram(
+            "emergency_chat_prompt_tokens",
+            "Estimated prompt tokens per session turn: as sent (compacted) vs. with the full history",
+            ("prompt",), TOKEN_BUCKETS)
+        self._purged_at = 0.0
+
+    def init_app(self, app):
+        self.context_tokens = app.config.get("CHAT_CONTEXT_TOKENS", self.context_tokens)
+        self.summary_tokens = min(app.config.get("CHAT_SUMMARY_TOKENS", self.summary_tokens), self.context_tokens // 2)
+        self.ttl = app.config.get("CHAT_SESSION_TTL", self.ttl)
+
+    @property
+    def recent_tokens(self):
+        return self.context_tokens - self.summary_tokens
+
+    # -----------------------
+    # Public API
+    # -----------------------
+    def create(self):
+        from app.extensions import db
+        from app.models import ChatSession
+
+        session = ChatSession(id=uuid.uuid4().hex)
+        db.session.add(session)
+        db.session.commit()
+        self._purge_expired()
+        return session.id
+
+    def context(self, session_id, system_prompt, message):
+        """
+        History text to put between the system prompt and `message`, "" for
+        a new session, None when the session does not exist (or expired).
+        """
+        from app.extensions import db
+        from app.models import ChatSession, ChatTurn
+
+        session = db.session.get(ChatSession, session_id)
+        if session is None or session.updated_at < _utcnow() - timedelta(seconds=self.ttl):
+            return None
+        summary, total_tokens = session.summary, session.total_tokens
+        turns = db.session.execute(
+            select(ChatTurn.role, ChatTurn.text).where(ChatTurn.session_id == session_id).order_by(ChatTurn.id)
+        ).all()
+        db.session.rollback()   # read only; do not hold the SQLite read transaction over the Gemini call
+
+        lines = []
+        if summary:
+            lines.append("Summary of the earlier conversation:\n" + summary)
+        lines.extend(f"{_ROLES[role]}: {text}" for role, text in turns)
+        history = "\n".join(lines)
+
+        fixed = estimate_tokens(system_prompt) + estimate_tokens(message)
+        self.prompt_tokens.observe(fixed + estimate_tokens(history), prompt="compacted")
+        self.prompt_tokens.observe(fixed + total_tokens, prompt="full_history")
+        return history
+
+    def record(self, session_id, message, reply=None):
+        """Append one exchange (reply None = no model answer, only the message is kept) and compact."""
+        from app.extensions import db
+        from app.models import ChatSession, ChatTurn
+
+        session = db.session.get(ChatSession, session_id)
+        if session is None:
+            return
+        for role, text in (("u", message), ("a", reply)):
+            if text:
+                tokens = estimate_tokens(text)
+                db.session.add(ChatTurn(session_id=session_id, role=role, text=text, tokens=tokens))
+                session.turn_count += 1
+                session.total_tokens += tokens
+        db.session.flush()
+        self._compact(session)
+        db.session.commit()
+
+    # -----------------------
+    # Compaction
+    # -----------------------
+    def _compact(self, session):
+        from app.extensions import db
+        from app.models import ChatTurn
+
+        turns = db.session.execute(
+            select(ChatTurn.id, ChatTurn.role, ChatTurn.text, ChatTurn.tokens)
+            .where(ChatTurn.session_id == session.id).order_by(ChatTurn.id)
+        ).all()
+        verbatim = sum(turn.tokens for turn in turns)
+        folded = []
+        for turn in turns:
+            if verbatim <= self.recent_tokens:
+                break
+            folded.append(turn)
+            verbatim -= turn.tokens
+        if not folded:
+            return
+
+        lines = session.summary.split("\n") if session.summary else []
+        lines.extend(_summary_line(turn.role, turn.text, self.summary_line_chars) for turn in folded)
+        while len(lines) > 2 and estimate_tokens("\n".join(lines)) > self.summary_tokens:
+            del lines[1]
+        session.summary = "\n".join(lines)
+        db.session.execute(delete(ChatTurn).where(ChatTurn.id.in_([turn.id for turn in folded])))
+
+    def _purge_expired(self):
+        """Drop sessions idle for longer than ttl, at most once an hour per process."""
+        from app.extensions import db
+        from app.models import ChatSession, ChatTurn
+
+        now = time.monotonic()
+        if now - self._purged_at < 3600:
+            return
+        self._purged_at = now
+        expired = select(ChatSession.id).where(ChatSession.updated_at < _utcnow() - timedelta(seconds=self.ttl))
+        db.session.execute(delete(ChatTurn).where(ChatTurn.session_id.in_(expired)))
+        db.session.execute(delete(ChatSession).where(ChatSession.id.in_(expired)))
+        db.session.commit()
+
+    def stats(self):
+        """Average estimated prompt tokens per session turn, compacted vs. full history."""
+        summary = {"turns": 0}
+        for prompt in ("compacted", "full_history"):
+            snap = self.prompt_tokens.snapshot(prompt=prompt)
+            summary[f"avg_{prompt}_tokens"] = round(snap[1] / sum(snap[0])) if snap else None
+            if snap:
+                summary["turns"] = sum(snap[0])
+        return summary
@@ -0,0 +1,179 @@
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a dependency the breaker considers down."""
+
+    def __init__(self, name, retry_after=1):
+        super().__init__(f"Circuit {name!r} is open")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open breaker over the last `window` calls.
+
+    The circuit opens when at least `min_calls` outcomes are recorded and
+    either the failure rate reaches `failure_rate` or the share of calls
+    slower than `slow_call_s` reaches `slow_rate`. After `open_seconds`
+    up to `probes` calls are let through; if all of them succeed the
+    circuit closes, any failure opens it again. Exceptions listed in
+    `ignore` (e.g. our own admission control) are not counted.
+    """
+
+    def __init__(self, name, ignore=()):
+        self.name = name
+        self.ignore = tuple(ignore)
+        self.window = 20
+        self.min_calls = 5
+        self.failure_rate = 0.5
+        self.slow_call_s = 10.0
+        self.slow_rate = 0.8
+        self.open_seconds = 30.0
+        self.probes = 1
+        self._lock = threading.Lock()
+        self._reset()
+
+    def init_app(self, app):
+        self.window = app.config.get("LLM_BREAKER_WINDOW", self.window)
+        self.min_calls = app.config.get("LLM_BREAKER_MIN_CALLS", self.min_calls)
+        self.failure_rate = app.config.get("LLM_BREAKER_FAILURE_RATE", self.failure_rate)
+        self.slow_call_s = app.config.get("LLM_BREAKER_SLOW_CALL_S", self.slow_call_s)
+        self.slow_rate = app.config.get("LLM_BREAKER_SLOW_RATE", self.slow_rate)
+        self.open_seconds = app.config.get("LLM_BREAKER_OPEN_SECONDS", self.open_seconds)
+        self.probes = max(1, app.config.get("LLM_BREAKER_PROBES", self.probes))
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        self._state = CLOSED
+        self._outcomes = deque(maxlen=self.window)   # (failed, slow)
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._stats = {"short_circuited": 0, "opened": 0, "closed": 0}
+
+    # -----------------------
+    # State machine (call with the lock held)
+    # -----------------------
+    def _open(self, now):
+        self._state = OPEN
+        self._opened_at = now
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._stats["opened"] += 1
+
+    def _close(self):
+        self._state = CLOSED
+        self._outcomes.clear()
+        self._stats["closed"] += 1
+
+    def _current_state(self, now):
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+        return self._state
+
+    def _reject(self, now):
+        self._stats["short_circuited"] += 1
+        remaining = self.open_seconds - (now - self._opened_at)
+        return CircuitOpen(self.name, max(1, math.ceil(remaining)))
+
+    # -----------------------
+    # Public API
+    # -----------------------
+    def check(self):
+        """Fail fast while open, without taking a probe slot (use before queueing for a resource)."""
+        now = time.monotonic()
+        with self._lock:
+            if self._current_state(now) == OPEN:
+                raise self._reject(now)
+
+    def acquire(self):
+        """Permission for one call; in half-open state only `probes` calls get through."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            if state == OPEN:
+                raise self._reject(now)
+            if state == HALF_OPEN:
+                if self._probes_in_flight >= self.probes:
+                    raise self._reject(now)
+                self._probes_in_flight += 1
+                return True
+            return False
+
+    def release(self, probe, failed=None, elapsed=0.0):
+        """Record an acquired call; failed=None means the outcome says nothing about the dependency."""
+        now = time.monotonic()
+        with self._lock:
+            if probe:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if failed is None:
+                return
+            if probe and self._state == HALF_OPEN:
+                if failed:
+                    self._open(now)
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.probes:
+                        self._close()
+                return
+            if self._state != CLOSED:
+                return   # late result of a call started before the circuit opened
+
+            self._outcomes.append((failed, elapsed >= self.slow_call_s))
+            total = len(self._outcomes)
+            if total < self.min_calls:
+                return
+            failures = sum(1 for f, _ in self._outcomes if f)
+            slow = sum(1 for _, s in self._outcomes if s)
+            if failures / total >= self.failure_rate or slow / total >= self.slow_rate:
+                self._open(now)
+
+    @contextmanager
+    def track(self, measure_latency=True):
+        """Guard a block (e.g. a streamed reply); client disconnects are not counted."""
+        probe = self.acquire()
+        started = time.monotonic()
+        failed = None
+        try:
+            yield
+            failed = False
+        except self.ignore:
+            raise
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.monotonic() - started if measure_latency else 0.0
+            self.release(probe, failed, elapsed)
+
+    def call(self, fn, *args, **kwargs):
+        with self.track():
+            return fn(*args, **kwargs)
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            failures = sum(1 for f, _ in self._outcomes if f)
+            return {
+                **self._stats,
+                "state": self._current_state(now),
+                "window_calls": len(self._outcomes),
+                "window_failures": failures,
+                "open_for_s": round(max(0.0, self.open_seconds - (now - self._opened_at)), 1)
+                if self._state == OPEN else 0.0,
+            }
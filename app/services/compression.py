@@ -0,0 +1,221 @@
+import gzip
+import threading
+import zlib
+
+try:
+    import brotli
+except ImportError:   # optional; without it only gzip is offered
+    brotli = None
+
+# Text formats worth compressing; SSE is excluded on purpose (see compress())
+COMPRESSIBLE_TYPES = frozenset({"application/json", "text/plain", "text/html", "text/css", "application/javascript"})
+
+
+def _gzip(body, level):
+    # mtime=0: the same body always compresses to the same bytes
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def _brotli(body, quality):
+    return brotli.compress(body, quality=quality, mode=brotli.MODE_TEXT)
+
+
+class Precompressed:
+    """A constant body encoded once at startup, with every content coding we can offer."""
+
+    __slots__ = ("identity", "encoded")
+
+    def __init__(self, identity, encoded):
+        self.identity = identity
+        self.encoded = encoded   # content coding -> bytes, only codings that came out smaller
+
+
+class Prefixed:
+    """
+    A body made of a large constant part and a small per-request tail:
+    lead + shared + tail, where `shared` is a str that stays the same
+    object until its content changes (e.g. the hospital snapshot JSON).
+    """
+
+    __slots__ = ("lead", "shared", "tail")
+
+    def __init__(self, lead, shared, tail):
+        self.lead = lead
+        self.shared = shared
+        self.tail = tail
+
+    def identity(self):
+        return self.lead + self.shared.encode("utf-8") + self.tail
+
+
+class _PrimedGzip:
+    """gzip stream that has already consumed lead + shared; each body copies it and adds its tail."""
+
+    __slots__ = ("lead", "shared", "size", "head", "stream")
+
+    def __init__(self, lead, shared, level):
+        self.lead = lead
+        self.shared = shared
+        prefix = lead + shared.encode("utf-8")
+        self.size = len(prefix)
+        self.stream = zlib.compressobj(level, zlib.DEFLATED, 31)   # wbits 31 = gzip container
+        self.head = self.stream.compress(prefix)
+
+    def finish(self, tail):
+        stream = self.stream.copy()
+        return self.head + stream.compress(tail) + stream.flush()
+
+
+class ResponseCompressor:
+    """
+    Content-coding for responses, negotiated from Accept-Encoding.
+
+    Constant bodies are compressed once at the highest settings
+    (`precompress`) and served as stored bytes. Dynamic bodies of at least
+    `min_size` bytes are compressed per response at cheaper settings.
+    Bodies that are mostly one large constant (`Prefixed`) reuse a gzip
+    stream primed with that constant, so only the tail is compressed per
+    request. Streams are left alone: compressing an SSE stream would
+    buffer events that are meant to reach the client immediately.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.min_size = 1024
+        self.gzip_level = 6
+        self.brotli_quality = 4
+        self._choices = {}   # Accept-Encoding header -> acceptable codings, best first; clients send few distinct values
+        self._choices_lock = threading.Lock()
+        self._primed = None   # _PrimedGzip of the latest Prefixed body
+        self._stats = {"compressed": 0, "precompressed": 0, "bytes_in": 0, "bytes_out": 0}
+
+    def init_app(self, app):
+        self.enabled = app.config.get("COMPRESS_ENABLED", self.enabled)
+        self.min_size = app.config.get("COMPRESS_MIN_SIZE", self.min_size)
+        self.gzip_level = app.config.get("COMPRESS_GZIP_LEVEL", self.gzip_level)
+        self.brotli_quality = app.config.get("COMPRESS_BROTLI_QUALITY", self.brotli_quality)
+
+    # -----------------------
+    # Negotiation
+    # -----------------------
+    def codings_for(self, accept_encoding):
+        """Codings we may use for an Accept-Encoding header value, best first: ("br", "gzip"), ("gzip",) or ()."""
+        if not self.enabled or not accept_encoding:
+            return ()
+        codings = self._choices.get(accept_encoding)
+        if codings is not None:
+            return codings
+        codings = self._negotiate(accept_encoding)
+        with self._choices_lock:
+            if len(self._choices) >= 256:
+                self._choices.clear()   # odd headers from scanners must not grow this without bound
+            self._choices[accept_encoding] = codings
+        return codings
+
+    @staticmethod
+    def _negotiate(accept_encoding):
+        accepted = {}
+        for item in accept_encoding.lower().split(","):
+            name, _, params = item.strip().partition(";")
+            q = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    q = float(params[2:])
+                except ValueError:
+                    q = 0.0
+            accepted[name.strip()] = q
+        wildcard = accepted.get("*", 0.0)
+        codings = []
+        if brotli is not None and accepted.get("br", wildcard) > 0:
+            codings.append("br")
+        if accepted.get("gzip", wildcard) > 0:
+            codings.append("gzip")
+        return tuple(codings)
+
+    # -----------------------
+    # Encoding
+    # -----------------------
+    def precompress(self, body):
+        """Precompressed for a constant body; costs one max-level compression per coding, at startup."""
+        encoded = {"gzip": _gzip(body, 9)}
+        if brotli is not None:
+            encoded["br"] = _brotli(body, 11)
+        return Precompressed(body, {coding: data for coding, data in encoded.items() if len(data) < len(body)})
+
+    def encode(self, body, accept_encoding):
+        """(bytes, coding or None) for a body sent to a client with this Accept-Encoding."""
+        codings = self.codings_for(accept_encoding)
+        if isinstance(body, Precompressed):
+            for coding in codings:
+                data = body.encoded.get(coding)
+                if data is not None:
+                    self._count("precompressed", len(body.identity), data)
+                    return data, coding
+            return body.identity, None
+
+        if isinstance(body, Prefixed):
+            if "gzip" in codings:   # brotli streams cannot be copied; gzip of the tail alone is the cheap path
+                primed = self._primed_gzip(body)
+                data = primed.finish(body.tail)
+                self._count("compressed", primed.size + len(body.tail), data)
+                return data, "gzip"
+            body = body.identity()
+
+        if len(body) < self.min_size or not codings:
+            return body, None
+        coding = codings[0]
+        data = _brotli(body, self.brotli_quality) if coding == "br" else _gzip(body, self.gzip_level)
+        if len(data) >= len(body):
+            return body, None
+        self._count("compressed", len(body), data)
+        return data, coding
+
+    def _primed_gzip(self, body):
+        primed = self._primed
+        if primed is None or primed.shared is not body.shared or primed.lead != body.lead:
+            # New snapshot: prime once; concurrent requests may each build one, the last one is kept
+            primed = self._primed = _PrimedGzip(body.lead, body.shared, self.gzip_level)
+        return primed
+
+    def _count(self, kind, size, data):
+        with self._choices_lock:
+            self._stats[kind] += 1
+            self._stats["bytes_in"] += size
+            self._stats["bytes_out"] += len(data)
+
+    # -----------------------
+    # Flask responses
+    # -----------------------
+    def response(self, app, body, accept_encoding, mimetype="application/json", status=200):
+        """A response for bytes, a Precompressed or a Prefixed body, already content-coded."""
+        data, coding = self.encode(body, accept_encoding)
+        response = app.response_class(data, status=status, mimetype=mimetype)
+        if coding:
+            response.headers["Content-Encoding"] = coding
+        response.vary.add("Accept-Encoding")
+        return response
+
+    def compress(self, response, accept_encoding):
+        """after_request hook: content-code a buffered text response in place."""
+        if (not self.enabled
+                or response.direct_passthrough
+                or response.is_streamed
+                or response.status_code < 200 or response.status_code in (204, 304)
+                or "Content-Encoding" in response.headers
+                or response.mimetype not in COMPRESSIBLE_TYPES):
+            return response
+        response.vary.add("Accept-Encoding")
+        body = response.get_data()
+        data, coding = self.encode(body, accept_encoding)
+        if coding:
+            response.set_data(data)
+            response.headers["Content-Encoding"] = coding
+        return response
+
+    def stats(self):
+        with self._choices_lock:
+            stats = dict(self._stats)
+        stats["ratio"] = round(stats["bytes_out"] / stats["bytes_in"], 3) if stats["bytes_in"] else None
+        stats["brotli"] = brotli is not None
+        return stats
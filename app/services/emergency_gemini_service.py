@@ -1,22 +1,178 @@
-from flask import current_app
-import sys  #Imports Python’s system module
+import asyncio  #to_thread for the reply cache's SQLite tier in the async variants
+import logging  #Errors go to the structured `app` logger
 
-def emergency_ai_response(prompt: str) -> str:  #prompt: str → user’s emergency description (text)  str → AI-generated response or error message
-    model = getattr(current_app, "gemini_model", None)  #current_app → the active Flask app , getattr(obj, "attr", None): Tries to get current_app.gemini_model , If it doesn’t exist → returns None
+from app.extensions import response_cache, llm_metrics, gemini
+from app.services.circuit_breaker import CircuitOpen
+from app.services.llm_calls import (
+    generate_shared, generate_stream, generate_shared_async, generate_stream_async, DeadlineExceeded,
+    ModelUnavailable,
+)
+from app.services.response_cache import make_key
+from app.services.llm_pool import LLMPoolFull, PRIORITY_EMERGENCY
+from app.services.rate_limiter import RateLimited
 
-    if not model:   #If the AI model is not loaded or unavailable: Immediately return a safe fallback message, Prevents calling .generate_content() on None
-        return "AI service unavailable. Please seek emergency help."
+logger = logging.getLogger(__name__)
 
-    system_prompt = (     #Sets the role → emergency medical assistant
-        "You are an emergency medical assistant.\n"
-        "1. Acknowledge the situation.\n"
-        "2. Give 3–5 immediate first-aid steps.\n"
-        "End with: This is not medical advice."
-    )
+SYSTEM_PROMPT = (     #Sets the role → emergency medical assistant
+    "You are an emergency medical assistant.\n"
+    "1. Acknowledge the situation.\n"
+    "2. Give 3–5 immediate first-aid steps.\n"
+    "End with: This is not medical advice."
+)
 
+EMERGENCY_FALLBACK_TEXT = (     #Canned first-aid text used when there is no AI reply in time (or none at all)
+    "Please call your local emergency number now.\n"
+    "1. Make sure the area is safe for you and the patient.\n"
+    "2. Check breathing; if absent, start CPR if trained.\n"
+    "3. Apply firm pressure to any heavy bleeding.\n"
+    "4. Keep the person still, warm and reassured until help arrives.\n"
+    "The nearest hospitals are listed below. This is not medical advice."
+)
+
+FALLBACK_REASONS = {LLMPoolFull: "busy", CircuitOpen: "circuit_open", DeadlineExceeded: "deadline", RateLimited: "rate_limited"}   #Metric label for each degrade path
+
+
+def _conversation(prompt: str, history: str = ""):  #→ (cache text, model prompt); history = chat_sessions context of a session turn, "" for a one-off message
+    if not history:
+        return prompt, SYSTEM_PROMPT + "\nUser: " + prompt   #Unchanged one-off prompt → existing cache entries stay valid
+    text = history + "\nUser: " + prompt   #Same message in another conversation is another cache entry
+    return text, SYSTEM_PROMPT + "\n" + text
+
+
+def fallback_reason(e):  #Metric label of a model call that failed with e, "error" for anything unexpected
+    return next((reason for cls, reason in FALLBACK_REASONS.items() if isinstance(e, cls)), "error")
+
+
+def _no_model():  #No model configured: counted here, the caller answers with canned first aid
+    llm_metrics.record_response("emergency", SYSTEM_PROMPT, "fallback", "no_model")
+
+
+def _cached_reply(text):  #Same emergency text answered recently → reuse it, editing SYSTEM_PROMPT invalidates old entries
+    cached = response_cache.get("emergency", SYSTEM_PROMPT, text)
+    if cached is not None:
+        llm_metrics.record_response("emergency", SYSTEM_PROMPT, "cache")
+    return cached
+
+
+def _model_reply(text, reply, shared=False):  #Counts the model's answer; shared → another request made the call and fills the cache
+    if shared:
+        llm_metrics.record_response("emergency", SYSTEM_PROMPT, "coalesced")
+        return reply
+    response_cache.set("emergency", SYSTEM_PROMPT, text, reply)   #Only successful replies are cached, errors are never stored
+    llm_metrics.record_response("emergency", SYSTEM_PROMPT, "model")
+    return reply
+
+
+def _model_failed(e, stream=False):  #Counts a failed call answered with canned first aid; unexpected errors are logged by class only, the exception text can echo the prompt
+    reason = fallback_reason(e)
+    if reason == "error":
+        logger.warning("emergency_ai_error", extra={"error": type(e).__name__, "stream": stream})
+    llm_metrics.record_response("emergency", SYSTEM_PROMPT, "fallback", reason)
+
+
+def emergency_ai_response(prompt: str, deadline=None, history: str = "") -> str:  #prompt: str → user’s emergency description (text), deadline → llm_calls.Deadline bounding pool wait + Gemini request, history → earlier turns of a chat session, str → AI-generated response; no model answer → ModelUnavailable
+    model = gemini.get()  #Shared per-process model, built on first use; None without a key or with GEMINI_FORCE_MOCK
+
+    if not model:   #If the AI model is not loaded or unavailable: the route answers with canned first aid, Prevents calling .generate_content() on None
+        _no_model()
+        raise ModelUnavailable("no_model")
+
+    text, full_prompt = _conversation(prompt, history)
+    cached = _cached_reply(text)
+    if cached is not None:
+        return cached
+
+    try:
+        key = make_key("emergency", SYSTEM_PROMPT, text)   #Same key as the cache → identical messages in flight together share one call
+        response, shared = generate_shared(key, "emergency", SYSTEM_PROMPT, model,   #Calls the Gemini model (breaker → pool slot → metrics), sends SYSTEM_PROMPT (instructions), "User: " + actual user emergency message
+                                           full_prompt, PRIORITY_EMERGENCY, deadline)
+    except (LLMPoolFull, CircuitOpen, DeadlineExceeded):
+        raise   #Caller decides how to degrade (the route still answers with hospitals + canned first aid)
+    except Exception as e:
+        _model_failed(e)
+        raise ModelUnavailable("error") from e   #Degraded like the other fallbacks, never stored as the model's answer
+    return _model_reply(text, response.text, shared)   #Extracts the AI’s text output
+
+
+def stream_emergency_ai_response(prompt: str, deadline=None, history: str = ""):  #Generator version of emergency_ai_response, yields text chunks as Gemini produces them
+    model = gemini.get()
+
+    if not model:
+        _no_model()
+        yield EMERGENCY_FALLBACK_TEXT
+        return
+
+    text, full_prompt = _conversation(prompt, history)
+    cached = _cached_reply(text)
+    if cached is not None:
+        yield cached
+        return
+
+    parts = []
+    try:
+        for chunk in generate_stream("emergency", SYSTEM_PROMPT, model,   #Emergency priority → served before queued symptom checks, chunks arrive while the reply is still being generated
+                                     full_prompt, PRIORITY_EMERGENCY, deadline):
+            if chunk.text:
+                parts.append(chunk.text)
+                yield chunk.text
+    except Exception as e:
+        if parts:   #Failure mid-stream (e.g. deadline) → the client already has a partial answer, the route reports it
+            raise
+        _model_failed(e, stream=True)
+        yield EMERGENCY_FALLBACK_TEXT   #Never refuse an emergency, fall back to canned first aid
+        return
+    _model_reply(text, "".join(parts))
+
+
+async def emergency_ai_response_async(prompt: str, deadline=None, history: str = "") -> str:  #emergency_ai_response for the ASGI view, awaits Gemini instead of holding a thread
+    model = gemini.get()
+
+    if not model:
+        _no_model()
+        raise ModelUnavailable("no_model")
+
+    text, full_prompt = _conversation(prompt, history)
+    cached = await asyncio.to_thread(_cached_reply, text)   #Disk tier is SQLite, kept off the event loop
+    if cached is not None:
+        return cached
+
+    try:
+        key = make_key("emergency", SYSTEM_PROMPT, text)
+        response, shared = await generate_shared_async(key, "emergency", SYSTEM_PROMPT, model,
+                                                       full_prompt, PRIORITY_EMERGENCY, deadline)
+    except (LLMPoolFull, CircuitOpen, DeadlineExceeded):
+        raise
+    except Exception as e:
+        _model_failed(e)
+        raise ModelUnavailable("error") from e
+    return await asyncio.to_thread(_model_reply, text, response.text, shared)
+
+
+async def stream_emergency_ai_response_async(prompt: str, deadline=None, history: str = ""):  #Async generator version of stream_emergency_ai_response
+    model = gemini.get()
+
+    if not model:
+        _no_model()
+        yield EMERGENCY_FALLBACK_TEXT
+        return
+
+    text, full_prompt = _conversation(prompt, history)
+    cached = await asyncio.to_thread(_cached_reply, text)
+    if cached is not None:
+        yield cached
+        return
+
+    parts = []
     try:
-        response = model.generate_content(system_prompt + "\nUser: " + prompt)   #Calls the Gemini model, sends system_prompt (instructions), "User: " + actual user emergency message
-        return response.text   #Extracts the AI’s text output
+        async for chunk in generate_stream_async("emergency", SYSTEM_PROMPT, model,
+                                                 full_prompt, PRIORITY_EMERGENCY, deadline):
+            if chunk.text:
+                parts.append(chunk.text)
+                yield chunk.text
     except Exception as e:
-        print(e, file=sys.stderr)   #Prints the error message to stderr
-        return "AI error. Please call emergency services."
+        if parts:
+            raise
+        _model_failed(e, stream=True)
+        yield EMERGENCY_FALLBACK_TEXT
+        return
+    await asyncio.to_thread(_model_reply, text, "".join(parts))
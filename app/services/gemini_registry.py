@@ -0,0 +1,94 @@
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class GeminiRegistry:
+    """
+    The one GenerativeModel of a process, shared by every service.
+
+    google.generativeai (and the gRPC stack under it) is imported and
+    configured on first use rather than at boot, and the model is rebuilt
+    in a forked worker instead of reusing the parent's channels. get()
+    returns None when no key is configured or GEMINI_FORCE_MOCK is set;
+    callers then answer from their local fallback.
+    """
+
+    def __init__(self):
+        self.api_key = None
+        self.model_name = "models/gemini-1.5-flash"
+        self.force_mock = False
+        self._model = None
+        self._pid = None
+        self._override = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.api_key = app.config.get("GEMINI_API_KEY")
+        self.model_name = app.config.get("GEMINI_MODEL", self.model_name)
+        self.force_mock = app.config.get("GEMINI_FORCE_MOCK", self.force_mock)
+        self.reset()
+        if not self.api_key and not self.force_mock:
+            logger.warning("gemini_api_key_missing")
+
+    @property
+    def configured(self) -> bool:
+        if self._override is not None:
+            return True
+        return bool(self.api_key) and not self.force_mock
+
+    def get(self):
+        if self._override is not None:
+            return self._override
+        if not self.configured:
+            return None
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._model = self._build()
+                    self._pid = os.getpid() if self._model is not None else None
+        return self._model
+
+    def _build(self):
+        try:
+            import google.generativeai as genai
+
+            genai.configure(api_key=self.api_key)
+            return genai.GenerativeModel(self.model_name)
+        except Exception as e:
+            # Retried on the next call; until then callers use their fallback
+            logger.error("gemini_model_init_failed", extra={"error": type(e).__name__})
+            return None
+
+    def preload(self):
+        """
+        Import the SDK without building a model. A preloading server calls
+        this before forking, so workers share the module pages instead of
+        each importing it on its first call; channels stay per worker.
+        """
+        if self._override is not None or not self.configured:
+            return
+        try:
+            import google.generativeai  # noqa: F401
+        except Exception as e:
+            logger.error("gemini_sdk_import_failed", extra={"error": type(e).__name__})
+
+    def override(self, model):
+        """Serve `model` instead of Gemini (offline benchmarks, fakes); None restores normal behaviour."""
+        self._override = model
+
+    def reset(self):
+        """Forget the built model, e.g. in a freshly forked worker."""
+        with self._lock:
+            self._model = None
+            self._pid = None
+
+    def stats(self):
+        return {
+            "configured": self.configured,
+            "loaded": self._override is not None or (self._model is not None and self._pid == os.getpid()),
+            "model": self.model_name,
+            "force_mock": self.force_mock,
+        }
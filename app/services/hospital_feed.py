@@ -0,0 +1,274 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+from app.json_provider import dumps
+from app.sse import SSE_KEEPALIVE, sse_raw_event
+
+logger = logging.getLogger(__name__)
+
+
+class FeedFull(Exception):
+    """Raised when a worker already holds max_threaded feed streams on request threads; retry_after is a hint in seconds."""
+
+    def __init__(self, retry_after: int = 30):
+        super().__init__("Hospital feed subscribers limit reached")
+        self.retry_after = retry_after
+
+
+class HospitalFeed:
+    """
+    Live hospital capacity for SSE subscribers (GET /api/hospitals/feed).
+
+    The directory tells the feed which fields changed (HospitalDirectory
+    listeners). Each change set is encoded once into a `delta` event and
+    kept in a ring of the last `history` events; subscribers only wait on
+    a condition and read from the ring, so a thousand of them cost no DB
+    queries and no per-subscriber encoding. One poller thread, running
+    while anyone is subscribed, makes the directory pick up commits made by
+    other workers.
+
+    Event ids are "<epoch>:<version>", the epoch being unique to this
+    process. A client reconnecting with Last-Event-ID gets the deltas it
+    missed if they are still in the ring, otherwise a fresh `snapshot`.
+    A subscriber that falls more than `history` events behind is resynced
+    the same way instead of buffering without bound.
+
+    Under WSGI every stream holds a request thread for as long as it is
+    open, so at most `max_threaded` of them run per worker (see
+    acquire_thread); async subscribers are not counted.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.history = 1024
+        self.heartbeat = 15.0
+        self.max_threaded = 4
+        self._app = None
+        self._pid = None
+        self._epoch = None
+        self._events = deque()   # (version, formatted event), oldest first
+        self._floor = 0   # newest version no longer in the ring
+        self._snapshot = None   # (version, formatted event), encoded once per version
+        self._cond = threading.Condition()
+        self._async_waiters = set()   # (loop, future) of async subscribers waiting for the next event
+        self._subscribers = 0
+        self._threaded = 0
+        self._poller = None
+        self._closed = False
+        self._stats = {"deltas": 0, "snapshots": 0, "resumed": 0, "resynced": 0}
+
+    def init_app(self, app):
+        self.history = app.config.get("HOSPITAL_FEED_HISTORY", self.history)
+        self.heartbeat = app.config.get("HOSPITAL_FEED_HEARTBEAT", self.heartbeat)
+        self.max_threaded = app.config.get("HOSPITAL_FEED_MAX_SUBSCRIBERS", self.max_threaded)
+        self._app = app
+        self._closed = False
+        self.directory.add_listener(self.publish)
+
+    @property
+    def epoch(self):
+        # Per process: workers forked from a preloaded app must not share ids
+        if self._pid != os.getpid():
+            self._pid, self._epoch = os.getpid(), uuid.uuid4().hex[:8]
+        return self._epoch
+
+    # -----------------------
+    # Publishing
+    # -----------------------
+    def publish(self, version, changes):
+        """HospitalDirectory listener: encode the change set once and wake every subscriber."""
+        body = {"version": version, "hospitals": {}}
+        for hospital_id, delta in changes.items():
+            if delta is None:
+                body.setdefault("removed", []).append(hospital_id)
+            else:
+                body["hospitals"][hospital_id] = delta
+        event = sse_raw_event("delta", dumps(body), f"{self.epoch}:{version}")
+        with self._cond:
+            self._events.append((version, event))
+            while len(self._events) > self.history:
+                self._floor = self._events.popleft()[0]
+            self._stats["deltas"] += 1
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, set()
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+
+    def close(self):
+        """End every stream after its current event (worker shutdown); clients reconnect elsewhere with Last-Event-ID."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, set()
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+
+    def _since(self, seen):
+        """(version, event) pairs after version `seen`, or None when some of them already left the ring."""
+        if seen < self._floor:
+            return None
+        if not self._events or self._events[-1][0] <= seen:
+            return []
+        return [item for item in self._events if item[0] > seen]
+
+    def _latest(self):
+        return self._events[-1][0] if self._events else self._floor
+
+    # -----------------------
+    # Snapshots and resume
+    # -----------------------
+    def snapshot(self):
+        """(version, `snapshot` event) of every hospital; may query the DB, so call it off the event loop."""
+        with self._app.app_context():   # own session, closed right away; a stream may stay open for hours
+            version, rows = self.directory.by_id()
+        cached = self._snapshot
+        if cached is None or cached[0] != version:
+            body = dumps({"version": version, "hospitals": rows})
+            cached = self._snapshot = (version, sse_raw_event("snapshot", body, f"{self.epoch}:{version}"))
+        with self._cond:
+            self._stats["snapshots"] += 1
+        return cached
+
+    def resume(self, last_event_id):
+        """(version, missed events as one chunk) for a reconnect from Last-Event-ID; None when a snapshot is needed."""
+        epoch, _, version = (last_event_id or "").partition(":")
+        if epoch != self.epoch or not version.isdigit():
+            return None
+        seen = int(version)
+        with self._cond:
+            if seen > self._latest() and seen > self.directory.version:
+                return None   # an id this process never issued
+            events = self._since(seen)
+            if events is None:
+                return None
+            self._stats["resumed"] += 1
+        return _joined(seen, events)
+
+    # -----------------------
+    # Subscribing
+    # -----------------------
+    def _subscribe(self):
+        with self._cond:
+            self._subscribers += 1
+            if self._poller is None or not self._poller.is_alive():
+                self._poller = threading.Thread(target=self._poll, name="hospital-feed-poller", daemon=True)
+                self._poller.start()
+
+    def _unsubscribe(self):
+        with self._cond:
+            self._subscribers -= 1
+
+    def acquire_thread(self):
+        """
+        Reserve a request thread for a WSGI stream, FeedFull once max_threaded
+        are open (0 = no limit). The thread is given back with release_thread.
+        """
+        with self._cond:
+            if self.max_threaded and self._threaded >= self.max_threaded:
+                raise FeedFull(max(1, int(self.heartbeat * 2)))
+            self._threaded += 1
+
+    def release_thread(self):
+        with self._cond:
+            self._threaded -= 1
+
+    def _poll(self):
+        # The directory's own stamp check, run for the subscribers since they never read it themselves
+        while True:
+            time.sleep(self.directory.check_interval)
+            with self._cond:
+                if not self._subscribers:
+                    self._poller = None
+                    return
+            try:
+                with self._app.app_context():
+                    self.directory.ensure_loaded()
+            except Exception as e:
+                logger.warning("hospital_feed_poll_failed", extra={"error": type(e).__name__})
+
+    def _next(self, seen, events):
+        """(seen, chunk to send) after a wait that returned `events`."""
+        if events is None:   # fell behind the ring
+            with self._cond:
+                self._stats["resynced"] += 1
+            return self.snapshot()
+        if not events:
+            return seen, SSE_KEEPALIVE
+        return _joined(seen, events)
+
+    def stream(self, last_event_id=None):
+        """Formatted events for one subscriber: the snapshot (or missed deltas), then deltas as they come."""
+        self._subscribe()
+        try:
+            resumed = self.resume(last_event_id)
+            seen, first = resumed if resumed is not None else self.snapshot()
+            yield first or SSE_KEEPALIVE   # send something at once so the client knows it is connected
+            while not self._closed:
+                with self._cond:
+                    if self._latest() <= seen and not self._closed:
+                        self._cond.wait(self.heartbeat)
+                    events = self._since(seen)
+                seen, chunk = self._next(seen, events)
+                yield chunk
+        finally:
+            self._unsubscribe()
+
+    async def stream_async(self, last_event_id=None):
+        """stream() for the ASGI view; waiting is a suspended task, not a thread."""
+        self._subscribe()
+        try:
+            resumed = self.resume(last_event_id)
+            seen, first = resumed if resumed is not None else await asyncio.to_thread(self.snapshot)
+            yield first or SSE_KEEPALIVE
+            loop = asyncio.get_running_loop()
+            while not self._closed:
+                with self._cond:
+                    events = self._since(seen)
+                    wait = events == [] and not self._closed
+                    if wait:
+                        future = loop.create_future()
+                        self._async_waiters.add((loop, future))
+                if wait:
+                    try:
+                        await asyncio.wait_for(future, self.heartbeat)
+                    except asyncio.TimeoutError:
+                        pass
+                    with self._cond:
+                        self._async_waiters.discard((loop, future))
+                        events = self._since(seen)
+                if events is None:
+                    with self._cond:
+                        self._stats["resynced"] += 1
+                    seen, chunk = await asyncio.to_thread(self.snapshot)
+                else:
+                    seen, chunk = self._next(seen, events)
+                yield chunk
+        finally:
+            self._unsubscribe()
+
+    def stats(self):
+        with self._cond:
+            return {
+                **self._stats,
+                "subscribers": self._subscribers,
+                "threaded": self._threaded,
+                "version": self._latest(),
+                "buffered": len(self._events),
+            }
+
+
+def _joined(seen, events):
+    """(version of the last event, events as one chunk) for (version, event) pairs."""
+    if not events:
+        return seen, ""
+    return events[-1][0], "".join(event for _, event in events)
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
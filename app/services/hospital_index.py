@@ -0,0 +1,341 @@
+import heapq
+import math
+import threading
+import time
+
+from sqlalchemy import event, func, select
+
+from app.json_provider import dumps
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+# -----------------------
+# Uniform lat/lng grid
+# -----------------------
+class GeoGridIndex:
+    """
+    Points bucketed into square lat/lng cells. Nearest-neighbour queries
+    scan rings of cells outward from the query cell and stop once no
+    unvisited cell can hold a closer point. Inserts, moves and deletes
+    touch a single cell, so the index is kept up to date incrementally.
+    """
+
+    def __init__(self, cell_deg=0.05):
+        self.cell_deg = cell_deg
+        self._cells = {}       # (ix, iy) -> {id: (lat, lng)}
+        self._points = {}      # id -> (lat, lng, cell)
+
+    def __len__(self):
+        return len(self._points)
+
+    def _cell(self, lat, lng):
+        return (math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg))
+
+    def upsert(self, item_id, lat, lng):
+        self.remove(item_id)
+        cell = self._cell(lat, lng)
+        self._cells.setdefault(cell, {})[item_id] = (lat, lng)
+        self._points[item_id] = (lat, lng, cell)
+
+    def remove(self, item_id):
+        old = self._points.pop(item_id, None)
+        if old is None:
+            return
+        bucket = self._cells[old[2]]
+        del bucket[item_id]
+        if not bucket:
+            del self._cells[old[2]]
+
+    def clear(self):
+        self._cells.clear()
+        self._points.clear()
+
+    def _ring(self, cx, cy, r):
+        if r == 0:
+            yield (cx, cy)
+            return
+        for dx in range(-r, r + 1):
+            yield (cx + dx, cy - r)
+            yield (cx + dx, cy + r)
+        for dy in range(-r + 1, r):
+            yield (cx - r, cy + dy)
+            yield (cx + r, cy + dy)
+
+    def nearest(self, lat, lng, k, radius_km=None, predicate=None):
+        """Return up to k (distance_km, id) pairs sorted by distance."""
+        if k <= 0 or not self._points:
+            return []
+
+        cx, cy = self._cell(lat, lng)
+        best = []   # max-heap of (-distance, id), size <= k
+        visited = 0
+        r = 0
+
+        def consider(bucket):
+            for item_id, (plat, plng) in bucket.items():
+                if predicate is not None and not predicate(item_id):
+                    continue
+                d = haversine_km(lat, lng, plat, plng)
+                if radius_km is not None and d > radius_km:
+                    continue
+                if len(best) < k:
+                    heapq.heappush(best, (-d, item_id))
+                elif d < -best[0][0]:
+                    heapq.heapreplace(best, (-d, item_id))
+
+        while visited < len(self._cells):
+            # Once a ring has more cells than are occupied, scanning the
+            # occupied cells directly is cheaper than walking empty space
+            if 8 * r > len(self._cells):
+                for (x, y), bucket in self._cells.items():
+                    if abs(x - cx) >= r or abs(y - cy) >= r:   # outside rings already scanned
+                        consider(bucket)
+                break
+
+            for cell in self._ring(cx, cy, r):
+                bucket = self._cells.get(cell)
+                if bucket:
+                    visited += 1
+                    consider(bucket)
+
+            # Closest any point outside rings 0..r can be. Longitude cells
+            # shrink with latitude, so use the narrowest width in range.
+            edge_lat = min(89.9, abs(lat) + (r + 1) * self.cell_deg)
+            min_cell_km = self.cell_deg * KM_PER_DEGREE * math.cos(math.radians(edge_lat))
+            bound = r * min_cell_km
+            if radius_km is not None and bound > radius_km:
+                break
+            if len(best) == k and -best[0][0] <= bound:
+                break
+            r += 1
+
+        return sorted((-d, item_id) for d, item_id in best)
+
+
+# -----------------------
+# Hospital directory
+# -----------------------
+class HospitalDirectory:
+    """
+    Process-level snapshot of the Hospital table: serialized rows, a grid
+    index over their coordinates and the full list pre-encoded as JSON.
+
+    `version` increases on every change. Commits made by this process are
+    applied immediately from session events; commits made by other
+    workers are detected by comparing a cheap (row count, latest
+    updated_at) stamp, checked at most once per `check_interval` seconds,
+    so the common read path runs no queries and no serialization.
+
+    Listeners (see `add_listener`) are told which fields of which rows
+    changed, whichever of the two paths brought the change in.
+    """
+
+    def __init__(self):
+        self.index = GeoGridIndex()
+        self.version = 0
+        self.check_interval = 2.0
+        self._rows = {}   # id -> to_dict() payload
+        self._json = None   # encoded list of every row, built lazily per version
+        self._stamp = None
+        self._checked_at = 0.0
+        self._loaded = False
+        self._listeners = []
+        self._lock = threading.RLock()
+
+    def init_app(self, app, session):
+        self.index = GeoGridIndex(cell_deg=app.config.get("HOSPITAL_INDEX_CELL_DEG", 0.05))
+        self.check_interval = app.config.get("HOSPITAL_SNAPSHOT_CHECK_INTERVAL", 2.0)
+        self._loaded = False
+        if not event.contains(session, "after_commit", self._apply_committed):
+            event.listen(session, "after_flush", _collect_hospital_changes)
+            event.listen(session, "after_commit", self._apply_committed)
+            event.listen(session, "after_rollback", _discard_hospital_changes)
+
+    def add_listener(self, listener):
+        """
+        listener(version, changes) after every change set, where changes maps
+        hospital id -> changed fields of its payload (the whole payload for a
+        new row) or None for a deleted row. It runs under the directory lock,
+        so it must be quick, and by_id() never sees a version it was not told about.
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    # -----------------------
+    # Loading and invalidation
+    # -----------------------
+    def _current_stamp(self):
+        from app.extensions import db
+        from app.models import Hospital
+
+        count, latest = db.session.execute(
+            select(func.count(Hospital.id), func.max(Hospital.updated_at))
+        ).one()
+        return count, latest
+
+    def _reload(self, stamp):
+        from app.models import Hospital
+
+        previous = dict(self._rows) if self._stamp is not None else None   # None on the first load: nothing to diff
+        self.index.clear()
+        self._rows.clear()
+        for hospital in Hospital.query.all():
+            self._upsert(*_snapshot(hospital))
+        self._stamp = stamp
+        self._changed()
+        self._loaded = True
+        if previous is not None:
+            changes = {hospital_id: None for hospital_id in previous.keys() - self._rows.keys()}
+            for hospital_id, row in self._rows.items():
+                delta = _diff(previous.get(hospital_id), row)
+                if delta:
+                    changes[hospital_id] = delta
+            self._notify(changes)
+
+    def ensure_loaded(self):
+        now = time.monotonic()
+        if self._loaded and now - self._checked_at < self.check_interval:
+            return
+
+        with self._lock:
+            if self._loaded and now - self._checked_at < self.check_interval:
+                return
+            stamp = self._current_stamp()
+            if not self._loaded or stamp != self._stamp:
+                self._reload(stamp)
+            self._checked_at = now
+
+    def invalidate(self):
+        """Force a reload on next access (e.g. after raw SQL writes)."""
+        with self._lock:
+            self._loaded = False
+
+    def _changed(self):
+        self.version += 1
+        self._json = None
+
+    def _notify(self, changes):
+        if changes:
+            for listener in self._listeners:
+                listener(self.version, changes)
+
+    def _upsert(self, hospital_id, row, lat, lng):
+        self._rows[hospital_id] = row
+        if lat is not None and lng is not None:
+            self.index.upsert(hospital_id, lat, lng)
+        else:
+            self.index.remove(hospital_id)
+
+    def _remove(self, hospital_id):
+        self._rows.pop(hospital_id, None)
+        self.index.remove(hospital_id)
+
+    def _apply_committed(self, session):
+        changes = session.info.pop("hospital_changes", None)
+        if not changes or not self._loaded:
+            return
+        with self._lock:
+            deltas = {}
+            for hospital_id, snapshot in changes.items():
+                if snapshot is None:
+                    if hospital_id in self._rows:
+                        deltas[hospital_id] = None
+                    self._remove(hospital_id)
+                else:
+                    delta = _diff(self._rows.get(hospital_id), snapshot[1])
+                    if delta:
+                        deltas[hospital_id] = delta
+                    self._upsert(*snapshot)
+            # The stored stamp is now behind the DB, so the next stamp
+            # check reloads once; readers here see the change immediately.
+            self._changed()
+            self._notify(deltas)
+
+    # -----------------------
+    # Reads
+    # -----------------------
+    def all(self, ids=None):
+        """Every hospital payload, or only those whose id is in `ids`."""
+        self.ensure_loaded()
+        with self._lock:
+            if ids is None:
+                return list(self._rows.values())
+            return [row for hospital_id, row in self._rows.items() if hospital_id in ids]
+
+    def by_id(self):
+        """(version, {id: payload}) of every hospital, taken together."""
+        self.ensure_loaded()
+        with self._lock:
+            return self.version, dict(self._rows)
+
+    def all_json(self):
+        """JSON text of all() for the current version, encoded once."""
+        self.ensure_loaded()
+        with self._lock:
+            if self._json is None:
+                self._json = dumps(list(self._rows.values()))
+            return self._json
+
+    def nearest(self, lat, lng, limit=10, offset=0, radius_km=None, predicate=None):
+        """
+        Hospitals sorted by distance from (lat, lng). Returns (rows, has_more);
+        each row is a copy of the hospital payload with the computed distance.
+        """
+        self.ensure_loaded()
+        with self._lock:
+            hits = self.index.nearest(lat, lng, offset + limit + 1, radius_km, predicate)
+            rows = []
+            for distance_km, hospital_id in hits[offset:offset + limit]:
+                row = dict(self._rows[hospital_id])
+                row["distance"] = f"{distance_km:.1f} km"
+                row["distance_km"] = round(distance_km, 3)
+                rows.append(row)
+        return rows, len(hits) > offset + limit
+
+
+def _diff(old, new):
+    """Fields of payload `new` that differ from `old`; nested dicts (capacity) are compared field by field."""
+    if old is None:
+        return new
+    delta = {}
+    for key, value in new.items():
+        before = old.get(key)
+        if isinstance(value, dict) and isinstance(before, dict):
+            inner = {k: v for k, v in value.items() if k not in before or before[k] != v}
+            if inner:
+                delta[key] = inner
+        elif key not in old or before != value:
+            delta[key] = value
+    return delta
+
+
+def _snapshot(hospital):
+    return hospital.id, hospital.to_dict(), hospital.latitude, hospital.longitude
+
+
+def _collect_hospital_changes(session, flush_context):
+    # Rows are copied here because objects are expired (and SQL is not
+    # allowed) by the time after_commit runs
+    from app.models import Hospital
+
+    changes = session.info.setdefault("hospital_changes", {})
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Hospital):
+            changes[obj.id] = _snapshot(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Hospital):
+            changes[obj.id] = None
+
+
+def _discard_hospital_changes(session):
+    session.info.pop("hospital_changes", None)
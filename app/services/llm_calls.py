@@ -0,0 +1,295 @@
+import asyncio
+import functools
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from flask import current_app
+
+from app.extensions import llm_pool, llm_metrics, llm_breaker, llm_single_flight
+from app.services.llm_pool import LLMPoolFull
+from app.services.single_flight import WaitTimeout
+
+# Hedged calls run their attempts here so the first answer can be returned
+_hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-hedge")
+
+
+class DeadlineExceeded(Exception):
+    """The endpoint's latency budget ran out before the model answered."""
+
+
+class ModelUnavailable(Exception):
+    """No model answer: none configured, the circuit is open or the call failed. reason is the metric label."""
+
+    def __init__(self, reason: str):
+        super().__init__(f"Model unavailable ({reason})")
+        self.reason = reason
+
+
+class Deadline:
+    """Absolute point in time (monotonic clock) by which an endpoint must answer."""
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+def _acquire(priority, deadline):
+    """Pool slot, waiting no longer than the deadline allows."""
+    timeout = None
+    if deadline is not None:
+        if deadline.expired:
+            raise DeadlineExceeded()
+        timeout = min(llm_pool.queue_timeout, deadline.remaining())
+    try:
+        llm_pool.acquire(priority, timeout)
+    except LLMPoolFull:
+        if deadline is not None and deadline.expired:
+            raise DeadlineExceeded() from None
+        raise
+
+
+def _with_deadline(deadline, kwargs):
+    if deadline is None:
+        return kwargs
+    # The SDK aborts the HTTP/gRPC request itself, so a slow generation frees the thread
+    return {**kwargs, "request_options": {"timeout": max(0.1, deadline.remaining())}}
+
+
+def _attempt(name, template, model, prompt, deadline, kwargs):
+    try:
+        return llm_breaker.call(llm_metrics.call, name, template,
+                                model.generate_content, prompt, **_with_deadline(deadline, kwargs))
+    except Exception as e:
+        if deadline is not None and deadline.expired:
+            raise DeadlineExceeded() from e
+        raise
+
+
+def _holding_slot(priority, fn):
+    """fn() that releases an already acquired slot when it finishes, wherever it runs."""
+    def run():
+        started = time.monotonic()
+        try:
+            return fn()
+        finally:
+            llm_pool.release(priority, time.monotonic() - started)
+    return run
+
+
+def _hedge_delay(name, template, deadline):
+    config = current_app.config
+    if deadline is None or not config.get("LLM_HEDGE_ENABLED"):
+        return None
+    delay = llm_metrics.latency_quantile(name, template, config.get("LLM_HEDGE_QUANTILE", 0.95),
+                                         config.get("LLM_HEDGE_MIN_SAMPLES", 20))
+    if delay is None or delay >= deadline.remaining():
+        return None
+    return delay
+
+
+def _hedged(name, template, priority, deadline, delay, attempt):
+    """
+    Runs `attempt` and, if it has not finished after `delay` (a high
+    percentile of recent call times) and a slot is free right now, a
+    second identical attempt. The first successful answer wins; the other
+    attempt finishes in the background and releases its own slot.
+    """
+    primary = _hedge_executor.submit(_holding_slot(priority, attempt))
+    done, _ = wait([primary], timeout=delay)
+    if done or not llm_pool.try_acquire(priority):
+        pending = {primary}
+    else:
+        llm_metrics.record_hedge(name, template, "fired")
+        secondary = _hedge_executor.submit(_holding_slot(priority, attempt))
+        pending = {primary, secondary}
+
+    error = None
+    while pending:
+        done, pending = wait(pending, timeout=deadline.remaining(), return_when=FIRST_COMPLETED)
+        if not done:
+            raise DeadlineExceeded()
+        for future in done:
+            if future.exception() is None:
+                if future is not primary:
+                    llm_metrics.record_hedge(name, template, "won")
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+def generate(name, template, model, prompt, priority, deadline=None, **kwargs):
+    """
+    One blocking model call: fail fast if the circuit is open, wait for a
+    pool slot, then call the model under the breaker and the metrics.
+    With a deadline the slot wait and the request itself are bounded by
+    it (DeadlineExceeded), and the call may be hedged.
+    """
+    llm_breaker.check()   # an open circuit never queues for a slot
+    attempt = functools.partial(_attempt, name, template, model, prompt, deadline, kwargs)
+    _acquire(priority, deadline)
+    delay = _hedge_delay(name, template, deadline)
+    if delay is None:
+        return _holding_slot(priority, attempt)()
+    return _hedged(name, template, priority, deadline, delay, attempt)
+
+
+def generate_shared(key, name, template, model, prompt, priority, deadline=None, **kwargs):
+    """
+    generate(), shared by concurrent callers with the same key (the
+    response cache key). Returns (response, shared). Errors of the shared
+    call reach every waiter, except a DeadlineExceeded of the leader's
+    own budget: a waiter with time left (an analysis job behind an
+    interactive request) makes the call again. A waiter whose own
+    deadline runs out first gets DeadlineExceeded.
+    """
+    call = functools.partial(generate, name, template, model, prompt, priority, deadline, **kwargs)
+    while True:
+        try:
+            return llm_single_flight.do(key, call, timeout=deadline.remaining() if deadline is not None else None)
+        except WaitTimeout:
+            raise DeadlineExceeded() from None
+        except DeadlineExceeded:
+            if deadline is None or deadline.expired:
+                raise
+
+
+def generate_stream(name, template, model, prompt, priority, deadline=None, **kwargs):
+    """Streaming counterpart of generate(); the slot is held until the stream is drained."""
+    llm_breaker.check()
+    _acquire(priority, deadline)
+    started = time.monotonic()
+    try:
+        # A long reply is not a slow dependency, only failures count for streams
+        with llm_breaker.track(measure_latency=False):
+            yield from llm_metrics.stream(name, template, model.generate_content, prompt,
+                                          stream=True, **_with_deadline(deadline, kwargs))
+    except Exception as e:
+        if deadline is not None and deadline.expired:
+            raise DeadlineExceeded() from e
+        raise
+    finally:
+        llm_pool.release(priority, time.monotonic() - started)
+
+
+# -----------------------
+# Async variants (ASGI views in app/asgi.py)
+# -----------------------
+# Same admission, breaker, metrics, hedging and coalescing as above, but a
+# call in flight is a coroutine awaiting the SDK's generate_content_async,
+# not a thread blocked on generate_content.
+async def _acquire_async(priority, deadline):
+    timeout = None
+    if deadline is not None:
+        if deadline.expired:
+            raise DeadlineExceeded()
+        timeout = min(llm_pool.queue_timeout, deadline.remaining())
+    try:
+        await llm_pool.acquire_async(priority, timeout)
+    except LLMPoolFull:
+        if deadline is not None and deadline.expired:
+            raise DeadlineExceeded() from None
+        raise
+
+
+async def _attempt_async(name, template, model, prompt, deadline, kwargs):
+    try:
+        with llm_breaker.track():
+            return await llm_metrics.call_async(name, template, model.generate_content_async, prompt,
+                                                **_with_deadline(deadline, kwargs))
+    except Exception as e:
+        if deadline is not None and deadline.expired:
+            raise DeadlineExceeded() from e
+        raise
+
+
+async def _holding_slot_async(priority, attempt):
+    started = time.monotonic()
+    try:
+        return await attempt()
+    finally:
+        llm_pool.release(priority, time.monotonic() - started)
+
+
+def _detach(task):
+    """Let a task we stop waiting for finish on its own without an unretrieved-exception warning."""
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+async def _hedged_async(name, template, priority, deadline, delay, attempt):
+    """_hedged() with tasks instead of executor threads."""
+    primary = asyncio.ensure_future(_holding_slot_async(priority, attempt))
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done or not llm_pool.try_acquire(priority):
+        tasks = {primary}
+    else:
+        llm_metrics.record_hedge(name, template, "fired")
+        tasks = {primary, asyncio.ensure_future(_holding_slot_async(priority, attempt))}
+    for task in tasks:
+        _detach(task)
+
+    pending, error = tasks, None
+    while pending:
+        done, pending = await asyncio.wait(pending, timeout=deadline.remaining(),
+                                           return_when=asyncio.FIRST_COMPLETED)
+        if not done:
+            raise DeadlineExceeded()
+        for task in done:
+            if task.exception() is None:
+                if task is not primary:
+                    llm_metrics.record_hedge(name, template, "won")
+                return task.result()
+            error = task.exception()
+    raise error
+
+
+async def generate_async(name, template, model, prompt, priority, deadline=None, **kwargs):
+    """generate() for coroutines."""
+    llm_breaker.check()
+    attempt = functools.partial(_attempt_async, name, template, model, prompt, deadline, kwargs)
+    await _acquire_async(priority, deadline)
+    delay = _hedge_delay(name, template, deadline)
+    if delay is None:
+        return await _holding_slot_async(priority, attempt)
+    return await _hedged_async(name, template, priority, deadline, delay, attempt)
+
+
+async def generate_shared_async(key, name, template, model, prompt, priority, deadline=None, **kwargs):
+    """generate_shared() for coroutines; coalesces with other async callers of the same key."""
+    call = functools.partial(generate_async, name, template, model, prompt, priority, deadline, **kwargs)
+    while True:
+        try:
+            return await llm_single_flight.do_async(key, call,
+                                                    timeout=deadline.remaining() if deadline is not None else None)
+        except WaitTimeout:
+            raise DeadlineExceeded() from None
+        except DeadlineExceeded:
+            if deadline is None or deadline.expired:
+                raise
+
+
+async def generate_stream_async(name, template, model, prompt, priority, deadline=None, **kwargs):
+    """generate_stream() for coroutines, an async generator of chunks."""
+    llm_breaker.check()
+    await _acquire_async(priority, deadline)
+    started = time.monotonic()
+    stream = llm_metrics.stream_async(name, template, model.generate_content_async, prompt,
+                                      stream=True, **_with_deadline(deadline, kwargs))
+    try:
+        with llm_breaker.track(measure_latency=False):
+            async for chunk in stream:
+                yield chunk
+    except Exception as e:
+        if deadline is not None and deadline.expired:
+            raise DeadlineExceeded() from e
+        raise
+    finally:
+        await stream.aclose()   # a client that left mid-stream ends the SDK stream now, not at GC
+        llm_pool.release(priority, time.monotonic() - started)
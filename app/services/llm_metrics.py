@@ -0,0 +1,173 @@
+import time
+
+from app.services.response_cache import template_version
+
+# Generation latency buckets in seconds; LLM calls are slower than requests
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 12.0, 20.0, 30.0, 60.0)
+
+
+def _usage(response):
+    """(prompt tokens, response tokens) from the SDK's usage_metadata, zeros when absent."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return 0, 0
+    return getattr(usage, "prompt_token_count", 0) or 0, getattr(usage, "candidates_token_count", 0) or 0
+
+
+class LLMMetrics:
+    """
+    Instrumentation for model calls, labelled by prompt template.
+
+    Each template is reported as `template` (the cache namespace) plus
+    `template_version` (hash of the prompt text), so a prompt edit shows up
+    as a new series. Every answer a service gives is counted by source:
+    "model", "cache", "coalesced" (shared another request's in-flight
+    call) or "fallback" (mock/canned text).
+    """
+
+    def __init__(self, registry):
+        labels = ("template", "template_version")
+        self.duration = registry.histogram(
+            "llm_call_duration_seconds", "Model call wall time (excludes pool queueing)",
+            labels + ("mode",), LLM_BUCKETS)
+        self.first_chunk = registry.histogram(
+            "llm_stream_first_chunk_seconds", "Time to the first streamed chunk", labels, LLM_BUCKETS)
+        self.calls = registry.counter("llm_calls_total", "Model calls by outcome", labels + ("outcome",))
+        self.errors = registry.counter("llm_errors_total", "Failed model calls by exception class", labels + ("error",))
+        self.tokens = registry.counter("llm_tokens_total", "Tokens reported by usage_metadata", labels + ("kind",))
+        self.responses = registry.counter("llm_responses_total", "Answers by source", labels + ("source",))
+        self.fallbacks = registry.counter("llm_fallbacks_total", "Answers not produced by the model, by reason",
+                                          labels + ("reason",))
+        self.hedges = registry.counter("llm_hedged_calls_total", "Hedged second attempts fired / won",
+                                       labels + ("result",))
+        self._templates = {}   # name -> version
+
+    def _labels(self, name, template):
+        version = self._templates.get(name)
+        if version is None:
+            version = self._templates[name] = template_version(template)
+        return {"template": name, "template_version": version}
+
+    def _record_usage(self, labels, response):
+        prompt_tokens, response_tokens = _usage(response)
+        if prompt_tokens:
+            self.tokens.inc(prompt_tokens, kind="prompt", **labels)
+        if response_tokens:
+            self.tokens.inc(response_tokens, kind="response", **labels)
+
+    def call(self, name, template, fn, *args, **kwargs):
+        """fn(*args, **kwargs), timed and counted; exceptions are recorded and re-raised."""
+        labels = self._labels(name, template)
+        started = time.perf_counter()
+        try:
+            response = fn(*args, **kwargs)
+        except Exception as e:
+            self.calls.inc(outcome="error", **labels)
+            self.errors.inc(error=type(e).__name__, **labels)
+            raise
+        finally:
+            self.duration.observe(time.perf_counter() - started, mode="blocking", **labels)
+        self.calls.inc(outcome="ok", **labels)
+        self._record_usage(labels, response)
+        return response
+
+    def stream(self, name, template, fn, *args, **kwargs):
+        """Iterates fn(*args, **kwargs)'s streamed response, recording first-chunk and total time."""
+        labels = self._labels(name, template)
+        started = time.perf_counter()
+        last = None
+        outcome = "cancelled"   # generator closed early, e.g. client went away
+        try:
+            for chunk in fn(*args, **kwargs):
+                if last is None:
+                    self.first_chunk.observe(time.perf_counter() - started, **labels)
+                last = chunk
+                yield chunk
+            outcome = "ok"
+        except Exception as e:
+            outcome = "error"
+            self.errors.inc(error=type(e).__name__, **labels)
+            raise
+        finally:
+            self.duration.observe(time.perf_counter() - started, mode="stream", **labels)
+            self.calls.inc(outcome=outcome, **labels)
+            if last is not None:
+                self._record_usage(labels, last)   # the final chunk carries the totals
+
+    async def call_async(self, name, template, fn, *args, **kwargs):
+        """call() for coroutine functions such as the SDK's generate_content_async."""
+        labels = self._labels(name, template)
+        started = time.perf_counter()
+        try:
+            response = await fn(*args, **kwargs)
+        except Exception as e:
+            self.calls.inc(outcome="error", **labels)
+            self.errors.inc(error=type(e).__name__, **labels)
+            raise
+        finally:
+            self.duration.observe(time.perf_counter() - started, mode="blocking", **labels)
+        self.calls.inc(outcome="ok", **labels)
+        self._record_usage(labels, response)
+        return response
+
+    async def stream_async(self, name, template, fn, *args, **kwargs):
+        """stream() for the async SDK: `await fn(...)` gives a response iterated with `async for`."""
+        labels = self._labels(name, template)
+        started = time.perf_counter()
+        last = None
+        outcome = "cancelled"
+        try:
+            async for chunk in await fn(*args, **kwargs):
+                if last is None:
+                    self.first_chunk.observe(time.perf_counter() - started, **labels)
+                last = chunk
+                yield chunk
+            outcome = "ok"
+        except Exception as e:
+            outcome = "error"
+            self.errors.inc(error=type(e).__name__, **labels)
+            raise
+        finally:
+            self.duration.observe(time.perf_counter() - started, mode="stream", **labels)
+            self.calls.inc(outcome=outcome, **labels)
+            if last is not None:
+                self._record_usage(labels, last)
+
+    def record_response(self, name, template, source, reason=None):
+        labels = self._labels(name, template)
+        self.responses.inc(source=source, **labels)
+        if source == "fallback":
+            self.fallbacks.inc(reason=reason or "error", **labels)
+
+    def record_hedge(self, name, template, result):
+        self.hedges.inc(result=result, **self._labels(name, template))
+
+    def latency_quantile(self, name, template, q, min_samples=20):
+        """Estimated q-quantile of blocking call time; None until min_samples calls were seen."""
+        labels = self._labels(name, template)
+        snap = self.duration.snapshot(mode="blocking", **labels)
+        if snap is None or sum(snap[0]) < min_samples:
+            return None
+        return self.duration.quantile(q, mode="blocking", **labels)
+
+    def stats(self):
+        """Per-template summary for /health."""
+        summary = {}
+        for name, version in list(self._templates.items()):
+            labels = {"template": name, "template_version": version}
+            answers = {s: self.responses.value(source=s, **labels) for s in ("model", "cache", "coalesced", "fallback")}
+            total = sum(answers.values())
+            snap = self.duration.snapshot(mode="blocking", **labels)
+            p95 = self.duration.quantile(0.95, mode="blocking", **labels)
+            summary[name] = {
+                "template_version": version,
+                "calls": sum(self.calls.value(outcome=o, **labels) for o in ("ok", "error", "cancelled")),
+                "errors": self.calls.value(outcome="error", **labels),
+                "answers": answers,
+                "fallback_rate": round(answers["fallback"] / total, 4) if total else 0.0,
+                "avg_latency_s": round(snap[1] / sum(snap[0]), 3) if snap else None,
+                "p95_latency_s": round(p95, 3) if p95 is not None else None,
+                "prompt_tokens": self.tokens.value(kind="prompt", **labels),
+                "response_tokens": self.tokens.value(kind="response", **labels),
+            }
+        return summary
@@ -0,0 +1,216 @@
+import asyncio
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Lower number = served first
+PRIORITY_EMERGENCY = 0
+PRIORITY_ROUTINE = 1
+
+
+class LLMPoolFull(Exception):
+    """Raised when a call cannot be admitted; retry_after is a hint in seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"LLM pool saturated, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("priority", "event", "granted", "cancelled")
+
+    def __init__(self, priority, event=None):
+        self.priority = priority
+        self.event = event or threading.Event()
+        self.granted = False
+        self.cancelled = False
+
+
+class _LoopEvent:
+    """Event.set() that wakes a coroutine; _dispatch may run on any thread."""
+
+    __slots__ = ("loop", "future")
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.future = self.loop.create_future()
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+    def set(self):
+        self.loop.call_soon_threadsafe(self._resolve)
+
+
+class LLMPool:
+    """
+    Admission control for outbound model calls.
+
+    At most `max_concurrency` calls run at once. Extra callers wait in a
+    per-priority bounded queue and are woken highest priority first; when
+    their queue is full they are rejected immediately with LLMPoolFull.
+    `emergency_reserved` slots can only be used by emergency calls, so a
+    burst of routine symptom checks never holds every slot.
+    """
+
+    def __init__(self):
+        self.max_concurrency = 8
+        self.emergency_reserved = 2
+        self.queue_limits = {PRIORITY_EMERGENCY: 32, PRIORITY_ROUTINE: 16}
+        self.queue_timeout = 10.0
+        self._lock = threading.Lock()
+        self._heap = []
+        self._seq = itertools.count()
+        self._active = {PRIORITY_EMERGENCY: 0, PRIORITY_ROUTINE: 0}
+        self._waiting = {PRIORITY_EMERGENCY: 0, PRIORITY_ROUTINE: 0}
+        self._avg_hold = 2.0   # EWMA of seconds a slot is held, drives Retry-After
+        self._stats = {"admitted": 0, "queued": 0, "rejected": 0, "timed_out": 0}
+
+    def init_app(self, app):
+        self.max_concurrency = app.config.get("LLM_MAX_CONCURRENCY", self.max_concurrency)
+        self.emergency_reserved = min(
+            app.config.get("LLM_EMERGENCY_RESERVED", self.emergency_reserved),
+            self.max_concurrency - 1,
+        )
+        self.queue_limits = {
+            PRIORITY_EMERGENCY: app.config.get("LLM_EMERGENCY_QUEUE_SIZE", 32),
+            PRIORITY_ROUTINE: app.config.get("LLM_QUEUE_SIZE", 16),
+        }
+        self.queue_timeout = app.config.get("LLM_QUEUE_TIMEOUT", self.queue_timeout)
+
+    # -----------------------
+    # Slot bookkeeping (lock held)
+    # -----------------------
+    def _can_run(self, priority):
+        total = sum(self._active.values())
+        if total >= self.max_concurrency:
+            return False
+        if priority == PRIORITY_EMERGENCY:
+            return True
+        return self._active[PRIORITY_ROUTINE] < self.max_concurrency - self.emergency_reserved
+
+    def _has_waiters_ahead(self, priority):
+        return any(self._waiting[p] for p in self._waiting if p <= priority)
+
+    def _retry_after(self):
+        backlog = sum(self._waiting.values()) + sum(self._active.values())
+        return max(1, math.ceil(self._avg_hold * backlog / self.max_concurrency))
+
+    def _dispatch(self):
+        while self._heap:
+            _, _, waiter = self._heap[0]
+            if waiter.cancelled:
+                heapq.heappop(self._heap)
+                continue
+            if not self._can_run(waiter.priority):
+                return
+            heapq.heappop(self._heap)
+            self._waiting[waiter.priority] -= 1
+            self._active[waiter.priority] += 1
+            waiter.granted = True
+            waiter.event.set()
+
+    # -----------------------
+    # Queueing (takes the lock)
+    # -----------------------
+    def _enqueue(self, priority, event=None):
+        """Take a free slot (None) or queue a waiter (returned); LLMPoolFull when the queue is full."""
+        with self._lock:
+            if self._can_run(priority) and not self._has_waiters_ahead(priority):
+                self._active[priority] += 1
+                self._stats["admitted"] += 1
+                return None
+            if self._waiting[priority] >= self.queue_limits[priority]:
+                self._stats["rejected"] += 1
+                raise LLMPoolFull(self._retry_after())
+            waiter = _Waiter(priority, event)
+            heapq.heappush(self._heap, (priority, next(self._seq), waiter))
+            self._waiting[priority] += 1
+            self._stats["queued"] += 1
+            return waiter
+
+    def _settle(self, waiter):
+        """After the wait: keep the slot if it was granted meanwhile, else leave the queue."""
+        with self._lock:
+            if waiter.granted:
+                self._stats["admitted"] += 1
+                return
+            waiter.cancelled = True
+            self._waiting[waiter.priority] -= 1
+            self._stats["timed_out"] += 1
+            raise LLMPoolFull(self._retry_after())
+
+    # -----------------------
+    # Public API
+    # -----------------------
+    def acquire(self, priority=PRIORITY_ROUTINE, timeout=None):
+        timeout = self.queue_timeout if timeout is None else timeout
+        waiter = self._enqueue(priority)
+        if waiter is not None:
+            waiter.event.wait(timeout)
+            self._settle(waiter)
+
+    async def acquire_async(self, priority=PRIORITY_ROUTINE, timeout=None):
+        """acquire() for coroutines: queued callers wait on the event loop, not on a thread."""
+        timeout = self.queue_timeout if timeout is None else timeout
+        waiter = self._enqueue(priority, _LoopEvent())
+        if waiter is None:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.event.future), timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    waiter.cancelled = True
+                    self._waiting[priority] -= 1
+            if granted:
+                self.release(priority)   # the slot arrived as the caller went away: hand it on
+            raise
+        self._settle(waiter)
+
+    def try_acquire(self, priority=PRIORITY_ROUTINE) -> bool:
+        """Take a free slot without queueing; used for optional extra work such as hedged calls."""
+        with self._lock:
+            if self._can_run(priority) and not self._has_waiters_ahead(priority):
+                self._active[priority] += 1
+                self._stats["admitted"] += 1
+                return True
+            return False
+
+    def release(self, priority=PRIORITY_ROUTINE, held_for=None):
+        with self._lock:
+            self._active[priority] -= 1
+            if held_for is not None:
+                self._avg_hold = 0.8 * self._avg_hold + 0.2 * held_for
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, priority=PRIORITY_ROUTINE, timeout=None):
+        """Hold one concurrency slot for the duration of the block (including streaming)."""
+        self.acquire(priority, timeout)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(priority, time.monotonic() - started)
+
+    def call(self, fn, *args, priority=PRIORITY_ROUTINE, **kwargs):
+        with self.slot(priority):
+            return fn(*args, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                "active": sum(self._active.values()),
+                "waiting": sum(self._waiting.values()),
+                "max_concurrency": self.max_concurrency,
+            }
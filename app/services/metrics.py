@@ -0,0 +1,156 @@
+import bisect
+import threading
+
+# Request latency buckets in seconds (Prometheus convention)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    value = float(value)
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels[n] for n in self.labelnames), 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, rendered in Prometheus text format."""
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}   # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def snapshot(self, **labels):
+        """(per-bucket counts incl. +Inf, sum) for one label set, or None."""
+        with self._lock:
+            series = self._series.get(tuple(labels[n] for n in self.labelnames))
+            return (series[:-1], series[-1]) if series else None
+
+    def quantile(self, q, **labels):
+        """Estimate of the q-quantile by interpolating inside its bucket; None without samples."""
+        snap = self.snapshot(**labels)
+        if snap is None:
+            return None
+        counts = snap[0]
+        total = sum(counts)
+        rank = q * total
+        lower, seen = 0.0, 0
+        for bound, count in zip(self.buckets, counts):
+            if count and seen + count >= rank:
+                return lower + (bound - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        return self.buckets[-1]   # in the +Inf bucket: report the largest finite bound
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_number(round(series[-1], 6))}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Metrics:
+    """
+    Per-process metric registry.
+
+    Counters and histograms are updated in place. Values kept elsewhere
+    are read at scrape time from collector callbacks returning
+    {(name, help): value} for gauges and {(name, help, "counter"): value}
+    for running totals, so existing stats() methods are exported without
+    a second copy of the numbers.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(name, lambda: Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(name, lambda: Histogram(name, help_text, labelnames, buckets))
+
+    def _register(self, name, factory):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            return metric
+
+    def add_collector(self, fn):
+        with self._lock:
+            if fn not in self._collectors:
+                self._collectors.append(fn)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for fn in collectors:
+            for (name, help_text, *kind), value in fn().items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind[0] if kind else 'gauge'}")
+                lines.append(f"{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
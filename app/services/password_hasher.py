@@ -0,0 +1,104 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when no hashing slot frees up in time; retry_after is a hint in seconds."""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__("Password hashing pool saturated")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """
+    Runs werkzeug's deliberately slow KDF in a small process pool so login
+    and register bursts cannot take CPU time from request threads.
+
+    At most `max_pending` hash/verify jobs are queued or running; further
+    callers wait up to `wait_timeout` seconds and then get
+    PasswordHasherBusy. With `workers=0` hashing runs inline.
+    """
+
+    def __init__(self):
+        self.method = "scrypt:32768:8:1"
+        self.workers = 2
+        self.max_pending = 8
+        self.wait_timeout = 5.0
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._pool = None
+        self._pool_pid = None
+        self._pool_lock = threading.Lock()
+        self._method_prefix = None
+
+    def init_app(self, app):
+        self.method = app.config.get("PASSWORD_HASH_METHOD", self.method)
+        self.workers = app.config.get("PASSWORD_HASH_WORKERS", self.workers)
+        self.max_pending = max(1, app.config.get("PASSWORD_HASH_MAX_PENDING", self.max_pending))
+        self.wait_timeout = app.config.get("PASSWORD_HASH_TIMEOUT", self.wait_timeout)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._method_prefix = None
+        self.shutdown()
+
+    def _executor(self):
+        # Pools do not survive fork; a worker process builds its own on first use
+        if self._pool is None or self._pool_pid != os.getpid():
+            with self._pool_lock:
+                if self._pool is None or self._pool_pid != os.getpid():
+                    # Not plain fork: this process runs request and log threads whose locks a forked child could inherit held
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=_pool_context())
+                    self._pool_pid = os.getpid()
+        return self._pool
+
+    def _discard(self, pool):
+        # A child died (OOM kill, crash): the executor is broken for good, the next call builds a new one
+        with self._pool_lock:
+            if self._pool is pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+                self._pool_pid = None
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self._pool_pid = None
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            raise PasswordHasherBusy()
+        try:
+            pool = self._executor()
+            try:
+                return pool.submit(fn, *args).result()
+            except BrokenProcessPool:
+                self._discard(pool)
+                return self._executor().submit(fn, *args).result()   # once; a second failure is a real error
+        finally:
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """True when the stored hash was made with other parameters than PASSWORD_HASH_METHOD."""
+        if self._method_prefix is None:
+            # "scrypt" expands to "scrypt:32768:8:1", so compare against a real hash's prefix (made in the pool)
+            self._method_prefix = self.hash("").split("$", 1)[0]
+        return password_hash.split("$", 1)[0] != self._method_prefix
+
+
+def _pool_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
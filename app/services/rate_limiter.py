@@ -0,0 +1,295 @@
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:   # Windows: no flock, limits fall back to per-process buckets
+    fcntl = None
+
+_PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0, "day": 86400.0}
+
+_HEADER = struct.Struct("<8sI")   # magic, slot count
+_SLOT = struct.Struct("<Qd")   # key hash, theoretical arrival time (unix seconds)
+_MAGIC = b"NNRATE01"
+_PROBES = 8
+
+
+class RateLimited(Exception):
+    """A token bucket is empty; retry_after is in seconds."""
+
+    def __init__(self, retry_after: float, limit: str, scope: str):
+        super().__init__(f"Rate limit {limit}/{scope} exceeded, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+        self.limit = limit
+        self.scope = scope
+
+
+def parse_rate(text):
+    """"10/minute" -> (interval between tokens, burst); None for "" or "0/..." (no limit)."""
+    if not text:
+        return None
+    count, _, period = text.partition("/")
+    count = int(count)
+    if count <= 0:
+        return None
+    return _PERIODS[period.strip().rstrip("s") or "second"] / count, count
+
+
+def _key(text):
+    # 64-bit key hash; 0 marks an empty slot, so it is never produced
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little") | 1
+
+
+# -----------------------
+# Bucket stores
+# -----------------------
+class _GCRA:
+    """
+    Token buckets in GCRA form: a bucket is one timestamp, the time at
+    which it would be full again minus one interval ("theoretical arrival
+    time"). Taking a token moves it one interval forward; the bucket is
+    empty when it is more than (burst - 1) intervals ahead of now.
+    """
+
+    def take(self, buckets, now):
+        """
+        buckets: [(key, interval, burst)]. Takes one token from each, or from
+        none: returns (0, None), or (seconds to wait, index of the emptiest bucket).
+        """
+        self._acquire()
+        try:
+            slots, wait, empty = [], 0.0, None
+            for index, (key, interval, burst) in enumerate(buckets):
+                slot, tat = self._find(key, now)
+                tolerance = interval * (burst - 1)
+                if tat > now + tolerance + interval:
+                    tat = now   # clock went backwards (or a stale file): forget the bucket
+                tat = max(tat, now)
+                if tat - now - tolerance > wait:
+                    wait, empty = tat - now - tolerance, index
+                slots.append((slot, key, tat + interval))
+            if wait:
+                return wait, empty
+            for slot, key, tat in slots:
+                self._store(slot, key, tat)
+            return 0.0, None
+        finally:
+            self._release()
+
+
+class MemoryBuckets(_GCRA):
+    """Buckets of this process only: limits multiply by the number of workers."""
+
+    name = "memory"
+
+    def __init__(self, max_entries=65536):
+        self.max_entries = max_entries
+        self._tats = {}
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        self._lock.acquire()
+
+    def _release(self):
+        self._lock.release()
+
+    def _find(self, key, now):
+        return key, self._tats.get(key, 0.0)
+
+    def _store(self, slot, key, tat):
+        if len(self._tats) >= self.max_entries and key not in self._tats:
+            now = time.time()
+            self._tats = {k: t for k, t in self._tats.items() if t > now}   # full buckets carry no state
+        self._tats[key] = tat
+
+
+class SharedBuckets(_GCRA):
+    """
+    Buckets in a memory-mapped file shared by every worker on the host.
+
+    The file is a fixed open-addressing table of (key hash, timestamp)
+    slots. A check takes a thread lock and an flock on the file, probes a
+    few slots and writes one back: a handful of microseconds, no
+    syscalls besides the two flock calls. A slot whose bucket has refilled
+    carries no state and is reused; when every probed slot is live, the
+    one closest to refilled is taken over.
+    """
+
+    name = "shared"
+
+    def __init__(self, path, slots=65536):
+        self.path = path
+        self.slots = slots
+        self._lock = threading.Lock()
+        self._pid = None
+        self._fd = None
+        self._map = None
+
+    def _open(self):
+        # Per process: an flock taken through a descriptor inherited across fork would not exclude the parent
+        size = _HEADER.size + self.slots * _SLOT.size
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            header = os.pread(fd, _HEADER.size, 0)
+            if os.fstat(fd).st_size != size or header != _HEADER.pack(_MAGIC, self.slots):
+                os.ftruncate(fd, 0)   # new file or another table size: start empty
+                os.ftruncate(fd, size)
+                os.pwrite(fd, _HEADER.pack(_MAGIC, self.slots), 0)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        self._fd, self._map, self._pid = fd, mmap.mmap(fd, size), os.getpid()
+
+    def _acquire(self):
+        self._lock.acquire()
+        try:
+            if self._pid != os.getpid():
+                self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        except BaseException:
+            self._lock.release()
+            raise
+
+    def _release(self):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._lock.release()
+
+    def _find(self, key, now):
+        start = key % self.slots
+        free, oldest, oldest_tat = None, None, None
+        for probe in range(_PROBES):
+            slot = (start + probe) % self.slots
+            stored, tat = _SLOT.unpack_from(self._map, _HEADER.size + slot * _SLOT.size)
+            if stored == key:
+                return slot, tat
+            if free is None and (stored == 0 or tat <= now):
+                free = slot
+            if oldest_tat is None or tat < oldest_tat:
+                oldest, oldest_tat = slot, tat
+        return (free if free is not None else oldest), 0.0
+
+    def _store(self, slot, key, tat):
+        _SLOT.pack_into(self._map, _HEADER.size + slot * _SLOT.size, key, tat)
+
+
+# -----------------------
+# Limiter
+# -----------------------
+class RateLimiter:
+    """
+    Token-bucket limits per limit name (one per group of endpoints), with
+    separate buckets per user id (from the JWT) and per client IP.
+
+    A request takes a token from its IP bucket and, when it carries a
+    valid token, from its user bucket; it is refused if either is empty.
+    Buckets live in SharedBuckets when a path is configured, so the limits
+    hold across all worker processes on the host.
+    """
+
+    def __init__(self, registry):
+        self.enabled = True
+        self.limits = {}   # name -> {"user": (interval, burst), "ip": (interval, burst)}
+        self.trusted_proxies = 0
+        self.store = MemoryBuckets()
+        self.limited = registry.counter(
+            "rate_limited_total", "Requests refused by a rate limit", ("limit", "scope"))
+        self._subjects = {}   # raw JWT -> (user id, expires at); decoding a token costs more than the check
+        self._lock = threading.Lock()
+        self._stats = {"checked": 0, "limited": 0}
+
+    def init_app(self, app):
+        self.enabled = app.config.get("RATE_LIMIT_ENABLED", self.enabled)
+        self.trusted_proxies = app.config.get("RATE_LIMIT_TRUSTED_PROXIES", self.trusted_proxies)
+        self.limits = {}
+        for name in ("symptoms", "emergency", "login"):
+            upper = name.upper()
+            self.limits[name] = {
+                "user": parse_rate(app.config.get(f"RATE_LIMIT_{upper}_USER")),
+                "ip": parse_rate(app.config.get(f"RATE_LIMIT_{upper}_IP")),
+            }
+        path = app.config.get("RATE_LIMIT_PATH")
+        if path and fcntl is not None:
+            self.store = SharedBuckets(path, app.config.get("RATE_LIMIT_SLOTS", 65536))
+        else:
+            self.store = MemoryBuckets()
+        self._subjects.clear()
+
+    # -----------------------
+    # Identity
+    # -----------------------
+    def identify(self, authorization, remote_addr, forwarded_for=None):
+        """(user id or None, client IP) of a request, from its headers and peer address."""
+        return self.user_id(authorization), self.client_ip(remote_addr, forwarded_for)
+
+    def client_ip(self, remote_addr, forwarded_for=None):
+        """Client address; with N trusted proxies in front, the Nth X-Forwarded-For entry from the right."""
+        if self.trusted_proxies and forwarded_for:
+            hops = [part.strip() for part in forwarded_for.split(",")]
+            if len(hops) >= self.trusted_proxies:
+                return hops[-self.trusted_proxies]
+        return remote_addr or "-"
+
+    def user_id(self, authorization):
+        """User id of a valid Bearer token, None without one (or with an invalid one: the IP limit still applies)."""
+        if not authorization or not authorization.startswith("Bearer "):
+            return None
+        token = authorization[7:]
+        now = time.time()
+        cached = self._subjects.get(token)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+        from flask_jwt_extended import decode_token
+
+        try:
+            claims = decode_token(token)
+        except Exception:
+            return None
+        subject = (str(claims["sub"]), claims.get("exp", now + 60))
+        with self._lock:
+            if len(self._subjects) >= 4096:
+                self._subjects.clear()
+            self._subjects[token] = subject
+        return subject[0]
+
+    # -----------------------
+    # Checks
+    # -----------------------
+    def check(self, name, user_id=None, ip=None):
+        """Take a token for this request from each applicable bucket, or raise RateLimited."""
+        if not self.enabled:
+            return
+        limits = self.limits.get(name)
+        if not limits:
+            return
+        buckets, scopes = [], []
+        if user_id is not None and limits["user"]:
+            buckets.append((_key(f"{name}:u:{user_id}"), *limits["user"]))
+            scopes.append("user")
+        if ip is not None and limits["ip"]:
+            buckets.append((_key(f"{name}:ip:{ip}"), *limits["ip"]))
+            scopes.append("ip")
+        if not buckets:
+            return
+        wait, empty = self.store.take(buckets, time.time())
+        with self._lock:
+            self._stats["checked"] += 1
+            if wait:
+                self._stats["limited"] += 1
+        if wait:
+            self.limited.inc(limit=name, scope=scopes[empty])
+            raise RateLimited(wait, name, scopes[empty])
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["backend"] = self.store.name
+        return stats
+
+
+def retry_after_header(seconds):
+    return str(max(1, math.ceil(seconds)))
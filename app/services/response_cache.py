@@ -0,0 +1,278 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+# -----------------------
+# Key helpers
+# -----------------------
+_PUNCTUATION = re.compile(r"(?<!\d)[^\w\s]+|[^\w\s]+(?!\d)", re.UNICODE)   # kept between digits: 39.5, 3-4, 120/80
+_SPACES = re.compile(r"\s+", re.UNICODE)
+# Complaints written as one word or two: "head ache" -> "headache"
+_COMPOUNDS = {"ache": ("head", "back", "ear", "tooth", "stomach", "tummy", "belly"), "burn": ("heart",)}
+_SPLIT_COMPOUND = re.compile("|".join(
+    rf"\b({'|'.join(firsts)}) (?={second}s?\b)" for second, firsts in _COMPOUNDS.items()
+))
+
+
+def normalize_prompt(text: str) -> str:
+    """
+    Collapse case, whitespace, punctuation and split compounds, so "Headache!",
+    "head  ache" and "head-ache" share a key; "39.5" stays apart from "395".
+    """
+    text = _PUNCTUATION.sub(" ", (text or "").casefold())
+    text = _SPACES.sub(" ", text).strip()
+    return _SPLIT_COMPOUND.sub(lambda m: m.group(m.lastindex), text)
+
+
+def template_version(template: str) -> str:
+    """Short stable hash of a prompt template; editing the template changes it."""
+    return hashlib.sha256(template.encode("utf-8")).hexdigest()[:12]
+
+
+def make_key(namespace: str, template: str, text: str) -> str:
+    raw = f"{namespace}:{template_version(template)}:{normalize_prompt(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# -----------------------
+# Tier 1: in-process LRU with TTL
+# -----------------------
+class MemoryTier:
+    def __init__(self, max_entries=512, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# -----------------------
+# Tier 2: persistent SQLite store
+# -----------------------
+class SQLiteTier:
+    """
+    Hits only read: their access times are buffered and written in one
+    batch, and the size bound is enforced every `evict_every` stores
+    rather than by counting the table on each one (so it may be exceeded
+    by that many rows in between).
+    """
+
+    touch_batch = 128   # buffered access times written together
+    touch_interval = 30.0   # ... or after this many seconds
+    evict_every = 256
+
+    def __init__(self, path, max_entries=10000, ttl=86400):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._touched = {}   # key -> last access time not yet written
+        self._touched_at = time.monotonic()
+        self._stores = 0
+        self._pid = None
+        self._conn = None
+        self._inherited = None
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            " key TEXT PRIMARY KEY,"
+            " namespace TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._connection().execute(
+            "CREATE INDEX IF NOT EXISTS ix_response_cache_accessed_at"
+            " ON response_cache (accessed_at)"
+        )
+        self.purge_expired()
+
+    def _connection(self):
+        # Per process: a connection inherited across fork must not be used by both sides
+        if self._pid != os.getpid():
+            self._inherited = self._conn   # kept unclosed: closing it here could checkpoint the parent's WAL
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT value, created_at FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] + self.ttl < now:
+                conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                self._touched.pop(key, None)
+                return None
+            self._touched[key] = now
+            if len(self._touched) >= self.touch_batch or time.monotonic() - self._touched_at > self.touch_interval:
+                self._flush_touched(conn)
+            return row[0]
+
+    def _flush_touched(self, conn):
+        # Caller holds the lock
+        if self._touched:
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(
+                    "UPDATE response_cache SET accessed_at = ? WHERE key = ?",
+                    [(at, key) for key, at in self._touched.items()],
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self._touched = {}
+        self._touched_at = time.monotonic()
+
+    def set(self, key, namespace, value):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO response_cache"
+                " (key, namespace, value, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, namespace, value, now, now),
+            )
+            self._touched.pop(key, None)
+            self._stores += 1
+            if self._stores % self.evict_every == 0:
+                self._evict(conn)
+
+    def _evict(self, conn):
+        # Caller holds the lock; drop the least recently used rows beyond the bound
+        self._flush_touched(conn)
+        count = conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM response_cache WHERE key IN ("
+                " SELECT key FROM response_cache ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def purge_expired(self):
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "DELETE FROM response_cache WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM response_cache")
+            self._touched = {}
+
+
+# -----------------------
+# Two-tier facade
+# -----------------------
+class ResponseCache:
+    """
+    Memory LRU in front of a SQLite store, keyed by
+    (namespace, prompt template version, normalized user text).
+    """
+
+    def __init__(self):
+        self.memory = None
+        self.persistent = None
+        self.enabled = False
+        self._stats_lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "persistent_hits": 0, "misses": 0, "stores": 0}
+
+    def init_app(self, app):
+        self.enabled = app.config.get("RESPONSE_CACHE_ENABLED", True)
+        self.memory = MemoryTier(
+            max_entries=app.config.get("RESPONSE_CACHE_SIZE", 512),
+            ttl=app.config.get("RESPONSE_CACHE_TTL", 300),
+        )
+        path = app.config.get("RESPONSE_CACHE_PATH")
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.persistent = SQLiteTier(
+                path,
+                max_entries=app.config.get("RESPONSE_CACHE_PERSISTENT_SIZE", 10000),
+                ttl=app.config.get("RESPONSE_CACHE_PERSISTENT_TTL", 86400),
+            )
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def get(self, namespace, template, text):
+        if not self.enabled or self.memory is None:
+            return None
+        key = make_key(namespace, template, text)
+
+        value = self.memory.get(key)
+        if value is not None:
+            self._count("memory_hits")
+            return value
+
+        if self.persistent is not None:
+            value = self.persistent.get(key)
+            if value is not None:
+                self.memory.set(key, value)   # promote to tier 1
+                self._count("persistent_hits")
+                return value
+
+        self._count("misses")
+        return None
+
+    def set(self, namespace, template, text, value):
+        if not self.enabled or self.memory is None or not value:
+            return
+        key = make_key(namespace, template, text)
+        self.memory.set(key, value)
+        if self.persistent is not None:
+            self.persistent.set(key, namespace, value)
+        self._count("stores")
+
+    def clear(self):
+        if self.memory is not None:
+            self.memory.clear()
+        if self.persistent is not None:
+            self.persistent.clear()
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["memory_hits"] + stats["persistent_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        stats["memory_entries"] = len(self.memory) if self.memory is not None else 0
+        return stats
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+
+
+class WaitTimeout(Exception):
+    """A follower gave up waiting for the shared call."""
+
+
+class _Call:
+    __slots__ = ("done", "value", "error", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The first caller (leader) runs fn; callers arriving while it is in
+    flight wait for it and receive the same result, or the same exception
+    if it failed. Nothing is remembered once the call finishes; caching
+    finished results is the response cache's job.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._tasks = {}   # do_async: key -> asyncio.Task
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "followers": 0}
+
+    def do(self, key, fn, timeout=None):
+        """(fn() or the in-flight result for key, shared); WaitTimeout if a follower waits > timeout."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self._stats["leaders"] += 1
+                leader = True
+            else:
+                call.followers += 1
+                self._stats["followers"] += 1
+                leader = False
+
+        if leader:
+            try:
+                call.value = fn()
+                return call.value, False
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if not call.done.wait(timeout):
+            raise WaitTimeout()
+        if call.error is not None:
+            raise call.error
+        return call.value, True
+
+    async def do_async(self, key, fn, timeout=None):
+        """
+        do() for coroutine functions. The call runs as its own task, so a
+        caller that goes away (cancelled request) does not cancel it for
+        the others. Coalesces with other do_async callers only.
+        """
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is None:
+                task = self._tasks[key] = asyncio.ensure_future(fn())
+                task.add_done_callback(lambda t: self._forget(key, t))
+                self._stats["leaders"] += 1
+                leader = True
+            else:
+                self._stats["followers"] += 1
+                leader = False
+
+        if leader:
+            return await asyncio.shield(task), False
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout), True
+        except asyncio.TimeoutError:
+            raise WaitTimeout() from None
+
+    def _forget(self, key, task):
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+        if not task.cancelled():
+            task.exception()   # retrieved here, waiters that left early would not
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, "in_flight": len(self._calls) + len(self._tasks)}
@@ -0,0 +1,145 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+# Fields that may carry patient data or credentials are never written out
+REDACTED_FIELDS = frozenset({
+    "symptoms", "symptom_text", "message", "prompt", "reply", "text",
+    "password", "password_hash", "email", "contact", "address",
+    "authorization", "token",
+})
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_PHONE_RE = re.compile(r"\+?\d[\d -]{7,}\d")
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def redact(value):
+    """Mask e-mail addresses and phone numbers in free text."""
+    if not isinstance(value, str):
+        return value
+    return _PHONE_RE.sub("[phone]", _EMAIL_RE.sub("[email]", value))
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, event and the record's extra fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": redact(record.getMessage()),
+        }
+        for key, value in vars(record).items():
+            if key in _RECORD_ATTRS or key.startswith("_"):
+                continue
+            entry[key] = "[redacted]" if key.lower() in REDACTED_FIELDS else redact(value)
+        if record.exc_info:
+            entry["exc"] = redact(self.formatException(record.exc_info))
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a `rate` fraction of records below WARNING; warnings and errors always pass."""
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or self.rate >= 1.0 or random.random() < self.rate
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """
+    Hands records to a background thread; when the queue is full the record
+    is dropped and counted instead of blocking the request thread.
+    """
+
+    def __init__(self, target, max_queue):
+        self._target = target
+        self._max_queue = max_queue
+        self._pid = None
+        self._listener = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+        super().__init__(queue.Queue(max_queue))
+
+    def _ensure_listener(self):
+        # The listener thread does not survive fork; each worker starts its own
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self.queue = queue.Queue(self._max_queue)
+                self._listener = QueueListener(self.queue, self._target, respect_handler_level=True)
+                self._listener.start()
+                self._pid = os.getpid()
+
+    def prepare(self, record):
+        # Formatting (and redaction) happens on the listener thread
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        with self._lock:
+            if self._listener is not None and self._pid == os.getpid():
+                self._listener.stop()   # drains what is already queued
+            self._listener = None
+            self._pid = None
+
+
+class StructuredLog:
+    """
+    Non-blocking JSON logging for the `app` logger tree.
+
+    Modules log with `logging.getLogger(__name__)` and pass fields through
+    `extra=`; this installs one queue handler on the `app` logger so the
+    request thread only pays for a queue put.
+    """
+
+    def __init__(self):
+        self.handler = None
+        self.sample_rate = 1.0
+        self.slow_ms = 1000.0
+        atexit.register(self.shutdown)   # flush queued records on interpreter exit
+
+    def init_app(self, app):
+        self.sample_rate = app.config.get("LOG_SAMPLE_RATE", self.sample_rate)
+        self.slow_ms = app.config.get("LOG_SLOW_REQUEST_MS", self.slow_ms)
+
+        target = logging.StreamHandler(sys.stderr)
+        target.setFormatter(JSONFormatter())
+
+        root = logging.getLogger("app")
+        if self.handler is not None:
+            root.removeHandler(self.handler)
+            self.handler.stop()
+        self.handler = _DroppingQueueHandler(target, app.config.get("LOG_QUEUE_SIZE", 10000))
+        self.handler.addFilter(SamplingFilter(self.sample_rate))   # sampled-out records never reach the queue
+        root.addHandler(self.handler)
+        root.setLevel(app.config.get("LOG_LEVEL", "INFO"))
+        root.propagate = False
+
+    def dropped(self):
+        return self.handler.dropped if self.handler is not None else 0
+
+    def shutdown(self):
+        if self.handler is not None:
+            self.handler.stop()
+
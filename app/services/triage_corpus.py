@@ -0,0 +1,42 @@
+"""
+Synthetic symptom complaints, and a frozen copy of the if/elif substring
+chain that generate_smart_response used before the rules engine (intent
+names only). Changes to triage_rules.json are checked against both, by
+the tests and by benchmarks.triage_bench.
+"""
+import random
+
+PHRASES = [
+    "headache", "migraine", "fever", "high temperature", "dry cough", "cold",
+    "sore throat", "stomach ache", "nausea", "vomiting", "diarrhea",
+    "chest pain", "pain in my chest", "chestpain", "chest aching", "back pain", "dizziness", "rash on arm",
+    "tired all day", "ahead of schedule", "forehead bruise",
+]
+FILLERS = ["since yesterday", "for 3 days", "and", "with", "really bad", "mild", "at night", ""]
+
+
+def legacy_intent(symptom_text):
+    symptom_lower = symptom_text.lower()
+    if 'head' in symptom_lower or 'migraine' in symptom_lower:
+        return "headache"
+    elif 'fever' in symptom_lower or 'temperature' in symptom_lower:
+        return "fever"
+    elif 'cough' in symptom_lower or 'cold' in symptom_lower or 'throat' in symptom_lower:
+        return "cough_cold"
+    elif 'stomach' in symptom_lower or 'nausea' in symptom_lower or 'vomit' in symptom_lower or 'diarrhea' in symptom_lower:
+        return "digestive"
+    elif 'chest' in symptom_lower and 'pain' in symptom_lower:
+        return "chest_pain"
+    return "general"
+
+
+def corpus(size, seed):
+    rng = random.Random(seed)
+    complaints = []
+    for _ in range(size):
+        words = []
+        for _ in range(rng.randint(1, 3)):
+            words += [rng.choice(PHRASES), rng.choice(FILLERS)]
+        text = " ".join(w for w in words if w)
+        complaints.append(text.upper() if rng.random() < 0.1 else text)
+    return complaints
@@ -0,0 +1,139 @@
+import json
+import os
+import re
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), "triage_rules.json")
+
+
+class Intent:
+    __slots__ = ("name", "urgency", "response", "keyword_groups", "compounds")
+
+    def __init__(self, name, urgency, response, keyword_groups=(), compounds=()):
+        self.name = name
+        self.urgency = urgency
+        self.response = response
+        # Every group must have at least one keyword present; a single group == "any of"
+        self.keyword_groups = keyword_groups
+        # Run-together spellings ("chestpain") that satisfy the intent alone, matched anywhere in a word
+        self.compounds = compounds
+
+    def render(self, symptom_text: str) -> str:
+        return self.response.replace("{symptom_text}", symptom_text)
+
+
+class TriageEngine:
+    """
+    Offline symptom triage driven by a rules file.
+
+    All keywords of all intents are compiled into one regex and matched
+    in a single pass; among the intents whose keyword groups are all
+    satisfied, the one with the highest urgency wins, so the answer does
+    not depend on the order rules are listed in.
+    """
+
+    def __init__(self, intents, fallback, version=None):
+        # Highest urgency first, so the first satisfied intent is the answer
+        self.intents = sorted(intents, key=lambda intent: -intent.urgency)
+        self.fallback = fallback
+        self.version = version
+
+        # Each keyword group gets one bit; an intent matches when all of its bits are set.
+        # Its compounds share one more bit, which is enough on its own.
+        self._keyword_bits = {}
+        self._compound_bits = {}
+        self._required_bits = []
+        bit = 1
+        for intent in self.intents:
+            required = 0
+            for group in intent.keyword_groups:
+                for kw in group:
+                    self._keyword_bits[kw] = self._keyword_bits.get(kw, 0) | bit
+                required |= bit
+                bit <<= 1
+            self._required_bits.append((required, intent))
+            if intent.compounds:
+                for kw in intent.compounds:
+                    self._compound_bits[kw] = self._compound_bits.get(kw, 0) | bit
+                self._required_bits.append((bit, intent))
+                bit <<= 1
+
+        keywords = self._keyword_bits.keys()
+        # Keywords match at a word start ("vomit" → "vomiting") but not mid-word ("ahead")
+        self._pattern = re.compile(rf"\b({_trie_pattern(keywords)})") if keywords else None
+        compounds = self._compound_bits.keys()
+        self._compound_pattern = re.compile(_trie_pattern(compounds)) if compounds else None
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_RULES_PATH):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls.from_dict(data)
+
+    @classmethod
+    def from_dict(cls, data):
+        intents = []
+        for rule in data["intents"]:
+            groups = [tuple(kw.lower() for kw in group) for group in rule.get("all_of", [])]
+            if rule.get("any_of"):
+                groups.append(tuple(kw.lower() for kw in rule["any_of"]))
+            if not groups:
+                raise ValueError(f"Triage intent {rule['name']!r} has no keywords")
+            compounds = tuple(kw.lower() for kw in rule.get("compounds", ()))
+            intents.append(Intent(rule["name"], int(rule["urgency"]), rule["response"], tuple(groups), compounds))
+
+        fallback = data["fallback"]
+        return cls(
+            intents,
+            Intent(fallback["name"], int(fallback.get("urgency", 0)), fallback["response"]),
+            version=data.get("version"),
+        )
+
+    def match(self, symptom_text: str) -> Intent:
+        text = symptom_text.lower()
+        found = 0
+        if self._pattern is not None:
+            for kw in self._pattern.findall(text):
+                found |= self._keyword_bits[kw]
+        if self._compound_pattern is not None:
+            for kw in self._compound_pattern.findall(text):
+                found |= self._compound_bits[kw]
+        if found:
+            for required, intent in self._required_bits:
+                if found & required == required:
+                    return intent
+        return self.fallback
+
+    def respond(self, symptom_text: str) -> str:
+        return self.match(symptom_text).render(symptom_text)
+
+    def constant_responses(self):
+        """Replies that do not quote the symptom text, i.e. the same string for every request."""
+        return [intent.response for intent in (*self.intents, self.fallback)
+                if "{symptom_text}" not in intent.response]
+
+
+def _trie_pattern(words):
+    """
+    Regex alternation factored by common prefix ("c(?:hest|o(?:ld|ugh))"),
+    so the regex engine tests each character once instead of once per keyword.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        ends_here = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A shorter keyword that is a prefix of a longer one: prefer the longer match
+        return f"(?:{body})?" if ends_here else body
+
+    return build(trie)
+
+
+triage_engine = TriageEngine.from_file()
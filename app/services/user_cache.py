@@ -0,0 +1,88 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class CachedUser:
+    """Read-only view of a User for JWT-protected requests; never attached to a session."""
+
+    __slots__ = ("id", "profile", "json", "etag")
+
+    def __init__(self, user):
+        self.id = user.id
+        self.profile = user.to_dict()
+        self.json = json.dumps(self.profile, ensure_ascii=False, sort_keys=True)
+        self.etag = hashlib.sha1(self.json.encode("utf-8")).hexdigest()
+
+
+class UserCache:
+    """
+    Bounded per-process LRU of CachedUser keyed by user id.
+
+    Entries are dropped explicitly when a profile changes in this process;
+    the TTL bounds how long another worker can serve a stale profile.
+    invalidate() also bumps the user's generation, so a miss that loaded
+    the row before the change does not put the old view back.
+    """
+
+    def __init__(self):
+        self.max_entries = 1024
+        self.ttl = 30.0
+        self._data = OrderedDict()   # user_id -> (expires_at, CachedUser)
+        self._generations = {}   # user_id -> bumped by invalidate(); pruning it bumps _epoch instead
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def init_app(self, app):
+        self.max_entries = app.config.get("USER_CACHE_SIZE", self.max_entries)
+        self.ttl = app.config.get("USER_CACHE_TTL", self.ttl)
+        self.clear()
+
+    def get(self, user_id):
+        """Cached view of the user, loading it on a miss; None if the user does not exist."""
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(user_id)
+            if item is not None and item[0] > now:
+                self._data.move_to_end(user_id)
+                self._stats["hits"] += 1
+                return item[1]
+            self._stats["misses"] += 1
+            generation = (self._epoch, self._generations.get(user_id, 0))
+
+        from app.extensions import db
+        from app.models import User
+
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        cached = CachedUser(user)
+        with self._lock:
+            if (self._epoch, self._generations.get(user_id, 0)) != generation:
+                return cached   # invalidated while loading: serve this request, cache nothing
+            self._data[user_id] = (now + self.ttl, cached)
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+        return cached
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._data.pop(user_id, None)
+            if len(self._generations) >= 4 * self.max_entries:
+                self._generations.clear()
+                self._epoch += 1
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._generations.clear()
+            self._epoch += 1
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, "entries": len(self._data)}
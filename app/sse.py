@@ -0,0 +1,35 @@
+from flask import Response, request, stream_with_context
+
+from app.json_provider import dumps
+
+
+def wants_stream(data: dict) -> bool:
+    """Streaming is opted into with ?stream=1, {"stream": true} or Accept: text/event-stream."""
+    if request.args.get("stream") in ("1", "true"):
+        return True
+    if data.get("stream") is True:
+        return True
+    return "text/event-stream" in request.headers.get("Accept", "")
+
+
+def sse_event(event: str, data, event_id: str = None) -> str:
+    """Format one Server-Sent Event; data is JSON encoded so newlines stay on one line."""
+    return sse_raw_event(event, dumps(data), event_id)
+
+
+def sse_raw_event(event: str, json_text: str, event_id: str = None) -> str:
+    """Same as sse_event for data that is already JSON encoded."""
+    if event_id is not None:   # the browser sends it back as Last-Event-ID when it reconnects
+        return f"id: {event_id}\nevent: {event}\ndata: {json_text}\n\n"
+    return f"event: {event}\ndata: {json_text}\n\n"
+
+
+SSE_KEEPALIVE = ": keepalive\n\n"   # comment line; keeps idle proxies from closing the stream
+
+
+def sse_response(events) -> Response:
+    """Wrap an iterator of formatted events in a streaming response."""
+    response = Response(stream_with_context(events), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"   # stop proxies from buffering the stream
+    return response
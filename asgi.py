@@ -0,0 +1,3 @@
+from app.asgi import create_asgi_app      #Flask app wrapped for ASGI, with async symptom / emergency-chat views
+
+application = create_asgi_app()   #`uvicorn asgi:application`: many Gemini calls in flight per worker, see app/asgi.py
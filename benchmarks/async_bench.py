@@ -0,0 +1,192 @@
+"""
+Concurrent in-flight LLM requests per worker: threaded WSGI vs. the ASGI async views.
+
+    python -m benchmarks.async_bench [--levels 50,200,1000] [--threads 16] [--fake-ms 1000]
+                                     [--endpoint symptoms|emergency]
+
+For each level N, N clients send one request each at the same moment to a
+single worker process and wait for the answer. The worker is either the
+Flask app on a WSGI server with a fixed pool of --threads request threads
+(what one gunicorn gthread worker gives) or app.asgi under uvicorn. Gemini
+is benchmarks.fake_gemini.FakeModel with a near-constant --fake-ms latency,
+and the LLM pool limits are lifted so the server itself is what caps
+concurrency. Reported: wall time for all N, p50/p99 latency, completed
+requests/s and the peak number of model calls in flight inside the worker.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import statistics
+import tempfile
+import time
+
+CONFIG = {
+    "RESPONSE_CACHE_PATH": "",
+    "RATE_LIMIT_ENABLED": False,   # every client shares one IP here
+    "LOG_LEVEL": "WARNING",
+    "LOG_SLOW_REQUEST_MS": 600000,
+    # Admission limits out of the way: this measures the server model, not the pool
+    "LLM_MAX_CONCURRENCY": 100000,
+    "LLM_QUEUE_SIZE": 100000,
+    "LLM_EMERGENCY_QUEUE_SIZE": 100000,
+    "SYMPTOMS_LLM_BUDGET": 600,
+    "EMERGENCY_CHAT_DEADLINE": 600,
+}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# -----------------------
+# Worker process
+# -----------------------
+def _pooled_wsgi_server(port, app, threads):
+    """werkzeug server that handles connections on a fixed thread pool, like a gthread worker."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from werkzeug.serving import BaseWSGIServer
+
+    class PooledServer(BaseWSGIServer):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.pool = ThreadPoolExecutor(max_workers=threads)
+
+        def process_request(self, request, client_address):
+            self.pool.submit(self._handle, request, client_address)
+
+        def _handle(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    return PooledServer("127.0.0.1", port, app)
+
+
+def _serve(mode, port, db_path, fake_ms, threads, results):
+    import logging
+    import signal
+    import sys
+
+    sys.stdout = open(os.devnull, "w")
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    from app import create_app
+    from app.database import init_db
+    from app.extensions import gemini, password_hasher
+    from benchmarks.fake_gemini import FakeModel
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + db_path, **CONFIG})
+    with app.app_context():
+        init_db()
+    model = FakeModel(median_ms=fake_ms, sigma=0.05)
+    gemini.override(model)
+
+    # uvicorn shuts down on SIGTERM and then re-raises it to this handler
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        if mode == "asgi":
+            import uvicorn
+
+            from app.asgi import create_asgi_app
+            uvicorn.Server(uvicorn.Config(create_asgi_app(app), host="127.0.0.1", port=port,
+                                          log_level="error", backlog=4096)).run()
+        else:
+            _pooled_wsgi_server(port, app, threads).serve_forever()
+    finally:
+        results.put(model.peak_in_flight)
+        password_hasher.shutdown()
+
+
+# -----------------------
+# Client
+# -----------------------
+async def _post(port, path, body):
+    payload = json.dumps(body).encode()
+    started = time.perf_counter()
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"POST %s HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n"
+                     b"Content-Length: %d\r\nConnection: close\r\n\r\n%s" % (path.encode(), len(payload), payload))
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        status = int(response.split(b" ", 2)[1])
+    except (OSError, IndexError, ValueError):
+        status = None
+    return status, time.perf_counter() - started
+
+
+async def _burst(port, endpoint, n, run_id):
+    if endpoint == "symptoms":
+        requests = [("/api/symptoms/analyze", {"symptoms": f"fever for {i} days ({run_id})"}) for i in range(n)]
+    else:
+        requests = [("/api/emergency/chat", {"message": f"person collapsed, case {i} ({run_id})"}) for i in range(n)]
+    started = time.perf_counter()
+    results = await asyncio.gather(*(_post(port, path, body) for path, body in requests))
+    return results, time.perf_counter() - started
+
+
+def _wait_ready(port):
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def run(mode, n, args):
+    port = _free_port()
+    results = multiprocessing.Queue()
+    server = multiprocessing.Process(target=_serve, args=(mode, port, os.path.join(tempfile.mkdtemp(), "bench.db"),
+                                                          args.fake_ms, args.threads, results))
+    server.start()
+    try:
+        _wait_ready(port)
+        outcomes, wall = asyncio.run(_burst(port, args.endpoint, n, f"{mode}-{n}-{time.time()}"))
+    finally:
+        server.terminate()
+        peak = results.get(timeout=30)
+        server.join()
+    latencies = sorted(t for _, t in outcomes)
+    ok = sum(1 for status, _ in outcomes if status == 200)
+    return {
+        "wall_s": wall,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "rps": ok / wall,
+        "errors": n - ok,
+        "peak_in_flight": peak,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--levels", default="50,200,1000")
+    parser.add_argument("--threads", type=int, default=16, help="request threads of the WSGI worker")
+    parser.add_argument("--fake-ms", type=float, default=1000)
+    parser.add_argument("--endpoint", choices=("symptoms", "emergency"), default="symptoms")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, one worker, {args.endpoint}, fake Gemini {args.fake_ms:.0f} ms")
+    print(f"{'server':<18} {'N':>6} {'wall s':>8} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>8} {'errors':>7} {'in flight':>10}")
+    for n in (int(level) for level in args.levels.split(",")):
+        for mode, label in (("wsgi", f"wsgi {args.threads} threads"), ("asgi", "asgi (uvicorn)")):
+            r = run(mode, n, args)
+            print(f"{label:<18} {n:>6} {r['wall_s']:>8.2f} {r['p50_ms']:>9.0f} {r['p99_ms']:>9.0f} "
+                  f"{r['rps']:>8.1f} {r['errors']:>7} {r['peak_in_flight']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Worker cold start: time to import the app, build it and serve the first request.
+
+    python -m benchmarks.cold_start_bench [--runs 7] [--repo PATH]
+
+Every run is a fresh interpreter (what a new worker pays). Stages:
+`import app`, `create_app()`, the first GET /health and the first
+symptom analysis (no Gemini key, so the offline triage answers).
+`import google.generativeai` is timed on its own to show the SDK cost
+that is now paid on the first real Gemini call instead of at boot.
+--repo runs the same measurement against another checkout, e.g. a
+`git worktree` of an older commit.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import app as pkg
+t1 = time.perf_counter()
+application = pkg.create_app({"SQLALCHEMY_DATABASE_URI": sys.argv[1], "RESPONSE_CACHE_PATH": ""})
+t2 = time.perf_counter()
+client = application.test_client()
+client.get("/health")
+t3 = time.perf_counter()
+client.post("/api/symptoms/analyze", json={"symptoms": "mild fever"})
+t4 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "create_app": t2 - t1, "first_request": t3 - t2,
+                  "first_symptoms": t4 - t3, "sdk_loaded": "google.generativeai" in sys.modules}))
+"""
+
+SDK_ONLY = "import time; t = time.perf_counter(); import google.generativeai; print(time.perf_counter() - t)"
+
+
+def _prepare_db(repo, url):
+    """Schema for repos with an init-db step; older trees create tables in create_app."""
+    code = ("import app as pkg\n"
+            "application = pkg.create_app({'SQLALCHEMY_DATABASE_URI': %r, 'RESPONSE_CACHE_PATH': ''})\n"
+            "try:\n    from app.database import init_db\nexcept ImportError:\n    init_db = None\n"
+            "if init_db:\n    with application.app_context():\n        init_db()\n") % url
+    subprocess.run([sys.executable, "-c", code], cwd=repo, env=_env(repo), check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _env(repo):
+    env = {k: v for k, v in os.environ.items() if k != "GEMINI_API_KEY"}
+    env["PYTHONPATH"] = repo
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--repo", default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    args = parser.parse_args()
+    repo = os.path.abspath(args.repo)
+
+    url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    _prepare_db(repo, url)
+
+    samples = []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, "-c", CHILD, url], cwd=repo, env=_env(repo),
+                             check=True, capture_output=True, text=True).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+
+    sdk = [float(subprocess.run([sys.executable, "-c", SDK_ONLY], check=True, capture_output=True,
+                                text=True).stdout) for _ in range(args.runs)]
+
+    print(f"{repo}: median of {args.runs} fresh interpreters")
+    total = 0.0
+    for stage in ("import", "create_app", "first_request", "first_symptoms"):
+        value = statistics.median(s[stage] for s in samples) * 1000
+        total += value
+        print(f"  {stage:<15} {value:8.1f} ms")
+    print(f"  {'total':<15} {total:8.1f} ms")
+    print(f"  Gemini SDK imported during boot: {samples[0]['sdk_loaded']}")
+    print(f"  import google.generativeai alone: {statistics.median(sdk) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Bytes on the wire and server CPU per request: JSON provider and compression settings.
+
+    python -m benchmarks.compression_bench [--requests 500] [--rounds 5] [--hospitals 200] [--link-kbps 400]
+
+Each configuration runs in its own process on a throwaway SQLite database
+with Gemini forced to the offline mock, so replies are the triage texts
+and the canned emergency text. Requests are prebuilt WSGI environs passed
+straight to the app, without sockets or a test client, so the CPU column
+is the app's own work per request (routing, auth, DB, JSON, compression).
+The encode column times only the step this benchmark is about: the code
+each route runs to turn its result into the body that is sent (jsonify or
+the pre-encoded bodies, plus compression). Both are thread_time, best of
+--rounds rounds, because single runs are noisy. Bytes are the response
+body as sent. The link column is the time that body needs
+on a --link-kbps connection, the slow-mobile case.
+
+Configurations:
+  stdlib            Flask's default JSON provider, no compression (the old behaviour)
+  orjson            FastJSONProvider, no compression
+  orjson+gzip       client sends Accept-Encoding: gzip
+  orjson+br         client sends Accept-Encoding: br, gzip (brotli package installed)
+"""
+import argparse
+import gzip
+import io
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+CONFIGS = {
+    "stdlib": ({"JSON_PROVIDER": "default", "COMPRESS_ENABLED": False}, None),
+    "orjson": ({"JSON_PROVIDER": "fast", "COMPRESS_ENABLED": False}, None),
+    "orjson+gzip": ({"JSON_PROVIDER": "fast", "COMPRESS_ENABLED": True}, "gzip"),
+    "orjson+br": ({"JSON_PROVIDER": "fast", "COMPRESS_ENABLED": True}, "br, gzip"),
+}
+
+# name -> (method, path, JSON body); "symptoms_static" is a constant triage reply,
+# "symptoms_dynamic" quotes the symptom text back and cannot be precompressed
+SCENARIOS = {
+    "symptoms_static": ("POST", "/api/symptoms/analyze", {"symptoms": "high fever since yesterday"}),
+    "symptoms_dynamic": ("POST", "/api/symptoms/analyze", {"symptoms": "tingling in my toes"}),
+    "emergency_all": ("POST", "/api/emergency/chat", {"message": "my friend fainted"}),
+    "emergency_nearest": ("POST", "/api/emergency/chat",
+                          {"message": "my friend fainted", "lat": 28.63, "lng": 77.21, "per_page": 20}),
+    "profile": ("GET", "/api/profile", None),
+}
+
+
+def _add_hospitals(count):
+    from app.extensions import db
+    from app.models import Hospital
+
+    rng = random.Random(7)
+    db.session.add_all(Hospital(
+        name=f"Bench Hospital {i}",
+        distance=f"{rng.uniform(0.5, 30):.1f} km",
+        doctors=rng.randint(5, 90),
+        beds=f"{rng.randint(20, 400)} (ICU: {rng.randint(0, 40)}, Emergency: {rng.randint(0, 60)})",
+        ventilators=f"{rng.randint(0, 30)} (Available)",
+        blood=rng.choice(["Full Stock", "Limited Stock", "Low Stock"]),
+        latitude=28.6 + rng.uniform(-0.3, 0.3),
+        longitude=77.2 + rng.uniform(-0.3, 0.3),
+    ) for i in range(count))
+    db.session.commit()
+
+
+def _call(app, environ, payload):
+    """One request through the WSGI app: (body bytes, Content-Encoding)."""
+    status_headers = []
+    environ = dict(environ, **{"wsgi.input": io.BytesIO(payload)})
+    chunks = app.wsgi_app(environ, lambda status, headers, exc_info=None: status_headers.append(headers))
+    try:
+        data = b"".join(chunks)
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+    return data, dict(status_headers[0]).get("Content-Encoding")
+
+
+def _decode(data, encoding):
+    if encoding == "gzip":
+        data = gzip.decompress(data)
+    elif encoding == "br":
+        import brotli
+        data = brotli.decompress(data)
+    return json.loads(data)
+
+
+def _encoders(app, payloads):
+    """scenario -> fn() doing what the route does with its result; needs a request context."""
+    from flask import jsonify, request
+
+    from app.extensions import compressor, hospital_directory
+    from app.routes.emergency_chat_routes import _listing_tail
+    from app.routes.symptom_routes import _reply
+    from app.services.compression import Prefixed
+
+    accept = request.headers.get("Accept-Encoding")
+
+    def dynamic(payload):
+        return lambda: compressor.compress(jsonify(payload), accept).get_data()
+
+    def symptoms(payload):
+        return lambda: compressor.compress(_reply(payload["reply"], payload["degraded"])[0], accept).get_data()
+
+    def listing(payload):
+        def encode():
+            body = Prefixed(b'{"hospitals": ', hospital_directory.all_json(),
+                            _listing_tail(payload["text"], payload["degraded"], None))
+            return compressor.response(app, body, accept).get_data()
+        return encode
+
+    return {
+        "symptoms_static": symptoms(payloads["symptoms_static"]),
+        "symptoms_dynamic": symptoms(payloads["symptoms_dynamic"]),
+        "emergency_all": listing(payloads["emergency_all"]),
+        "emergency_nearest": dynamic(payloads["emergency_nearest"]),
+        "profile": dynamic(payloads["profile"]),
+    }
+
+
+def _best(fn, rounds, repeat):
+    best = None
+    for _ in range(rounds):
+        started = time.thread_time()
+        for _ in range(repeat):
+            result = fn()
+        cpu = (time.thread_time() - started) / repeat
+        best = cpu if best is None else min(best, cpu)
+    return best, result
+
+
+def _run(name, args, results):
+    import logging
+    import sys
+
+    sys.stdout = open(os.devnull, "w")
+    logging.disable(logging.CRITICAL)
+
+    from werkzeug.test import EnvironBuilder
+
+    from app import create_app
+    from app.database import init_db
+    from app.extensions import password_hasher
+
+    config, accept_encoding = CONFIGS[name]
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"),
+        "RESPONSE_CACHE_PATH": "",
+        "RATE_LIMIT_ENABLED": False,
+        "GEMINI_FORCE_MOCK": True,
+        "PASSWORD_HASH_WORKERS": 0,
+        **config,
+    })
+    with app.app_context():
+        init_db()
+        _add_hospitals(args.hospitals)
+
+    client = app.test_client()
+    client.post("/api/register", json={"email": "bench@example.com", "password": "bench-password"})
+    token = client.post("/api/login", json={"email": "bench@example.com", "password": "bench-password"}).get_json()
+    headers = {"Authorization": "Bearer " + token["access_token"]}
+    if accept_encoding:
+        headers["Accept-Encoding"] = accept_encoding
+
+    out, payloads = {}, {}
+    try:
+        for scenario, (method, path, body) in SCENARIOS.items():
+            environ = EnvironBuilder(path=path, method=method, json=body, headers=headers).get_environ()
+            request_body = json.dumps(body).encode() if body is not None else b""
+            for _ in range(20):   # warm-up: snapshots, caches, first-use imports
+                _call(app, environ, request_body)
+            cpu, (data, encoding) = _best(lambda: _call(app, environ, request_body), args.rounds, args.requests)
+            out[scenario] = [len(data), encoding, cpu]
+            payloads[scenario] = _decode(data, encoding)
+
+        with app.test_request_context(headers=headers):
+            for scenario, encode in _encoders(app, payloads).items():
+                cpu, _ = _best(encode, args.rounds, args.requests)
+                out[scenario].append(cpu)
+    finally:
+        password_hasher.shutdown()
+    results.put(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500, help="per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--hospitals", type=int, default=200, help="rows added to the 3 seeded hospitals")
+    parser.add_argument("--link-kbps", type=float, default=400)
+    args = parser.parse_args()
+
+    print(f"best of {args.rounds} x {args.requests} requests per scenario, {args.hospitals + 3} hospitals, "
+          f"link {args.link_kbps:.0f} kbit/s")
+    print(f"{'scenario':<18} {'config':<12} {'bytes':>8} {'encoding':>9} {'cpu us/req':>11} {'encode us':>10} "
+          f"{'link ms':>8}")
+    runs = {}
+    for name in CONFIGS:
+        results = multiprocessing.Queue()
+        process = multiprocessing.Process(target=_run, args=(name, args, results))
+        process.start()
+        runs[name] = results.get()
+        process.join()
+    for scenario in SCENARIOS:
+        for name in CONFIGS:
+            size, encoding, cpu, encode = runs[name][scenario]
+            link_ms = size * 8 / args.link_kbps
+            print(f"{scenario:<18} {name:<12} {size:>8} {encoding or '-':>9} {cpu * 1e6:>11.0f} {encode * 1e6:>10.1f} "
+                  f"{link_ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Concurrent profile reads/writes against SQLite: stock engine vs. the app's engine profile.
+
+    python -m benchmarks.db_concurrency_bench [--processes 4] [--threads 4] [--seconds 5] [--write-ratio 0.2]
+
+Each run creates a throwaway database with the app's schema and starts
+`processes` workers (standing in for server worker processes), each with
+`threads` request threads. Every operation is a primary-key user read or,
+with probability `write-ratio`, an update+commit of one user's profile.
+
+"default" is create_engine(url) with SQLite's rollback journal and no
+busy handling beyond the driver's; "tuned" uses engine_options() and the
+WAL/synchronous/busy_timeout/mmap/cache pragmas from app.database.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+USERS = 1000
+
+DEFAULT_CONFIG = {
+    "DB_POOL_SIZE": 10,
+    "DB_MAX_OVERFLOW": 10,
+    "DB_POOL_TIMEOUT": 10,
+    "DB_POOL_RECYCLE": 1800,
+    "SQLITE_JOURNAL_MODE": "WAL",
+    "SQLITE_SYNCHRONOUS": "NORMAL",
+    "SQLITE_BUSY_TIMEOUT_MS": 5000,
+    "SQLITE_MMAP_SIZE": 256 * 1024 * 1024,
+    "SQLITE_CACHE_SIZE_KB": 65536,
+}
+
+
+def _engine(url, tuned):
+    from sqlalchemy import create_engine
+
+    from app.database import engine_options, register_sqlite_pragmas, sqlite_pragmas
+
+    if not tuned:
+        return create_engine(url)
+    config = {**DEFAULT_CONFIG, "SQLALCHEMY_DATABASE_URI": url}
+    engine = create_engine(url, **engine_options(config))
+    register_sqlite_pragmas(engine, sqlite_pragmas(config))
+    return engine
+
+
+def _prepare(url):
+    from sqlalchemy import create_engine, insert
+
+    from app.extensions import db
+    from app.models import User
+
+    engine = create_engine(url)
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"name": f"user {i}", "email": f"user{i}@example.com", "password_hash": "x"}
+            for i in range(USERS)
+        ])
+    engine.dispose()
+
+
+def _worker(url, tuned, threads, seconds, write_ratio, results):
+    from sqlalchemy import select, update
+    from sqlalchemy.exc import OperationalError
+
+    from app.models import User
+
+    engine = _engine(url, tuned)
+    users = User.__table__
+    deadline = time.monotonic() + seconds
+    lock = threading.Lock()
+    reads, writes, errors = [], [], [0]
+
+    def loop(seed):
+        rng = random.Random(seed)
+        local_reads, local_writes, local_errors = [], [], 0
+        while time.monotonic() < deadline:
+            user_id = rng.randint(1, USERS)
+            write = rng.random() < write_ratio
+            started = time.perf_counter()
+            try:
+                if write:
+                    with engine.begin() as conn:
+                        conn.execute(update(users).where(users.c.id == user_id)
+                                     .values(address=f"addr {rng.random():.6f}"))
+                else:
+                    with engine.connect() as conn:
+                        conn.execute(select(users).where(users.c.id == user_id)).first()
+            except OperationalError:   # "database is locked"
+                local_errors += 1
+                continue
+            elapsed = (time.perf_counter() - started) * 1000
+            (local_writes if write else local_reads).append(elapsed)
+        with lock:
+            reads.extend(local_reads)
+            writes.extend(local_writes)
+            errors[0] += local_errors
+
+    pool = [threading.Thread(target=loop, args=(os.getpid() * 100 + i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    engine.dispose()
+    results.put((reads, writes, errors[0]))
+
+
+def _summary(samples):
+    if not samples:
+        return "no samples"
+    ordered = sorted(samples)
+    p = lambda pct: ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+    return f"p50 {statistics.median(samples):7.2f} ms  p95 {p(95):7.2f} ms  p99 {p(99):8.2f} ms"
+
+
+def run(label, tuned, args):
+    url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    _prepare(url)
+
+    results = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(target=_worker,
+                                args=(url, tuned, args.threads, args.seconds, args.write_ratio, results))
+        for _ in range(args.processes)
+    ]
+    for w in workers:
+        w.start()
+    reads, writes, errors = [], [], 0
+    for _ in workers:
+        r, w_, e = results.get()
+        reads.extend(r)
+        writes.extend(w_)
+        errors += e
+    for w in workers:
+        w.join()
+
+    ops = len(reads) + len(writes)
+    print(f"\n{label}")
+    print(f"  throughput  {ops / args.seconds:9.0f} ops/s  ({len(writes) / args.seconds:.0f} writes/s)")
+    print(f"  reads       {_summary(reads)}")
+    print(f"  writes      {_summary(writes)}")
+    print(f"  locked errors {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.processes} processes x {args.threads} threads, "
+          f"{args.write_ratio:.0%} writes, {args.seconds:.0f}s per run")
+    run("default engine (rollback journal, synchronous=FULL)", False, args)
+    run("tuned engine (WAL, synchronous=NORMAL, busy_timeout, mmap, cache)", True, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Local stand-in for google.generativeai.GenerativeModel.
+
+    from benchmarks.fake_gemini import FakeModel
+    gemini.override(FakeModel(median_ms=800, sigma=0.5, error_rate=0.02))
+
+generate_content() sleeps for a log-normally distributed time (median
+`median_ms`, spread `sigma`; sigma=0 is a fixed delay), fails with
+`error_rate` probability and honours request_options={"timeout": ...}
+the way the SDK does. With stream=True it yields `chunks` pieces spread
+over the same latency. Responses carry usage_metadata like the real SDK.
+generate_content_async() is the same model on asyncio.sleep; `in_flight`
+and `peak_in_flight` count calls running at once across both APIs.
+"""
+import asyncio
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+
+class FakeError(Exception):
+    """Stands in for an upstream 5xx / quota error."""
+
+
+class FakeTimeout(Exception):
+    """Stands in for the SDK's DeadlineExceeded."""
+
+
+class _Usage:
+    __slots__ = ("prompt_token_count", "candidates_token_count")
+
+    def __init__(self, prompt_tokens, response_tokens):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = response_tokens
+
+
+class _Response:
+    __slots__ = ("text", "usage_metadata")
+
+    def __init__(self, text, usage=None):
+        self.text = text
+        self.usage_metadata = usage
+
+
+def _tokens(text):
+    return max(1, len(text) // 4)   # rough chars-per-token of English prose
+
+
+class FakeModel:
+    def __init__(self, median_ms=800.0, sigma=0.4, error_rate=0.0, chunks=6, reply_words=120, seed=None):
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.chunks = max(1, chunks)
+        self.reply = " ".join(["Rest, drink fluids and see a doctor if it gets worse."] * max(1, reply_words // 10))
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def _draw(self):
+        with self._lock:
+            self.calls += 1
+            delay = self.median_ms / 1000 * math.exp(self._rng.gauss(0, self.sigma)) if self.sigma else self.median_ms / 1000
+            failed = self._rng.random() < self.error_rate
+        return delay, failed
+
+    @contextmanager
+    def _running(self):
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    @staticmethod
+    def _timeout(request_options):
+        return (request_options or {}).get("timeout")
+
+    def generate_content(self, prompt, stream=False, request_options=None, **kwargs):
+        delay, failed = self._draw()
+        timeout = self._timeout(request_options)
+        usage = _Usage(_tokens(str(prompt)), _tokens(self.reply))
+        if stream:
+            return self._stream(delay, failed, timeout, usage)
+        with self._running():
+            if timeout is not None and delay > timeout:
+                time.sleep(timeout)
+                raise FakeTimeout(f"deadline of {timeout:.2f}s exceeded")
+            time.sleep(delay)
+        if failed:
+            raise FakeError("503 upstream unavailable")
+        return _Response(self.reply, usage)
+
+    async def generate_content_async(self, prompt, stream=False, request_options=None, **kwargs):
+        delay, failed = self._draw()
+        timeout = self._timeout(request_options)
+        usage = _Usage(_tokens(str(prompt)), _tokens(self.reply))
+        if stream:
+            return self._stream_async(delay, failed, timeout, usage)
+        with self._running():
+            if timeout is not None and delay > timeout:
+                await asyncio.sleep(timeout)
+                raise FakeTimeout(f"deadline of {timeout:.2f}s exceeded")
+            await asyncio.sleep(delay)
+        if failed:
+            raise FakeError("503 upstream unavailable")
+        return _Response(self.reply, usage)
+
+    def _chunk(self, i, failed, started, timeout, usage):
+        if timeout is not None and time.monotonic() - started > timeout:
+            raise FakeTimeout(f"deadline of {timeout:.2f}s exceeded")
+        if failed and i == self.chunks // 2:
+            raise FakeError("503 upstream unavailable")
+        size = math.ceil(len(self.reply) / self.chunks)
+        return _Response(self.reply[i * size:(i + 1) * size], usage if i == self.chunks - 1 else None)
+
+    def _stream(self, delay, failed, timeout, usage):
+        started = time.monotonic()
+        with self._running():
+            for i in range(self.chunks):
+                time.sleep(delay / self.chunks)
+                yield self._chunk(i, failed, started, timeout, usage)
+
+    async def _stream_async(self, delay, failed, timeout, usage):
+        started = time.monotonic()
+        with self._running():
+            for i in range(self.chunks):
+                await asyncio.sleep(delay / self.chunks)
+                yield self._chunk(i, failed, started, timeout, usage)
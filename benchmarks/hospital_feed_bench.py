@@ -0,0 +1,127 @@
+"""
+Hospital capacity feed fan-out: delivery latency and DB work per update.
+
+    python -m benchmarks.hospital_feed_bench [--subscribers 1000] [--updates 50] [--hospitals 200]
+
+Starts --subscribers async subscribers on HospitalFeed.stream_async (the
+generator behind the ASGI feed view) in one process, waits until each has
+its snapshot, then commits --updates capacity changes through the ORM,
+one at a time. Reported: time from the start of an update (load, change,
+commit) to its delta reaching the first and the last subscriber
+(p50/p99), bytes per delta vs. the snapshot, and SQL statements executed
+per update. The update itself takes a few
+statements; the fan-out should add none, whatever the subscriber count.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+
+def _pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def _run(args):
+    from sqlalchemy import event
+
+    from app import create_app
+    from app.database import init_db
+    from app.extensions import db, hospital_feed
+    from app.models import Hospital
+
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"),
+        "RESPONSE_CACHE_PATH": "",
+        "LOG_LEVEL": "WARNING",
+        "PASSWORD_HASH_WORKERS": 0,
+        "HOSPITAL_FEED_HEARTBEAT": 60,
+    })
+    rng = random.Random(7)
+    with app.app_context():
+        init_db()
+        db.session.add_all(Hospital(
+            name=f"Bench Hospital {i}", doctors=rng.randint(5, 90),
+            beds=f"{rng.randint(20, 400)} (ICU: {rng.randint(0, 40)}, Emergency: {rng.randint(0, 60)})",
+            ventilators=f"{rng.randint(0, 30)} (Available)", blood="Full Stock",
+            latitude=28.6 + rng.uniform(-0.3, 0.3), longitude=77.2 + rng.uniform(-0.3, 0.3),
+        ) for i in range(args.hospitals))
+        db.session.commit()
+        ids = [row.id for row in Hospital.query.with_entities(Hospital.id)]
+        statements = [0]
+        event.listen(db.engine, "before_cursor_execute", lambda *a: statements.__setitem__(0, statements[0] + 1))
+
+    received = {}   # version -> [perf_counter of each subscriber's delivery]
+    ready = asyncio.Event()
+    connected = [0]
+    snapshot_bytes = [0]
+    delta_bytes = []
+
+    async def subscriber():
+        async for chunk in hospital_feed.stream_async():
+            if chunk.startswith("id:") and "event: snapshot" in chunk:
+                snapshot_bytes[0] = len(chunk)
+                connected[0] += 1
+                if connected[0] == args.subscribers:
+                    ready.set()
+                continue
+            now = time.perf_counter()
+            if chunk.startswith("id:") and len(delta_bytes) < args.updates:
+                delta_bytes.append(len(chunk))
+            for line in chunk.splitlines():
+                if line.startswith("id: "):
+                    received.setdefault(int(line.rsplit(":", 1)[1]), []).append(now)
+
+    with app.app_context():
+        tasks = [asyncio.ensure_future(subscriber()) for _ in range(args.subscribers)]
+        await ready.wait()
+
+        def update(i):
+            with app.app_context():
+                hospital = db.session.get(Hospital, rng.choice(ids))
+                hospital.beds = f"{rng.randint(20, 400)} (ICU: {i % 40}, Emergency: {rng.randint(0, 60)})"
+                db.session.commit()
+                version = hospital_feed.stats()["version"]
+                db.session.remove()
+                return version
+
+        first, last = [], []
+        before = statements[0]
+        for i in range(args.updates):
+            started = time.perf_counter()
+            version = await asyncio.to_thread(update, i)
+            while len(received.get(version, ())) < args.subscribers:
+                await asyncio.sleep(0.0005)
+            times = received[version]
+            first.append(min(times) - started)
+            last.append(max(times) - started)
+        per_update = (statements[0] - before) / args.updates
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    print(f"{args.subscribers} subscribers, {args.updates} updates, {args.hospitals + 3} hospitals")
+    print(f"  update -> first subscriber   p50 {statistics.median(first) * 1000:7.2f} ms   "
+          f"p99 {_pct(first, 0.99) * 1000:7.2f} ms")
+    print(f"  update -> last subscriber    p50 {statistics.median(last) * 1000:7.2f} ms   "
+          f"p99 {_pct(last, 0.99) * 1000:7.2f} ms")
+    print(f"  delta {statistics.median(delta_bytes):.0f} B vs. snapshot {snapshot_bytes[0]} B")
+    print(f"  SQL statements per update    {per_update:.1f} (the update's own; none per subscriber)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--updates", type=int, default=50)
+    parser.add_argument("--hospitals", type=int, default=200, help="rows added to the 3 seeded hospitals")
+    args = parser.parse_args()
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
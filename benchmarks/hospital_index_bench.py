@@ -0,0 +1,81 @@
+"""
+Nearest-hospital lookup latency: grid index vs. a full scan.
+
+    python -m benchmarks.hospital_index_bench [--sizes 10000 100000] [--queries 2000]
+
+Hospitals are spread uniformly over a region roughly the size of India;
+query points are drawn from the same area.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.services.hospital_index import GeoGridIndex, haversine_km
+
+LAT_RANGE = (8.0, 35.0)
+LNG_RANGE = (68.0, 97.0)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def brute_force(points, lat, lng, k):
+    return sorted((haversine_km(lat, lng, plat, plng), pid) for pid, plat, plng in points)[:k]
+
+
+def run(size, queries, k, radius_km, seed):
+    rng = random.Random(seed)
+    points = [(i, rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)) for i in range(size)]
+
+    index = GeoGridIndex()
+    started = time.perf_counter()
+    for pid, lat, lng in points:
+        index.upsert(pid, lat, lng)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    probes = [(rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)) for _ in range(queries)]
+
+    def timed(fn):
+        samples = []
+        for lat, lng in probes:
+            t = time.perf_counter()
+            fn(lat, lng)
+            samples.append((time.perf_counter() - t) * 1e6)
+        return samples
+
+    knn = timed(lambda lat, lng: index.nearest(lat, lng, k))
+    within = timed(lambda lat, lng: index.nearest(lat, lng, 50, radius_km=radius_km))
+    scan = timed(lambda lat, lng: brute_force(points, lat, lng, k)) if size <= 10000 else None
+
+    # Spot-check correctness against the full scan
+    for lat, lng in probes[:20]:
+        expected = [pid for _, pid in brute_force(points, lat, lng, k)]
+        assert [pid for _, pid in index.nearest(lat, lng, k)] == expected
+
+    print(f"\n{size:,} hospitals (index build {build_ms:.0f} ms)")
+    for name, samples in (("k-nearest", knn), (f"within {radius_km:g} km", within), ("full scan", scan)):
+        if samples is None:
+            continue
+        print(
+            f"  {name:<16} p50 {statistics.median(samples):9.1f} us"
+            f"   p95 {percentile(samples, 95):9.1f} us   p99 {percentile(samples, 99):9.1f} us"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--radius-km", type=float, default=25.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.queries, args.k, args.radius_km, args.seed)
+
+
+if __name__ == "__main__":
+    main()
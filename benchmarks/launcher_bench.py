@@ -0,0 +1,187 @@
+"""
+Throughput and memory of the launchers: run.py's development server vs. gunicorn.
+
+    python -m benchmarks.launcher_bench [--workers 2] [--threads 16] [--concurrency 16] [--duration 10]
+                                        [--scenarios profile_get,symptoms] [--fake-median-ms 800]
+
+Serves the app on a throwaway SQLite database with benchmarks.fake_gemini
+standing in for Gemini, under each launcher in turn:
+
+  dev                 python run.py as shipped (Werkzeug, debug=True, reloader)
+  gunicorn            gunicorn.conf.py, --workers x --threads, GUNICORN_PRELOAD=0
+  gunicorn --preload  the same, app built once in the master and forked
+
+and drives it with load_driver's closed loop. Reported per launcher:
+req/s and p50/p99 per scenario, and the memory of the serving processes
+as PSS (pages shared between processes split among them). Last, the
+preloaded gunicorn gets a SIGHUP halfway through a symptom run; a
+graceful restart fails no request.
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+
+from benchmarks.load_driver import PASSWORD, Client, make_scenario, run_scenario
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def bench_app():
+    """App factory for the servers under test: gunicorn "benchmarks.launcher_bench:bench_app()"."""
+    from app import create_app
+    from app.extensions import gemini
+    from benchmarks.fake_gemini import FakeModel
+
+    directory = os.environ["LAUNCHER_BENCH_DIR"]
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(directory, "bench.db"),
+        "RESPONSE_CACHE_PATH": os.path.join(directory, "cache.db"),
+        "RATE_LIMIT_ENABLED": False,   # every client shares one IP here
+        "PASSWORD_HASH_WORKERS": 0,   # no hashing pool: the process tree is the launcher's own
+        "LOG_LEVEL": "WARNING",
+        "LOG_SLOW_REQUEST_MS": 60000,
+    })
+    gemini.override(FakeModel(**json.loads(os.environ["LAUNCHER_BENCH_FAKE"])))
+    return app
+
+
+def _serve_dev(port):
+    # What `python run.py` does, on a free port
+    bench_app().run(debug=True, host="127.0.0.1", port=port)
+
+
+# -----------------------
+# Servers under test
+# -----------------------
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start(launcher, port, args, env):
+    if launcher == "dev":
+        command = [sys.executable, "-m", "benchmarks.launcher_bench", "--serve-dev", str(port)]
+    else:
+        command = [sys.executable, "-m", "gunicorn", "-c", os.path.join(ROOT, "gunicorn.conf.py"),
+                   "--bind", f"127.0.0.1:{port}", "--workers", str(args.workers), "--threads", str(args.threads),
+                   "benchmarks.launcher_bench:bench_app()"]
+        env = {**env, "GUNICORN_PRELOAD": "1" if launcher == "gunicorn --preload" else "0"}
+    # Own session, so the reloader's child and the workers are stopped (and measured) with it
+    return subprocess.Popen(command, cwd=ROOT, env=env, start_new_session=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _stop(server):
+    try:
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        os.killpg(server.pid, signal.SIGKILL)
+        server.wait()
+    except ProcessLookupError:
+        pass
+
+
+def _session_pss(session):
+    """(PSS in MB, process count) of the processes of a session."""
+    total, count = 0, 0
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            if int(fields[3]) != session:
+                continue
+            with open(f"/proc/{pid}/smaps_rollup") as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith("Pss:"))
+            count += 1
+        except (OSError, StopIteration):
+            continue
+    return total / 1024, count
+
+
+def _login(client, run_id, concurrency):
+    tokens = {}
+    for i in range(concurrency):
+        email = f"user-{run_id}-{i}@bench.local"
+        client.request("POST", "/api/register", {"email": email, "password": PASSWORD})
+        status, body = client.request("POST", "/api/login", {"email": email, "password": PASSWORD})
+        if status != 200:
+            raise RuntimeError(f"login failed during setup: {status} {body[:200]!r}")
+        tokens[email] = json.loads(body)["access_token"]
+    return tokens
+
+
+def _restart_under_load(client, server, args, run_id, tokens):
+    """Symptom run with a SIGHUP to the master halfway through: (requests, failed)."""
+    request = make_scenario("symptoms", client, f"{run_id}-hup", tokens)
+    timer = threading.Timer(args.duration / 2, os.kill, (server.pid, signal.SIGHUP))
+    timer.start()
+    result = run_scenario(request, args.concurrency, args.duration)
+    timer.join()
+    ok = sum(c for s, c in result["statuses"].items() if s == "200")
+    return result["requests"], result["requests"] - ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--scenarios", default="profile_get,symptoms")
+    parser.add_argument("--fake-median-ms", type=float, default=800)
+    parser.add_argument("--fake-sigma", type=float, default=0.4)
+    parser.add_argument("--serve-dev", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve_dev:
+        return _serve_dev(args.serve_dev)
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    directory = tempfile.mkdtemp()
+    env = {**os.environ, "PYTHONPATH": ROOT, "LAUNCHER_BENCH_DIR": directory,
+           "LAUNCHER_BENCH_FAKE": json.dumps({"median_ms": args.fake_median_ms, "sigma": args.fake_sigma})}
+    os.environ.update(env)
+    from app.database import init_db
+
+    with bench_app().app_context():   # schema once, before several processes open the file
+        init_db()
+
+    print(f"{os.cpu_count()} CPUs, {args.concurrency} clients, {args.duration:.0f}s per endpoint, "
+          f"gunicorn {args.workers} workers x {args.threads} threads, "
+          f"fake Gemini median {args.fake_median_ms:.0f} ms sigma {args.fake_sigma}")
+    print(f"\n{'launcher':<20} {'endpoint':<12} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    memory = {}
+    for launcher in ("dev", "gunicorn", "gunicorn --preload"):
+        port = _free_port()
+        server = _start(launcher, port, args, env)
+        client = Client("127.0.0.1", port)
+        try:
+            client.wait_ready()
+            run_id = f"{os.getpid()}-{port}"
+            tokens = _login(client, run_id, args.concurrency)
+            for name in scenarios:
+                r = run_scenario(make_scenario(name, client, run_id, tokens), args.concurrency, args.duration)
+                print(f"{launcher:<20} {name:<12} {r['rps']:>8.1f} {r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} "
+                      f"{r['error_rate']:>7.1%}")
+            memory[launcher] = _session_pss(server.pid)
+            if launcher == "gunicorn --preload":
+                restart = _restart_under_load(client, server, args, run_id, tokens)
+        finally:
+            _stop(server)
+
+    print(f"\n{'launcher':<20} {'processes':>9} {'PSS MB':>8}")
+    for launcher, (pss, count) in memory.items():
+        print(f"{launcher:<20} {count:>9} {pss:>8.1f}")
+    requests, failed = restart
+    print(f"\nSIGHUP during a {args.duration:.0f}s symptom run: {requests} requests, {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
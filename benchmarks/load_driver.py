@@ -0,0 +1,289 @@
+"""
+Offline load test of the main endpoints against a local Gemini stand-in.
+
+    python -m benchmarks.load_driver [--concurrency 8] [--duration 10] [--fake-median-ms 800]
+                                     [--fake-sigma 0.4] [--fake-error-rate 0.0]
+                                     [--scenarios login,symptoms,...] [--url http://host:port]
+                                     [--save NAME] [--compare NAME]
+
+Starts the app in a child process on a throwaway SQLite database with
+benchmarks.fake_gemini.FakeModel in place of Gemini (no network, no
+quota), then runs each scenario as a closed loop of `concurrency`
+clients for `duration` seconds and reports requests/s and p50/p95/p99
+latency per endpoint. --url drives an already running server instead
+(its model is whatever that server uses).
+
+--save writes the results to benchmarks/baselines/NAME.json; --compare
+prints the change against such a file. Compare runs made with the same
+options on the same machine only.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+SCENARIOS = ("register", "login", "profile_get", "profile_put", "symptoms", "emergency")
+PASSWORD = "bench-password"
+
+
+# -----------------------
+# Server under test
+# -----------------------
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _serve(port, db_path, fake):
+    import logging
+    import signal
+    import sys
+
+    from werkzeug.serving import make_server
+
+    sys.stdout = open(os.devnull, "w")
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    from app import create_app
+    from app.database import init_db
+    from app.extensions import gemini, password_hasher
+    from benchmarks.fake_gemini import FakeModel
+
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + db_path,
+        "RESPONSE_CACHE_PATH": "",
+        "RATE_LIMIT_ENABLED": False,   # every client shares one IP here
+        "LOG_LEVEL": "WARNING",
+        "LOG_SLOW_REQUEST_MS": 60000,   # slow model calls are the point here; 5xx still log
+    })
+    with app.app_context():
+        init_db()
+    gemini.override(FakeModel(**fake))
+    # terminate() must also take down the hashing pool, or its workers outlive the run
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        make_server("127.0.0.1", port, app, threaded=True).serve_forever()
+    finally:
+        password_hasher.shutdown()
+
+
+# -----------------------
+# HTTP client
+# -----------------------
+class Client:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+
+    def request(self, method, path, body=None, token=None, timeout=60):
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+        try:
+            conn.request(method, path, json.dumps(body) if body is not None else None, headers)
+            response = conn.getresponse()
+            return response.status, response.read()
+        finally:
+            conn.close()
+
+    def wait_ready(self):
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            try:
+                if self.request("GET", "/health", timeout=2)[0] == 200:
+                    return
+            except OSError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError("server did not start")
+
+
+def make_scenario(name, client, run_id, tokens):
+    """request(n) for scenario `name`; n is unique per request of the run."""
+    if name == "register":
+        return lambda n: client.request("POST", "/api/register",
+                                        {"email": f"new-{run_id}-{n}@bench.local", "password": PASSWORD})
+    if name == "login":
+        emails = list(tokens)
+        return lambda n: client.request("POST", "/api/login",
+                                        {"email": emails[n % len(emails)], "password": PASSWORD})
+    token_list = list(tokens.values())
+    if name == "profile_get":
+        return lambda n: client.request("GET", "/api/profile", token=token_list[n % len(token_list)])
+    if name == "profile_put":
+        return lambda n: client.request("PUT", "/api/profile", {"name": f"Bench {n}", "address": f"{n} Test Road"},
+                                        token=token_list[n % len(token_list)])
+    if name == "symptoms":
+        # Unique text per request so every call misses the reply cache and reaches the model
+        return lambda n: client.request("POST", "/api/symptoms/analyze",
+                                        {"symptoms": f"fever and headache since {n} hours ({run_id})"})
+    if name == "emergency":
+        return lambda n: client.request("POST", "/api/emergency/chat",
+                                        {"message": f"person fainted, case {n} ({run_id})",
+                                         "lat": 28.63, "lng": 77.21})
+    raise ValueError(f"unknown scenario {name!r}")
+
+
+def _percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run_scenario(request, concurrency, duration):
+    counter = itertools.count()
+    lock = threading.Lock()
+    latencies, statuses = [], {}
+    stop_at = time.monotonic() + duration
+
+    def worker():
+        local, local_status = [], {}
+        while time.monotonic() < stop_at:
+            n = next(counter)
+            started = time.perf_counter()
+            try:
+                status, _ = request(n)
+            except OSError:
+                status = "conn_error"
+            local.append((time.perf_counter() - started) * 1000)
+            local_status[status] = local_status.get(status, 0) + 1
+        with lock:
+            latencies.extend(local)
+            for status, count in local_status.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    ok = sum(c for s, c in statuses.items() if isinstance(s, int) and (200 <= s < 300 or s == 304))
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(statistics.median(ordered), 2) if ordered else None,
+        "p95_ms": round(_percentile(ordered, 95), 2) if ordered else None,
+        "p99_ms": round(_percentile(ordered, 99), 2) if ordered else None,
+        "error_rate": round(1 - ok / len(latencies), 4) if latencies else None,
+        "statuses": {str(s): c for s, c in sorted(statuses.items(), key=str)},
+    }
+
+
+# -----------------------
+# Reporting / baselines
+# -----------------------
+def _print_table(results):
+    print(f"\n{'endpoint':<12} {'reqs':>6} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, r in results.items():
+        print(f"{name:<12} {r['requests']:>6} {r['rps']:>8.1f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+              f"{r['p99_ms']:>9.1f} {r['error_rate']:>7.1%}")
+
+
+def _compare(results, baseline):
+    print(f"\nvs. baseline {baseline['name']!r} ({baseline['recorded_at']}, {baseline['git_commit']})")
+    print(f"{'endpoint':<12} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name, r in results.items():
+        base = baseline["results"].get(name)
+        if not base:
+            continue
+        change = lambda key: f"{(r[key] - base[key]) / base[key]:+8.1%}" if base[key] else "     n/a"
+        print(f"{name:<12} {change('rps'):>9} {change('p50_ms'):>9} {change('p95_ms'):>9} {change('p99_ms'):>9}")
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(BASELINE_DIR)).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--fake-median-ms", type=float, default=800)
+    parser.add_argument("--fake-sigma", type=float, default=0.4)
+    parser.add_argument("--fake-error-rate", type=float, default=0.0)
+    parser.add_argument("--url", help="drive an already running server instead of starting one")
+    parser.add_argument("--save", metavar="NAME", help="write results to benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare with benchmarks/baselines/NAME.json")
+    args = parser.parse_args()
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    fake = {"median_ms": args.fake_median_ms, "sigma": args.fake_sigma, "error_rate": args.fake_error_rate}
+
+    server = None
+    if args.url:
+        parts = urlsplit(args.url)
+        client = Client(parts.hostname, parts.port or 80)
+    else:
+        port = _free_port()
+        db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+        server = multiprocessing.Process(target=_serve, args=(port, db_path, fake))   # not a daemon: it owns the hashing pool
+        server.start()
+        client = Client("127.0.0.1", port)
+
+    try:
+        client.wait_ready()
+        run_id = f"{os.getpid()}-{int(time.time())}"
+        tokens = {}
+        for i in range(args.concurrency):
+            email = f"user-{run_id}-{i}@bench.local"
+            client.request("POST", "/api/register", {"email": email, "password": PASSWORD})
+            status, body = client.request("POST", "/api/login", {"email": email, "password": PASSWORD})
+            if status != 200:
+                raise RuntimeError(f"login failed during setup: {status} {body[:200]!r}")
+            tokens[email] = json.loads(body)["access_token"]
+
+        print(f"{os.cpu_count()} CPUs, {args.concurrency} clients, {args.duration:.0f}s per endpoint, "
+              f"fake Gemini median {args.fake_median_ms:.0f} ms sigma {args.fake_sigma} "
+              f"errors {args.fake_error_rate:.0%}" + (f", target {args.url}" if args.url else ""))
+        results = {}
+        for name in scenarios:
+            results[name] = run_scenario(make_scenario(name, client, run_id, tokens),
+                                         args.concurrency, args.duration)
+        _print_table(results)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.join()
+
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, args.compare + ".json"), encoding="utf-8") as f:
+            _compare(results, json.load(f))
+    if args.save:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        record = {
+            "name": args.save,
+            "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "git_commit": _git_commit(),
+            "machine": {"cpus": os.cpu_count(), "python": platform.python_version(), "platform": platform.platform()},
+            "options": {"concurrency": args.concurrency, "duration": args.duration, "fake": fake,
+                        "url": args.url},
+            "results": results,
+        }
+        path = os.path.join(BASELINE_DIR, args.save + ".json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2)
+            f.write("\n")
+        print(f"\nsaved {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Emergency-chat latency while /api/login is being hammered.
+
+    python -m benchmarks.login_burst_bench [--login-threads 16] [--requests 200]
+
+Runs the app twice in a child process on a throwaway SQLite database:
+once hashing inline on request threads (PASSWORD_HASH_WORKERS=0) and
+once with the hashing process pool. Both runs measure emergency-chat
+latency alone and again during a login burst.
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _serve(port, db_path, hash_workers):
+    import logging
+    import sys
+
+    from werkzeug.serving import make_server
+
+    # Keep per-request server output out of the report
+    sys.stdout = open(os.devnull, "w")
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    from app import create_app
+    from app.database import init_db
+
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + db_path,
+        "RESPONSE_CACHE_PATH": "",
+        "RATE_LIMIT_ENABLED": False,   # the burst comes from one IP on purpose
+        "PASSWORD_HASH_WORKERS": hash_workers,
+        "PASSWORD_HASH_MAX_PENDING": 64,
+        "PASSWORD_HASH_TIMEOUT": 60,
+    })
+    with app.app_context():
+        init_db()
+    make_server("127.0.0.1", port, app, threaded=True).serve_forever()
+
+
+def _post(port, path, body, timeout=60):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    try:
+        conn.request("POST", path, json.dumps(body), {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def _wait_ready(port):
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            _post(port, "/api/emergency/chat", {"message": "ping"}, timeout=2)
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def _chat_latencies(port, count):
+    samples = []
+    for _ in range(count):
+        started = time.perf_counter()
+        _post(port, "/api/emergency/chat", {"message": "person collapsed"})
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _summary(samples):
+    ordered = sorted(samples)
+    p = lambda pct: ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+    return f"p50 {statistics.median(samples):7.1f} ms  p95 {p(95):7.1f} ms  p99 {p(99):7.1f} ms"
+
+
+def run(label, hash_workers, login_threads, requests):
+    port = _free_port()
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    # Not a daemon: the server spawns its own hashing processes
+    server = multiprocessing.Process(target=_serve, args=(port, db_path, hash_workers))
+    server.start()
+    try:
+        _wait_ready(port)
+        _post(port, "/api/register", {"email": "bench@example.com", "password": "pw-bench"})
+
+        quiet = _chat_latencies(port, requests)
+
+        stop = threading.Event()
+        logins = [0]
+
+        def hammer():
+            while not stop.is_set():
+                _post(port, "/api/login", {"email": "bench@example.com", "password": "pw-bench"})
+                logins[0] += 1
+
+        workers = [threading.Thread(target=hammer, daemon=True) for _ in range(login_threads)]
+        burst_started = time.perf_counter()
+        for t in workers:
+            t.start()
+        time.sleep(1)   # let the burst build up
+        busy = _chat_latencies(port, requests)
+        stop.set()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - burst_started
+
+        print(f"\n{label}")
+        print(f"  emergency chat, idle        {_summary(quiet)}")
+        print(f"  emergency chat, login burst {_summary(busy)}")
+        print(f"  logins completed            {logins[0] / elapsed:.1f}/s")
+    finally:
+        server.terminate()
+        server.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--login-threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--hash-workers", type=int, default=2)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.login_threads} login threads")
+    run("inline hashing (PASSWORD_HASH_WORKERS=0)", 0, args.login_threads, args.requests)
+    run(f"process pool (PASSWORD_HASH_WORKERS={args.hash_workers})", args.hash_workers,
+        args.login_threads, args.requests)
+
+
+if __name__ == "__main__":
+    main()
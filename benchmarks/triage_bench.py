@@ -0,0 +1,51 @@
+"""
+Offline triage: rules engine vs. the previous if/elif substring chain.
+
+    python -m benchmarks.triage_bench [--complaints 100000]
+
+Complaints are generated from symptom phrases, fillers and casing noise.
+The legacy chain (app/services/triage_corpus.py) is a frozen copy of the
+branch logic that generate_smart_response used before the rules engine.
+"""
+import argparse
+import time
+from collections import Counter
+
+from app.services.triage_corpus import corpus, legacy_intent
+from app.services.triage_engine import triage_engine
+
+
+def timed(fn, complaints):
+    started = time.perf_counter()
+    results = [fn(text) for text in complaints]
+    return time.perf_counter() - started, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--complaints", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    complaints = corpus(args.complaints, args.seed)
+    legacy_s, legacy = timed(legacy_intent, complaints)
+    engine_s, engine = timed(lambda text: triage_engine.match(text).name, complaints)
+    respond_s, _ = timed(triage_engine.respond, complaints)
+
+    n = len(complaints)
+    print(f"{n:,} complaints")
+    print(f"  legacy if/elif chain   {legacy_s:6.2f} s  {legacy_s / n * 1e6:6.2f} us/complaint")
+    print(f"  rules engine (match)   {engine_s:6.2f} s  {engine_s / n * 1e6:6.2f} us/complaint")
+    print(f"  rules engine (respond) {respond_s:6.2f} s  {respond_s / n * 1e6:6.2f} us/complaint")
+
+    changed = Counter((old, new) for old, new in zip(legacy, engine) if old != new)
+    print(f"\n  {sum(changed.values()):,} complaints triaged differently:")
+    for (old, new), count in changed.most_common(8):
+        print(f"    {old:>10} -> {new:<10} {count:,}")
+
+    missed = sum(1 for old, new in zip(legacy, engine) if old == "chest_pain" and new != "chest_pain")
+    print(f"\n  legacy chest_pain complaints not triaged as chest_pain: {missed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Production server:   gunicorn -c gunicorn.conf.py
+#   WEB_CONCURRENCY worker processes x GUNICORN_THREADS threads, forked from one preloaded app.
+#   `kill -HUP <master pid>` restarts the workers gracefully: new ones start first, old ones stop
+#   accepting and finish their in-flight requests (Gemini calls included) before exiting.
+#   With preloading the code is loaded once by the master, so deploy new code with a full restart
+#   (or USR2 + TERM of the old master for zero downtime).
+import gc
+import os
+import signal
+
+wsgi_app = os.getenv("GUNICORN_APP", "run:app")   #`asgi:application` together with GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:" + os.getenv("PORT", "5000"))
+workers = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))    #Processes; CPU-bound work (hashing aside) scales with these
+threads = int(os.getenv("GUNICORN_THREADS", "16"))    #Per worker; a request waiting on Gemini holds one, keep <= DB_POOL_SIZE + DB_MAX_OVERFLOW
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") != "0"    #Build the app once in the master, workers share its memory copy-on-write
+# Longest work in flight at shutdown: an analysis job's Gemini budget (requests are bounded by shorter budgets)
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", str(int(float(os.getenv("ANALYSIS_JOB_BUDGET", "60"))) + 15)))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))    #Worker heartbeat; gthread beats from its main thread, so slow requests do not trip it
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))    #Recycle a worker (gracefully) after this many requests, 0 = never
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "0"))
+
+
+def _flask_app(worker):
+    app = worker.app.wsgi()
+    return getattr(app, "flask_app", app)   #asgi.py's AsyncApp wraps the Flask app
+
+
+def when_ready(server):
+    """Master, after preloading and before the first fork: import the Gemini SDK once for every worker."""
+    if server.cfg.preload_app:
+        from app.extensions import gemini
+        gemini.preload()
+        gc.freeze()   #The collector would otherwise write to every preloaded object, copying its page into each worker
+
+
+def post_fork(server, worker):
+    """New worker: drop what it inherited from the preloaded master and open its own."""
+    if not server.cfg.preload_app:
+        return
+    from app.extensions import analysis_jobs, db, gemini, password_hasher
+    with _flask_app(worker).app_context():
+        db.engine.dispose(close=False)   #Pooled connections stay the master's; close=False leaves them open for it
+    gemini.reset()   #gRPC channels must not cross a fork
+    password_hasher.shutdown()
+    analysis_jobs.shutdown()
+    # Response cache, rate-limit table, log thread and feed ids reopen per process on first use
+
+
+def post_worker_init(worker):
+    """SIGTERM (graceful stop) also ends this worker's capacity-feed streams, which never finish on their own."""
+    from app.extensions import hospital_feed
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handle_term(signum, frame):
+        hospital_feed.close()   #Clients reconnect to another worker with Last-Event-ID
+        if callable(previous):
+            previous(signum, frame)
+
+    signal.signal(signal.SIGTERM, handle_term)
+
+
+def worker_exit(server, worker):
+    """After the last in-flight request: let analysis jobs still running finish, gunicorn only waits for requests."""
+    from app.extensions import analysis_jobs
+    analysis_jobs.shutdown(wait=True)
@@ -0,0 +1,58 @@
+"""initial user and hospital tables
+
+Revision ID: 0001_initial
+Revises:
+Create Date: 2026-10-18 09:00:00
+
+Databases created by the old db.create_all() boot step already have these
+tables; they are left untouched so `flask db upgrade` works on them too.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_initial'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = sa.inspect(op.get_bind()).get_table_names()
+
+    if 'user' not in existing:
+        op.create_table(
+            'user',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('email', sa.String(length=150), nullable=False),
+            sa.Column('password_hash', sa.String(length=256), nullable=False),
+            sa.Column('name', sa.String(length=150), nullable=True),
+            sa.Column('age', sa.Integer(), nullable=True),
+            sa.Column('gender', sa.String(length=50), nullable=True),
+            sa.Column('contact', sa.String(length=50), nullable=True),
+            sa.Column('address', sa.String(length=300), nullable=True),
+            sa.Column('blood_group', sa.String(length=10), nullable=True),
+            sa.Column('blood_pressure', sa.String(length=50), nullable=True),
+            sa.Column('language', sa.String(length=50), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('email'),
+        )
+
+    if 'hospital' not in existing:
+        op.create_table(
+            'hospital',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=200), nullable=False),
+            sa.Column('distance', sa.String(length=50), nullable=True),
+            sa.Column('doctors', sa.Integer(), nullable=True),
+            sa.Column('beds', sa.String(length=100), nullable=True),
+            sa.Column('ventilators', sa.String(length=100), nullable=True),
+            sa.Column('blood', sa.String(length=100), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+
+def downgrade():
+    op.drop_table('hospital')
+    op.drop_table('user')
@@ -0,0 +1,52 @@
+"""hospital coordinates
+
+Revision ID: 0002_hospital_coordinates
+Revises: 0001_initial
+Create Date: 2026-10-18 09:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_hospital_coordinates'
+down_revision = '0001_initial'
+branch_labels = None
+depends_on = None
+
+# Coordinates for the rows inserted by seed_hospitals()
+SEED_COORDINATES = {
+    'City General Hospital': (28.6315, 77.2167),
+    'Metro Medical Center': (28.6219, 77.2295),
+    'Regional Health Institute': (28.6448, 77.1936),
+}
+
+
+def upgrade():
+    columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('hospital')}
+    with op.batch_alter_table('hospital') as batch_op:
+        if 'latitude' not in columns:
+            batch_op.add_column(sa.Column('latitude', sa.Float(), nullable=True))
+        if 'longitude' not in columns:
+            batch_op.add_column(sa.Column('longitude', sa.Float(), nullable=True))
+
+    hospital = sa.table(
+        'hospital',
+        sa.column('name', sa.String),
+        sa.column('latitude', sa.Float),
+        sa.column('longitude', sa.Float),
+    )
+    for name, (lat, lng) in SEED_COORDINATES.items():
+        op.execute(
+            hospital.update()
+            .where(hospital.c.name == name)
+            .where(hospital.c.latitude.is_(None))
+            .values(latitude=lat, longitude=lng)
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('hospital') as batch_op:
+        batch_op.drop_column('longitude')
+        batch_op.drop_column('latitude')
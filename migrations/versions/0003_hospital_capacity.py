@@ -0,0 +1,100 @@
+"""typed hospital capacity columns
+
+Revision ID: 0003_hospital_capacity
+Revises: 0002_hospital_coordinates
+Create Date: 2026-10-18 10:00:00
+
+Adds numeric bed/ventilator/blood columns next to the free-text ones and
+backfills them by parsing strings such as "120 (ICU: 25, Emergency: 30)".
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_hospital_capacity'
+down_revision = '0002_hospital_coordinates'
+branch_labels = None
+depends_on = None
+
+# Frozen copy of the parsing rules in app.models at the time of this revision
+BLOOD_STOCK_LEVELS = {'none': 0, 'low': 1, 'limited': 2, 'full': 3}
+LEADING_INT = re.compile(r'^\s*(\d+)')
+ICU_BEDS = re.compile(r'ICU\s*:\s*(\d+)', re.IGNORECASE)
+EMERGENCY_BEDS = re.compile(r'Emergency\s*:\s*(\d+)', re.IGNORECASE)
+
+INDEXED = ['beds_icu', 'beds_emergency', 'ventilators_available', 'blood_stock_level']
+
+
+def _first_int(pattern, text):
+    match = pattern.search(text or '')
+    return int(match.group(1)) if match else None
+
+
+def _blood_level(text):
+    lowered = (text or '').lower()
+    for word, level in BLOOD_STOCK_LEVELS.items():
+        if word in lowered:
+            return level
+    if 'out of' in lowered or 'empty' in lowered:
+        return BLOOD_STOCK_LEVELS['none']
+    return None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    columns = {c['name'] for c in inspector.get_columns('hospital')}
+    indexes = {i['name'] for i in inspector.get_indexes('hospital')}
+
+    with op.batch_alter_table('hospital') as batch_op:
+        for name, type_ in (
+            ('beds_total', sa.Integer()),
+            ('beds_icu', sa.Integer()),
+            ('beds_emergency', sa.Integer()),
+            ('ventilators_available', sa.Integer()),
+            ('blood_stock_level', sa.SmallInteger()),
+        ):
+            if name not in columns:
+                batch_op.add_column(sa.Column(name, type_, nullable=True))
+        for name in INDEXED:
+            if f'ix_hospital_{name}' not in indexes:
+                batch_op.create_index(f'ix_hospital_{name}', [name])
+
+    hospital = sa.table(
+        'hospital',
+        sa.column('id', sa.Integer),
+        sa.column('beds', sa.String),
+        sa.column('ventilators', sa.String),
+        sa.column('blood', sa.String),
+        sa.column('beds_total', sa.Integer),
+        sa.column('beds_icu', sa.Integer),
+        sa.column('beds_emergency', sa.Integer),
+        sa.column('ventilators_available', sa.Integer),
+        sa.column('blood_stock_level', sa.SmallInteger),
+    )
+    rows = bind.execute(
+        sa.select(hospital.c.id, hospital.c.beds, hospital.c.ventilators, hospital.c.blood)
+    ).fetchall()
+    for row in rows:
+        bind.execute(
+            hospital.update()
+            .where(hospital.c.id == row.id)
+            .values(
+                beds_total=_first_int(LEADING_INT, row.beds),
+                beds_icu=_first_int(ICU_BEDS, row.beds),
+                beds_emergency=_first_int(EMERGENCY_BEDS, row.beds),
+                ventilators_available=_first_int(LEADING_INT, row.ventilators),
+                blood_stock_level=_blood_level(row.blood),
+            )
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('hospital') as batch_op:
+        for name in INDEXED:
+            batch_op.drop_index(f'ix_hospital_{name}')
+        for name in ('blood_stock_level', 'ventilators_available', 'beds_emergency', 'beds_icu', 'beds_total'):
+            batch_op.drop_column(name)
@@ -0,0 +1,40 @@
+"""hospital updated_at stamp
+
+Revision ID: 0004_hospital_updated_at
+Revises: 0003_hospital_capacity
+Create Date: 2026-10-18 10:30:00
+
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_hospital_updated_at'
+down_revision = '0003_hospital_capacity'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    columns = {c['name'] for c in inspector.get_columns('hospital')}
+    indexes = {i['name'] for i in inspector.get_indexes('hospital')}
+
+    with op.batch_alter_table('hospital') as batch_op:
+        if 'updated_at' not in columns:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        if 'ix_hospital_updated_at' not in indexes:
+            batch_op.create_index('ix_hospital_updated_at', ['updated_at'])
+
+    hospital = sa.table('hospital', sa.column('updated_at', sa.DateTime))
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    op.execute(hospital.update().where(hospital.c.updated_at.is_(None)).values(updated_at=now))
+
+
+def downgrade():
+    with op.batch_alter_table('hospital') as batch_op:
+        batch_op.drop_index('ix_hospital_updated_at')
+        batch_op.drop_column('updated_at')
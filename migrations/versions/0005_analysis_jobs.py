@@ -0,0 +1,46 @@
+"""symptom analysis jobs
+
+Revision ID: 0005_analysis_jobs
+Revises: 0004_hospital_updated_at
+Create Date: 2026-10-18 14:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_analysis_jobs'
+down_revision = '0004_hospital_updated_at'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'analysis_job' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table(
+        'analysis_job',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('idempotency_key', sa.String(length=128), nullable=True),
+        sa.Column('symptoms', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('result', sa.Text(), nullable=True),
+        sa.Column('degraded', sa.Boolean(), nullable=False),
+        sa.Column('error', sa.String(length=200), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'idempotency_key', name='uq_analysis_job_user_key'),
+    )
+    op.create_index('ix_analysis_job_user_id', 'analysis_job', ['user_id'])
+    op.create_index('ix_analysis_job_status', 'analysis_job', ['status'])
+    op.create_index('ix_analysis_job_finished_at', 'analysis_job', ['finished_at'])
+
+
+def downgrade():
+    op.drop_table('analysis_job')
@@ -0,0 +1,51 @@
+"""emergency chat sessions
+
+Revision ID: 0006_chat_sessions
+Revises: 0005_analysis_jobs
+Create Date: 2026-10-18 16:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_chat_sessions'
+down_revision = '0005_analysis_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    tables = sa.inspect(op.get_bind()).get_table_names()
+
+    if 'chat_session' not in tables:
+        op.create_table(
+            'chat_session',
+            sa.Column('id', sa.String(length=32), nullable=False),
+            sa.Column('summary', sa.Text(), nullable=False),
+            sa.Column('turn_count', sa.Integer(), nullable=False),
+            sa.Column('total_tokens', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_chat_session_updated_at', 'chat_session', ['updated_at'])
+
+    if 'chat_turn' not in tables:
+        op.create_table(
+            'chat_turn',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('session_id', sa.String(length=32), nullable=False),
+            sa.Column('role', sa.String(length=1), nullable=False),
+            sa.Column('text', sa.Text(), nullable=False),
+            sa.Column('tokens', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['session_id'], ['chat_session.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_chat_turn_session_id', 'chat_turn', ['session_id'])
+
+
+def downgrade():
+    op.drop_table('chat_turn')
+    op.drop_table('chat_session')
@@ -6,3 +6,4 @@ if __name__ == '__main__':   #checks whether the main file is running if true th
     print("🚀 Starting Flask server...")   #Prints a message to the backend console
     #print(f"📍 Gemini service loaded: {GEMINI_LOADED}")
     app.run(debug=True, host='0.0.0.0', port=5000)   #host: allows access from other devices, If this were 127.0.0.1, only your machine could access it.
+    #Development only (one process, reloader, debugger). Production: `gunicorn -c gunicorn.conf.py`, see README
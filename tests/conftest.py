@@ -0,0 +1,104 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app import create_app
+from app.extensions import analysis_jobs, gemini
+
+
+class ScriptedModel:
+    """Stands in for the Gemini model: answers with `chunks` (one by one when streamed), then raises `error` if set."""
+
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+        self.calls = 0
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self.calls += 1
+        if stream:
+            return self._stream()
+        if self.error is not None:
+            raise self.error
+        return SimpleNamespace(text="".join(self.chunks))
+
+    def _stream(self):
+        for chunk in self.chunks:
+            yield SimpleNamespace(text=chunk)
+        if self.error is not None:
+            raise self.error
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        if stream:
+            return self._stream_async()
+        return self.generate_content(prompt)
+
+    async def _stream_async(self):
+        self.calls += 1
+        for chunk in self.chunks:
+            yield SimpleNamespace(text=chunk)
+        if self.error is not None:
+            raise self.error
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """create_app on a throwaway, migrated SQLite database, without Gemini; overrides are applied last."""
+    def make(**overrides):
+        from app.database import init_db
+
+        app = create_app({
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///" + str(tmp_path / "test.db"),
+            "RESPONSE_CACHE_PATH": "",
+            "RATE_LIMIT_ENABLED": False,
+            "PASSWORD_HASH_WORKERS": 0,
+            "GEMINI_API_KEY": None,
+            "GEMINI_FORCE_MOCK": True,
+            **overrides,
+        })
+        with app.app_context():
+            init_db()
+        return app
+
+    yield make
+    gemini.override(None)
+    analysis_jobs.shutdown(wait=True)
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def model():
+    """model(*chunks, error=None) installs a ScriptedModel as this process's Gemini model."""
+    def install(*chunks, error=None):
+        scripted = ScriptedModel(chunks or ("Stay calm. ", "Help is on the way."), error)
+        gemini.override(scripted)
+        return scripted
+
+    return install
+
+
+@pytest.fixture
+def sse_events():
+    """Parser for an SSE body: [(event, data), ...], data JSON-decoded."""
+    def parse(body):
+        if isinstance(body, bytes):
+            body = body.decode()
+        events = []
+        for block in body.strip().split("\n\n"):
+            lines = [line for line in block.splitlines() if not line.startswith(":")]
+            fields = dict(line.split(": ", 1) for line in lines if ": " in line)
+            if "event" in fields:
+                events.append((fields["event"], json.loads(fields.get("data", "null"))))
+        return events
+
+    return parse
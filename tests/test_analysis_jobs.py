@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.extensions import analysis_jobs, db, gemini
+
+
+class _CheckingModel:
+    """Answers at once, noting how many pooled DB connections are checked out meanwhile."""
+
+    def __init__(self):
+        self.checked_out = []
+
+    def generate_content(self, *args, **kwargs):
+        self.checked_out.append(db.engine.pool.checkedout())
+        return SimpleNamespace(text="Rest and drink fluids.")
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(ANALYSIS_JOB_WORKERS=1)
+
+
+def test_job_holds_no_connection_during_the_model_call(app):
+    from app.models import AnalysisJob, User, JOB_DONE
+
+    model = _CheckingModel()
+    gemini.override(model)
+    with app.app_context():
+        user = User(email="a@example.com", password_hash="x")
+        db.session.add(user)
+        db.session.commit()
+        job_id = analysis_jobs.submit(app, user.id, "sore throat")[0].id
+        db.session.remove()   # give the request's connection back, as the end of a request would
+        analysis_jobs.shutdown(wait=True)   # the job has run
+        job = db.session.get(AnalysisJob, job_id)
+        assert (job.status, job.result, job.degraded) == (JOB_DONE, "Rest and drink fluids.", False)
+    assert model.checked_out == [0]
@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+from app.asgi import AsyncApp
+from app.extensions import gemini
+from app.services.emergency_gemini_service import EMERGENCY_FALLBACK_TEXT
+
+
+class _FailingModel:
+    """Async model whose every call fails before the first chunk."""
+
+    async def generate_content_async(self, *args, **kwargs):
+        raise RuntimeError("upstream error")
+
+
+def _post(app, path, body):
+    """(status, headers, body) of one POST served by the ASGI app; the client stays connected until the end."""
+    async def run():
+        messages = [{"type": "http.request", "body": json.dumps(body).encode(), "more_body": False}]
+        sent = []
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await asyncio.Event().wait()
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "POST", "path": path, "query_string": b"", "client": ("127.0.0.1", 5000),
+                 "headers": [(b"content-type", b"application/json")]}
+        await AsyncApp(app)(scope, receive, send)
+        start = sent[0]
+        return (start["status"], {k.decode(): v.decode() for k, v in start["headers"]},
+                b"".join(m.get("body", b"") for m in sent[1:]))
+
+    return asyncio.run(run())
+
+
+def test_symptoms_json(app, model):
+    model("Rest, fluids ", "and see a doctor if it persists.")
+    status, headers, body = _post(app, "/api/symptoms/analyze", {"symptoms": "mild fever"})
+    assert status == 200
+    assert headers["content-type"] == "application/json"
+    assert json.loads(body) == {"reply": "Rest, fluids and see a doctor if it persists.", "degraded": False}
+
+
+def test_symptoms_json_model_failure_is_degraded(app):
+    gemini.override(_FailingModel())
+    status, _, body = _post(app, "/api/symptoms/analyze", {"symptoms": "mild fever"})
+    assert status == 200
+    assert json.loads(body)["degraded"] is True
+
+
+def test_symptoms_stream_without_model_is_degraded(app, sse_events):
+    status, headers, body = _post(app, "/api/symptoms/analyze", {"symptoms": "mild fever", "stream": True})
+    assert (status, headers["content-type"]) == (200, "text/event-stream; charset=utf-8")
+    events = sse_events(body)
+    assert {event for event, _ in events[:-1]} == {"chunk"}
+    assert events[-1] == ("done", {"degraded": True})
+
+
+def test_emergency_stream(app, model, sse_events):
+    model("Stay calm. ", "Help is on the way.")
+    status, headers, body = _post(app, "/api/emergency/chat", {"message": "my friend collapsed", "stream": True})
+    assert (status, headers["content-type"]) == (200, "text/event-stream; charset=utf-8")
+    events = sse_events(body)
+    assert [event for event, _ in events] == ["hospitals", "chunk", "chunk", "done"]
+    assert "".join(data["text"] for event, data in events if event == "chunk") == "Stay calm. Help is on the way."
+    assert events[-1] == ("done", {"degraded": False})
+
+
+def test_emergency_stream_failure_is_canned_first_aid(app, sse_events):
+    gemini.override(_FailingModel())
+    _, _, body = _post(app, "/api/emergency/chat", {"message": "my friend collapsed", "stream": True})
+    events = sse_events(body)
+    assert events[1:] == [("chunk", {"text": EMERGENCY_FALLBACK_TEXT}), ("done", {"degraded": True})]
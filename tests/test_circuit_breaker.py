@@ -0,0 +1,122 @@
+from types import SimpleNamespace
+
+import pytest
+
+import app.services.circuit_breaker as circuit_breaker
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(circuit_breaker, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def _breaker(probes=1):
+    breaker = CircuitBreaker("test", ignore=(KeyError,))
+    breaker.window, breaker.min_calls, breaker.failure_rate = 10, 4, 0.5
+    breaker.slow_call_s, breaker.slow_rate = 5.0, 0.75
+    breaker.open_seconds, breaker.probes = 30.0, probes
+    return breaker
+
+
+def _record(breaker, failed, elapsed=0.0):
+    breaker.release(breaker.acquire(), failed, elapsed)
+
+
+def _opened(breaker):
+    for failed in (False, True, False, True):
+        _record(breaker, failed)
+    assert breaker.state == OPEN
+    return breaker
+
+
+def test_opens_on_the_failure_rate_once_min_calls_are_seen(clock):
+    breaker = _breaker()
+    for _ in range(3):
+        _record(breaker, True)
+    assert breaker.state == CLOSED   # 3 of 3 failed, but fewer than min_calls
+    _record(breaker, False)
+    assert breaker.state == OPEN   # 3 of 4
+
+    clock.now += 10
+    with pytest.raises(CircuitOpen) as refused:
+        breaker.acquire()
+    assert refused.value.retry_after == 20
+    assert breaker.stats()["short_circuited"] == 1
+
+
+def test_opens_on_the_slow_call_rate(clock):
+    breaker = _breaker()
+    for elapsed in (6.0, 6.0, 1.0, 6.0):
+        _record(breaker, False, elapsed)
+    assert breaker.state == OPEN
+
+
+def test_ignored_and_unknown_outcomes_are_not_counted(clock):
+    breaker = _breaker()
+    for _ in range(6):
+        with pytest.raises(KeyError), breaker.track():
+            raise KeyError("admission control, not the dependency")
+        _record(breaker, None)   # e.g. the client went away
+    assert breaker.state == CLOSED and breaker.stats()["window_calls"] == 0
+
+
+def test_half_open_probe_success_closes(clock):
+    breaker = _opened(_breaker())
+    clock.now += 30
+    assert breaker.state == HALF_OPEN
+    probe = breaker.acquire()
+    assert probe is True
+    with pytest.raises(CircuitOpen):   # one probe at a time
+        breaker.acquire()
+    breaker.release(probe, failed=False)
+    assert breaker.state == CLOSED
+    assert breaker.stats()["closed"] == 1
+    assert breaker.acquire() is False   # closed again: plain calls, no probes
+
+
+def test_half_open_probe_failure_opens_again(clock):
+    breaker = _opened(_breaker(probes=2))
+    clock.now += 30
+    first, second = breaker.acquire(), breaker.acquire()
+    breaker.release(first, failed=False)
+    assert breaker.state == HALF_OPEN   # needs both probes to succeed
+    breaker.release(second, failed=True)
+    assert breaker.state == OPEN
+    assert breaker.stats()["opened"] == 2
+    clock.now += 29
+    assert breaker.state == OPEN
+
+
+def test_check_fails_fast_but_takes_no_probe(clock):
+    breaker = _opened(_breaker())
+    with pytest.raises(CircuitOpen):
+        breaker.check()
+    clock.now += 30
+    breaker.check()
+    breaker.check()
+    assert breaker.acquire() is True   # the probe is still there for the real call
+
+
+def test_open_circuit_never_takes_a_pool_slot(app, clock):
+    from app.extensions import llm_breaker, llm_pool
+    from app.services.llm_calls import generate
+    from app.services.llm_pool import PRIORITY_ROUTINE
+
+    while llm_breaker.state != OPEN:
+        _record(llm_breaker, True)
+    model = SimpleNamespace()   # no generate_content: calling it would raise AttributeError
+    admitted = llm_pool.stats()["admitted"]
+    with pytest.raises(CircuitOpen):
+        generate("symptoms", "t", model, "prompt", PRIORITY_ROUTINE)
+    assert llm_pool.stats()["admitted"] == admitted and llm_pool.stats()["active"] == 0
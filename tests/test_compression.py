@@ -0,0 +1,105 @@
+import gzip
+import json
+
+import pytest
+from flask import Flask
+
+from app.services import compression
+from app.services.compression import Prefixed, ResponseCompressor
+
+BODY = json.dumps([{"name": f"Hospital {i}", "beds": i} for i in range(200)]).encode()
+
+
+@pytest.fixture
+def no_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+
+
+@pytest.mark.parametrize("header, codings", [
+    ("gzip, deflate", ("gzip",)),
+    ("gzip;q=0, deflate", ()),
+    ("*", ("gzip",)),
+    ("*;q=0.5, gzip;q=0", ()),
+    ("br", ()),   # br is all the client takes and we cannot produce it
+    ("GZIP; q=0.8, br;q=1", ("gzip",)),
+    ("gzip;q=oops", ()),
+    ("", ()),
+])
+def test_negotiation_without_brotli(no_brotli, header, codings):
+    assert ResponseCompressor().codings_for(header) == codings
+
+
+@pytest.mark.parametrize("header, codings", [
+    ("gzip, br", ("br", "gzip")),
+    ("br;q=0, gzip", ("gzip",)),
+    ("*", ("br", "gzip")),
+    ("*, br;q=0", ("gzip",)),
+])
+def test_negotiation_with_brotli(header, codings):
+    pytest.importorskip("brotli")
+    assert ResponseCompressor().codings_for(header) == codings
+
+
+def test_disabled_compressor_offers_nothing():
+    compressor = ResponseCompressor()
+    compressor.enabled = False
+    assert compressor.codings_for("gzip") == ()
+
+
+def test_prefixed_body_gunzips_to_lead_shared_tail():
+    compressor = ResponseCompressor()
+    shared = BODY.decode()
+    for tail in (b'], "nearest": 3}', b'], "nearest": null}'):
+        data, coding = compressor.encode(Prefixed(b'{"hospitals": ', shared, tail), "gzip")
+        assert coding == "gzip"
+        assert gzip.decompress(data) == b'{"hospitals": ' + BODY + tail
+
+    primed = compressor._primed
+    compressor.encode(Prefixed(b'{"hospitals": ', shared, b"}"), "gzip")
+    assert compressor._primed is primed   # same snapshot: the primed stream is reused
+
+    changed = shared.replace("Hospital 1", "Clinic 1")
+    data, _ = compressor.encode(Prefixed(b'{"hospitals": ', changed, b"}"), "gzip")
+    assert compressor._primed is not primed
+    assert gzip.decompress(data) == b'{"hospitals": ' + changed.encode() + b"}"
+
+
+def test_prefixed_body_without_gzip_is_sent_whole(no_brotli):
+    body = Prefixed(b"[", BODY.decode(), b"]")
+    assert ResponseCompressor().encode(body, "identity") == (b"[" + BODY + b"]", None)
+
+
+def _compress(make_response, accept_encoding="gzip"):
+    app = Flask(__name__)
+    with app.test_request_context():
+        return ResponseCompressor().compress(make_response(app), accept_encoding)
+
+
+def test_compress_encodes_json(no_brotli):
+    response = _compress(lambda app: app.response_class(BODY, mimetype="application/json"))
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.vary
+    assert gzip.decompress(response.get_data()) == BODY
+
+
+def test_compress_leaves_small_bodies_alone(no_brotli):
+    response = _compress(lambda app: app.response_class(b'{"ok": true}', mimetype="application/json"))
+    assert "Content-Encoding" not in response.headers
+    assert response.get_data() == b'{"ok": true}'
+
+
+@pytest.mark.parametrize("make_response", [
+    pytest.param(lambda app: app.response_class(iter([b"event: token\ndata: {}\n\n"]),
+                                                mimetype="text/event-stream"), id="sse"),
+    pytest.param(lambda app: app.response_class(BODY, mimetype="text/event-stream"), id="sse-buffered"),
+    pytest.param(lambda app: app.response_class(iter([BODY]), mimetype="application/json"), id="streamed"),
+    pytest.param(lambda app: app.response_class(status=304, mimetype="application/json"), id="not-modified"),
+    pytest.param(lambda app: app.response_class(BODY, mimetype="application/json",
+                                                headers={"Content-Encoding": "br"}), id="already-encoded"),
+])
+def test_compress_skips(no_brotli, make_response):
+    response = _compress(make_response)
+    assert response.headers.get("Content-Encoding") in (None, "br")
+    assert "Accept-Encoding" not in response.vary
+    if not response.is_streamed:
+        assert response.get_data() == make_response(Flask(__name__)).get_data()
@@ -0,0 +1,51 @@
+import pytest
+
+from app.extensions import gemini
+
+
+class _FailingModel:
+    """A model whose every call fails, as when Gemini answers with an error."""
+
+    def generate_content(self, *args, **kwargs):
+        raise RuntimeError("upstream error")
+
+
+@pytest.mark.parametrize("broken", [None, _FailingModel()], ids=["no_model", "error"])
+def test_symptom_fallbacks_are_degraded(client, broken):
+    gemini.override(broken)
+    response = client.post("/api/symptoms/analyze", json={"symptoms": "headache and fever"})
+    assert response.status_code == 200
+    assert response.get_json()["degraded"] is True
+
+
+@pytest.mark.parametrize("broken", [None, _FailingModel()], ids=["no_model", "error"])
+def test_symptom_stream_fallbacks_are_degraded(client, broken, sse_events):
+    gemini.override(broken)
+    response = client.post("/api/symptoms/analyze", json={"symptoms": "headache and fever", "stream": True})
+    events = sse_events(response.get_data())
+    assert [e for e, _ in events[:-1]] == ["chunk"] * (len(events) - 1)
+    assert events[-1] == ("done", {"degraded": True})
+
+
+def _turns(client, session_id):
+    from app.extensions import db
+    from app.models import ChatTurn
+
+    with client.application.app_context():
+        return [(t.role, t.text) for t in db.session.query(ChatTurn).filter_by(session_id=session_id)]
+
+
+@pytest.mark.parametrize("broken", [None, _FailingModel()], ids=["no_model", "error"])
+@pytest.mark.parametrize("stream", [False, True], ids=["json", "stream"])
+def test_emergency_fallbacks_are_degraded_and_not_recorded(client, broken, stream, sse_events):
+    gemini.override(broken)
+    session_id = client.post("/api/emergency/sessions").get_json()["session_id"]
+    response = client.post("/api/emergency/chat",
+                           json={"message": "my friend collapsed", "session_id": session_id, "stream": stream})
+    assert response.status_code == 200
+    if stream:
+        assert sse_events(response.get_data())[-1] == ("done", {"degraded": True})
+    else:
+        assert response.get_json()["degraded"] is True
+    # Only the user's message is kept: canned text is not the model's answer
+    assert _turns(client, session_id) == [("u", "my friend collapsed")]
@@ -0,0 +1,16 @@
+from app.extensions import llm_metrics
+from app.services.emergency_gemini_service import SYSTEM_PROMPT
+
+
+def _fallbacks(reason):
+    return llm_metrics.fallbacks.value(reason=reason, **llm_metrics._labels("emergency", SYSTEM_PROMPT))
+
+
+def test_stream_failure_after_the_first_chunk_is_logged_and_counted(client, model, sse_events, caplog):
+    model("Stay calm. ", error=RuntimeError("upstream reset"))
+    before = _fallbacks("error")
+    response = client.post("/api/emergency/chat", json={"message": "my friend collapsed", "stream": True})
+    events = sse_events(response.get_data())
+    assert [event for event, _ in events] == ["hospitals", "chunk", "error"]
+    assert _fallbacks("error") == before + 1
+    assert any(r.message == "emergency_ai_failed" and r.stream for r in caplog.records)
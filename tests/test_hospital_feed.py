@@ -0,0 +1,82 @@
+from contextlib import nullcontext
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.hospital_feed import HospitalFeed
+
+
+class _Directory:
+    """Stands in for HospitalDirectory: one hospital, versions set by the test."""
+
+    check_interval = 0.01
+
+    def __init__(self):
+        self.version = 0
+
+    def add_listener(self, listener):
+        self.listener = listener
+
+    def by_id(self):
+        return self.version, {1: {"name": "City Hospital"}}
+
+    def ensure_loaded(self):
+        pass
+
+
+@pytest.fixture
+def feed():
+    feed = HospitalFeed(_Directory())
+    feed.init_app(SimpleNamespace(config={"HOSPITAL_FEED_HISTORY": 2}, app_context=nullcontext))
+    return feed
+
+
+def _update(feed, version):
+    feed.directory.version = version
+    feed.publish(version, {1: {"beds": str(version)}})
+
+
+def _ids(chunk):
+    return [line[4:] for line in chunk.splitlines() if line.startswith("id: ")]
+
+
+def _first(feed, last_event_id):
+    stream = feed.stream(last_event_id)
+    try:
+        return next(stream)
+    finally:
+        stream.close()
+
+
+def test_reconnect_gets_only_the_missed_deltas(feed):
+    for version in (1, 2):
+        _update(feed, version)
+    epoch = feed.epoch
+    assert feed.resume(f"{epoch}:1") == (2, feed._events[-1][1])
+    assert feed.resume(f"{epoch}:2") == (2, "")   # nothing missed
+
+    chunk = _first(feed, f"{epoch}:1")
+    assert "event: delta" in chunk and "event: snapshot" not in chunk
+    assert _ids(chunk) == [f"{epoch}:2"]
+    assert feed.stats()["resumed"] == 3
+
+
+def test_reconnect_behind_the_ring_gets_a_snapshot(feed):
+    for version in (1, 2, 3, 4):   # the ring keeps 3 and 4
+        _update(feed, version)
+    epoch = feed.epoch
+    assert feed.resume(f"{epoch}:2") == (4, "".join(event for _, event in feed._events))
+    assert feed.resume(f"{epoch}:1") is None
+
+    chunk = _first(feed, f"{epoch}:1")
+    assert "event: snapshot" in chunk
+    assert _ids(chunk) == [f"{epoch}:4"]
+
+
+@pytest.mark.parametrize("last_event_id", ["0123abcd:1", "{epoch}:99", "{epoch}:x", "", None])
+def test_ids_of_another_worker_or_never_issued_get_a_snapshot(feed, last_event_id):
+    _update(feed, 1)
+    if last_event_id:
+        last_event_id = last_event_id.format(epoch=feed.epoch)
+    assert feed.resume(last_event_id) is None
+    assert "event: snapshot" in _first(feed, last_event_id)
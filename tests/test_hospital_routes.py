@@ -0,0 +1,26 @@
+import pytest
+
+
+@pytest.fixture
+def client(make_app):
+    return make_app(HOSPITAL_UPDATE_TOKEN="secret", HOSPITAL_FEED_MAX_SUBSCRIBERS=1).test_client()
+
+
+@pytest.mark.parametrize("body", [[], ["beds"], "beds", 3])
+def test_update_rejects_a_body_that_is_not_an_object(client, body):
+    response = client.patch("/api/hospitals/1", json=body, headers={"X-Hospital-Token": "secret"})
+    assert response.status_code == 400
+
+
+def test_feed_streams_per_worker_are_capped(client):
+    first = client.get("/api/hospitals/feed", buffered=False)
+    assert first.status_code == 200
+
+    refused = client.get("/api/hospitals/feed", buffered=False)
+    assert refused.status_code == 503
+    assert int(refused.headers["Retry-After"]) > 0
+
+    first.close()   # the server closing the stream gives its thread back
+    again = client.get("/api/hospitals/feed", buffered=False)
+    assert again.status_code == 200
+    again.close()
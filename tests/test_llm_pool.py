@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.llm_pool import LLMPool, LLMPoolFull, PRIORITY_EMERGENCY, PRIORITY_ROUTINE
+
+
+def _pool(max_concurrency=4, reserved=1, routine_queue=4, emergency_queue=4):
+    pool = LLMPool()
+    pool.max_concurrency = max_concurrency
+    pool.emergency_reserved = reserved
+    pool.queue_limits = {PRIORITY_EMERGENCY: emergency_queue, PRIORITY_ROUTINE: routine_queue}
+    return pool
+
+
+def _queued(pool, count):
+    deadline = time.monotonic() + 5
+    while pool.stats()["waiting"] < count:
+        assert time.monotonic() < deadline, "waiter never queued"
+        time.sleep(0.001)
+
+
+def test_reserved_slot_is_left_for_emergencies():
+    pool = _pool(max_concurrency=4, reserved=1, routine_queue=0)
+    for _ in range(3):
+        pool.acquire(PRIORITY_ROUTINE)
+    with pytest.raises(LLMPoolFull):   # routine callers stop one short of the limit (queue size 0: refused at once)
+        pool.acquire(PRIORITY_ROUTINE)
+    assert not pool.try_acquire(PRIORITY_ROUTINE)
+
+    pool.acquire(PRIORITY_EMERGENCY, timeout=0)   # the reserved slot, no waiting
+    assert pool.stats()["active"] == 4
+    assert not pool.try_acquire(PRIORITY_EMERGENCY)
+
+
+def test_waiter_times_out_with_retry_after():
+    pool = _pool(max_concurrency=1, reserved=0)
+    pool.acquire()
+    started = time.monotonic()
+    with pytest.raises(LLMPoolFull) as refused:
+        pool.acquire(timeout=0.05)
+    assert time.monotonic() - started >= 0.05
+    assert refused.value.retry_after >= 1
+    stats = pool.stats()
+    assert (stats["timed_out"], stats["waiting"], stats["active"]) == (1, 0, 1)
+
+
+def test_full_queue_is_refused_without_waiting():
+    pool = _pool(max_concurrency=1, reserved=0, routine_queue=1)
+    pool.acquire()
+    waiter = threading.Thread(target=pool.acquire, kwargs={"timeout": 5})
+    waiter.start()
+    _queued(pool, 1)
+    started = time.monotonic()
+    with pytest.raises(LLMPoolFull):
+        pool.acquire(timeout=5)
+    assert time.monotonic() - started < 1
+    pool.release()
+    waiter.join()
+    assert pool.stats()["rejected"] == 1
+
+
+def test_emergency_waiters_are_served_before_routine_ones():
+    pool = _pool(max_concurrency=1, reserved=0)
+    pool.acquire()
+    order = []
+
+    def wait(priority):
+        pool.acquire(priority, timeout=5)
+        order.append(priority)
+        pool.release(priority)
+
+    routine = threading.Thread(target=wait, args=(PRIORITY_ROUTINE,))
+    routine.start()
+    _queued(pool, 1)
+    emergency = threading.Thread(target=wait, args=(PRIORITY_EMERGENCY,))
+    emergency.start()
+    _queued(pool, 2)
+    pool.release()
+    routine.join()
+    emergency.join()
+    assert order == [PRIORITY_EMERGENCY, PRIORITY_ROUTINE]
+
+
+def test_try_acquire_and_release_keep_the_count():
+    pool = _pool(max_concurrency=2, reserved=0)
+    assert pool.try_acquire() and pool.try_acquire()
+    assert not pool.try_acquire()   # full: a hedge is simply not sent
+    pool.release()
+    assert pool.stats()["active"] == 1
+
+    # A queued caller goes first: try_acquire does not jump the queue
+    waiter = threading.Thread(target=pool.acquire, kwargs={"timeout": 5})
+    assert pool.try_acquire()
+    waiter.start()
+    _queued(pool, 1)
+    pool.release()   # hands the slot to the waiter
+    waiter.join()
+    assert not pool.try_acquire()
+    pool.release()
+    pool.release()
+    assert pool.stats()["active"] == 0 and pool.try_acquire()
+
+
+def test_async_waiter_gets_the_released_slot():
+    pool = _pool(max_concurrency=1, reserved=0)
+    pool.acquire()
+
+    async def main():
+        task = asyncio.ensure_future(pool.acquire_async(timeout=5))
+        while pool.stats()["waiting"] < 1:
+            await asyncio.sleep(0.001)
+        await asyncio.to_thread(pool.release)
+        await task
+
+    asyncio.run(main())
+    assert pool.stats()["active"] == 1
@@ -0,0 +1,20 @@
+from app.services.metrics import Metrics
+
+
+def test_collector_values_render_as_gauges_or_counters():
+    registry = Metrics()
+    registry.add_collector(lambda: {
+        ("queue_depth", "Items waiting"): 3,
+        ("items_dropped_total", "Items dropped", "counter"): 7,
+    })
+    lines = registry.render().splitlines()
+    assert "# TYPE queue_depth gauge" in lines and "queue_depth 3" in lines
+    assert "# TYPE items_dropped_total counter" in lines and "items_dropped_total 7" in lines
+
+
+def test_running_totals_on_metrics_are_counters(client):
+    lines = client.get("/metrics").get_data(as_text=True).splitlines()
+    for name in ("llm_pool_rejected_total", "llm_circuit_short_circuited_total", "llm_circuit_opened_total",
+                 "llm_single_flight_saved_calls_total", "log_records_dropped_total"):
+        assert f"# TYPE {name} counter" in lines, name
+    assert "# TYPE llm_pool_active gauge" in lines
@@ -0,0 +1,23 @@
+import os
+import signal
+import time
+
+from app.services.password_hasher import PasswordHasher
+
+
+class _App:
+    config = {"PASSWORD_HASH_WORKERS": 1, "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000"}
+
+
+def test_pool_is_rebuilt_after_a_child_dies():
+    hasher = PasswordHasher()
+    hasher.init_app(_App)
+    try:
+        stored = hasher.hash("secret")
+        for pid in list(hasher._pool._processes):
+            os.kill(pid, signal.SIGKILL)
+        time.sleep(0.2)
+        assert hasher.verify(stored, "secret")
+        assert not hasher.needs_rehash(stored)
+    finally:
+        hasher.shutdown()
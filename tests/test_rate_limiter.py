@@ -0,0 +1,47 @@
+import pytest
+
+from app.services.rate_limiter import MemoryBuckets, SharedBuckets, retry_after_header
+
+NOW = 1_000_000.0
+
+
+@pytest.fixture(params=["memory", "shared"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBuckets()
+    return SharedBuckets(str(tmp_path / "buckets"), slots=64)
+
+
+def test_burst_then_refill_and_retry_after(store):
+    bucket = [(11, 1.0, 3)]   # 1 token per second, burst 3
+    assert [store.take(bucket, NOW) for _ in range(3)] == [(0.0, None)] * 3
+    assert store.take(bucket, NOW) == (1.0, 0)   # empty: the next token in one interval
+    assert store.take(bucket, NOW + 0.25) == (0.75, 0)
+    assert store.take(bucket, NOW + 1.0) == (0.0, None)   # one token back
+    assert store.take(bucket, NOW + 1.0) == (1.0, 0)
+    assert [store.take(bucket, NOW + 10.0) for _ in range(3)] == [(0.0, None)] * 3   # refilled, not beyond the burst
+    assert store.take(bucket, NOW + 10.0)[0] > 0
+
+
+def test_a_refused_check_takes_no_token_from_the_other_buckets(store):
+    user, ip = (21, 1.0, 5), (23, 1.0, 1)
+    assert store.take([user, ip], NOW) == (0.0, None)
+    assert store.take([user, ip], NOW) == (1.0, 1)   # the ip bucket is the empty one
+    assert [store.take([user], NOW) for _ in range(4)] == [(0.0, None)] * 4   # user bucket still has its 4 tokens
+    assert store.take([user], NOW)[0] > 0
+
+
+def test_retry_after_header_rounds_up_to_whole_seconds():
+    assert [retry_after_header(s) for s in (0.01, 1.0, 1.2, 59.5)] == ["1", "1", "2", "60"]
+
+
+def test_slot_closest_to_refilled_is_taken_over_when_every_probe_is_live(tmp_path):
+    # 8 slots: every key probes all of them, so 8 live buckets fill the table
+    store = SharedBuckets(str(tmp_path / "buckets"), slots=8)
+    for key in range(1, 9):
+        assert store.take([(key, 10.0, 1)], NOW + key) == (0.0, None)   # key 1 refills first, at NOW + 11
+    assert store.take([(9, 10.0, 1)], NOW + 8) == (0.0, None)   # a new key still gets a bucket
+
+    for key in range(2, 10):
+        assert store.take([(key, 10.0, 1)], NOW + 8)[0] > 0   # the others kept theirs, key 9 has its own
+    assert store.take([(1, 10.0, 1)], NOW + 8) == (0.0, None)   # key 1 lost its slot: a fresh bucket
@@ -0,0 +1,30 @@
+import os
+
+from app.services.response_cache import SQLiteTier, make_key, normalize_prompt
+
+
+def test_normalize_keeps_readings_apart():
+    assert make_key("symptoms", "t", "fever 39.5 C") != make_key("symptoms", "t", "fever 395 C")
+    assert normalize_prompt("BP 120/80, dizzy...") == "bp 120/80 dizzy"
+
+
+def test_normalize_collapses_case_space_and_punctuation():
+    assert normalize_prompt("  Sore   THROAT! ") == normalize_prompt("sore throat") == "sore throat"
+
+
+def test_split_compounds_share_a_key():
+    keys = {make_key("symptoms", "t", text) for text in ("headache", "Headache ", "head ache", "Head-ache!")}
+    assert len(keys) == 1
+    assert normalize_prompt("bad stomach aches and heart burn") == "bad stomachaches and heartburn"
+    assert normalize_prompt("ahead ache") == "ahead ache"   # whole words only
+
+
+def test_sqlite_tier_bound_and_touches(tmp_path):
+    tier = SQLiteTier(os.path.join(tmp_path, "cache.db"), max_entries=50)
+    tier.evict_every = 10
+    for i in range(200):
+        tier.set(f"k{i}", "ns", f"v{i}")
+    assert tier.get("k199") == "v199"
+    assert tier.get("k0") is None
+    count = tier._connection().execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+    assert count <= 50 + tier.evict_every
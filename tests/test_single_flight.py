@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from app.extensions import llm_single_flight
+from app.services.llm_calls import Deadline, DeadlineExceeded, generate_shared, generate_shared_async
+from app.services.llm_pool import PRIORITY_ROUTINE
+from app.services.single_flight import SingleFlight, WaitTimeout
+
+
+def _following(flight, count):
+    deadline = time.monotonic() + 5
+    while flight.stats()["followers"] < count:
+        assert time.monotonic() < deadline, "follower never joined"
+        time.sleep(0.001)
+
+
+def _leading(executor, flight, key, release, result=None, error=None):
+    """Starts a leader for key that finishes (with result or error) once `release` is set; returns its future."""
+    def fn():
+        release.wait(5)
+        if error is not None:
+            raise error
+        return result
+
+    leader = executor.submit(flight.do, key, fn)
+    while flight.stats()["in_flight"] == 0:
+        time.sleep(0.001)
+    return leader
+
+
+def test_follower_gets_the_leaders_result():
+    flight, release = SingleFlight(), threading.Event()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = _leading(executor, flight, "k", release, result="answer")
+        follower = executor.submit(flight.do, "k", lambda: pytest.fail("follower must not run fn"))
+        _following(flight, 1)
+        release.set()
+
+        assert leader.result(5) == ("answer", False)
+        assert follower.result(5) == ("answer", True)
+    assert flight.stats() == {"leaders": 1, "followers": 1, "in_flight": 0}
+
+
+def test_follower_gets_the_leaders_error():
+    flight, release = SingleFlight(), threading.Event()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = _leading(executor, flight, "k", release, error=ValueError("model broke"))
+        follower = executor.submit(flight.do, "k", lambda: pytest.fail("follower must not run fn"))
+        _following(flight, 1)
+        release.set()
+
+        for future in (leader, follower):
+            with pytest.raises(ValueError, match="model broke"):
+                future.result(5)
+
+
+def test_follower_stops_waiting_after_its_timeout():
+    flight, release = SingleFlight(), threading.Event()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        leader = _leading(executor, flight, "k", release, result="late")
+        with pytest.raises(WaitTimeout):
+            flight.do("k", lambda: None, timeout=0.05)
+        release.set()
+        assert leader.result(5) == ("late", False)
+
+
+class SlowThenFast:
+    """First call outlasts the caller's deadline and fails like an SDK timeout; later calls answer at once."""
+
+    def __init__(self, slow_s=0.3):
+        self.slow_s = slow_s
+        self.calls = 0
+        self.started = threading.Event()
+
+    def _answer(self):
+        self.calls += 1
+        if self.calls == 1:
+            self.started.set()
+            time.sleep(self.slow_s)
+            raise TimeoutError("deadline exceeded")
+        return SimpleNamespace(text="Rest and drink fluids.")
+
+    def generate_content(self, prompt, **kwargs):
+        return self._answer()
+
+    async def generate_content_async(self, prompt, **kwargs):
+        if self.calls == 0:
+            self.calls += 1
+            self.started.set()
+            await asyncio.sleep(self.slow_s)
+            raise TimeoutError("deadline exceeded")
+        return self._answer()
+
+
+def _shared(app, model, seconds):
+    with app.app_context():
+        return generate_shared("key", "symptom_check", "T", model, "prompt", PRIORITY_ROUTINE, Deadline(seconds))
+
+
+def test_follower_wait_timeout_is_a_deadline(app):
+    model = SlowThenFast(slow_s=0.5)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        leader = executor.submit(_shared, app, model, 5)
+        assert model.started.wait(5)
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            _shared(app, model, 0.05)
+        assert time.monotonic() - started < 0.4   # gave up on its own budget, not the leader's
+        with pytest.raises(TimeoutError):
+            leader.result(5)   # the leader's budget was long: a real model error, not a deadline
+
+
+def test_follower_with_budget_left_retries_after_leaders_deadline(app):
+    model = SlowThenFast()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        leader = executor.submit(_shared, app, model, 0.1)   # interactive request
+        assert model.started.wait(5)
+        response, shared = _shared(app, model, 10)             # analysis job joining its flight
+
+        with pytest.raises(DeadlineExceeded):
+            leader.result(5)
+    assert response.text == "Rest and drink fluids."
+    assert shared is False   # made its own call
+    assert model.calls == 2
+
+
+def test_async_follower_with_budget_left_retries_after_leaders_deadline(app):
+    model = SlowThenFast()
+
+    async def call(seconds):
+        return await generate_shared_async("key", "symptom_check", "T", model, "prompt",
+                                           PRIORITY_ROUTINE, Deadline(seconds))
+
+    async def scenario():
+        leader = asyncio.ensure_future(call(0.1))
+        while not model.started.is_set():
+            await asyncio.sleep(0.001)
+        follower = await call(10)
+        with pytest.raises(DeadlineExceeded):
+            await leader
+        return follower
+
+    with app.app_context():
+        response, shared = asyncio.run(scenario())
+    assert response.text == "Rest and drink fluids."
+    assert shared is False
+    assert llm_single_flight.stats()["in_flight"] == 0
@@ -0,0 +1,42 @@
+import re
+
+_EVENT = re.compile(r"(?:id: [^\n]+\n)?event: [a-z]+\ndata: [^\n]*\n\n")
+
+
+def _framed(body):
+    """True when the body is nothing but well-formed SSE events."""
+    return _EVENT.sub("", body) == ""
+
+
+def test_symptom_stream_sends_chunks_then_done(client, model, sse_events):
+    model("Rest ", "and drink fluids.")
+    response = client.post("/api/symptoms/analyze", json={"symptoms": "mild sore throat", "stream": True})
+    assert response.mimetype == "text/event-stream"
+    assert response.headers["Cache-Control"] == "no-cache"
+    body = response.get_data(as_text=True)
+    assert _framed(body)
+    assert sse_events(body) == [
+        ("chunk", {"text": "Rest "}), ("chunk", {"text": "and drink fluids."}), ("done", {"degraded": False}),
+    ]
+
+
+def test_symptom_stream_failing_midway_ends_with_an_error_event(client, model, sse_events):
+    model("Rest ", error=RuntimeError("upstream reset"))
+    response = client.post("/api/symptoms/analyze", json={"symptoms": "itchy eyes", "stream": True})
+    body = response.get_data(as_text=True)
+    assert _framed(body)
+    events = sse_events(body)
+    assert events[0] == ("chunk", {"text": "Rest "})
+    assert [event for event, _ in events] == ["chunk", "error"]
+    assert "msg" in events[-1][1]
+
+
+def test_emergency_stream_sends_hospitals_chunks_then_done(client, model, sse_events):
+    model("Stay calm. ", "Check breathing.")
+    response = client.post("/api/emergency/chat", json={"message": "someone fainted", "stream": True})
+    body = response.get_data(as_text=True)
+    assert _framed(body)
+    events = sse_events(body)
+    assert [event for event, _ in events] == ["hospitals", "chunk", "chunk", "done"]
+    assert "".join(data["text"] for event, data in events if event == "chunk") == "Stay calm. Check breathing."
+    assert events[-1] == ("done", {"degraded": False})
@@ -0,0 +1,33 @@
+import itertools
+
+from app.services.triage_engine import triage_engine
+from app.services.triage_corpus import PHRASES, corpus, legacy_intent
+
+
+def test_legacy_chest_pain_complaints_stay_chest_pain():
+    # Everything the old substring chain sent to chest_pain must still get the urgent reply
+    complaints = corpus(20000, seed=3)
+    complaints += [" ".join(pair) for pair in itertools.permutations(PHRASES, 2)]
+    complaints += ["chestpain", "CHESTPAINS since morning", "chest-pain", "my chest painful", "chest aching"]
+    missed = [text for text in complaints
+              if legacy_intent(text) == "chest_pain" and triage_engine.match(text).name != "chest_pain"]
+    assert missed == []
+
+
+def test_chest_stems():
+    for text in ("chestpain", "Chest aching", "pain in my chest", "chest ache at night", "mychestache"):
+        assert triage_engine.match(text).name == "chest_pain", text
+
+
+def test_pain_words_inside_other_words_are_not_chest_pain():
+    assert triage_engine.match("headache and chest congestion").name == "headache"
+    assert triage_engine.match("stomachache, chest cold").name == "digestive"
+    assert triage_engine.match("Spain trip, chest cold").name == "cough_cold"
+    assert triage_engine.match("chest tightness, toothache").name != "chest_pain"
+
+
+def test_word_start_intents_unchanged():
+    assert triage_engine.match("ahead of schedule").name == "general"
+    assert triage_engine.match("forehead bruise").name == "general"
+    assert triage_engine.match("stomach ache").name == "digestive"
+    assert triage_engine.match("vomiting since noon").name == "digestive"
@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+
+from app.services.user_cache import UserCache
+
+
+class _Session:
+    """Stands in for db.session: returns `row`, running `during_load` first."""
+
+    def __init__(self, row, during_load=None):
+        self.row = row
+        self.during_load = during_load
+
+    def get(self, model, user_id):
+        if self.during_load:
+            self.during_load()
+        return self.row
+
+
+def _user(name):
+    return SimpleNamespace(id=1, to_dict=lambda: {"name": name})
+
+
+def _cache_with(monkeypatch, session):
+    import app.extensions
+
+    monkeypatch.setattr(app.extensions, "db", SimpleNamespace(session=session))
+    return UserCache()
+
+
+def test_load_racing_an_invalidate_is_not_cached(monkeypatch):
+    session = _Session(_user("old"))
+    cache = _cache_with(monkeypatch, session)
+    session.during_load = lambda: cache.invalidate(1)   # profile update commits while the miss is loading
+    assert cache.get(1).profile == {"name": "old"}   # this request still gets what it read
+
+    session.during_load, session.row = None, _user("new")
+    assert cache.get(1).profile == {"name": "new"}
+
+
+def test_plain_miss_is_cached(monkeypatch):
+    session = _Session(_user("a"))
+    cache = _cache_with(monkeypatch, session)
+    first = cache.get(1)
+    session.row = _user("b")
+    assert cache.get(1) is first